@@ -1,3 +1,4 @@
+import asyncio
 import random
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
@@ -8,12 +9,12 @@ try:
     from bs4 import BeautifulSoup  # type: ignore[reportMissingModuleSource]
 except ImportError:
     BeautifulSoup = None  # Optional dependency for ORSR scraping
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Request, status
 from fastapi import Request as FastAPIRequest
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from services.ai_service import ai_service
 from services.analytics import (
     get_api_usage,
@@ -38,18 +39,17 @@ from services.auth import (
     get_user_by_email,
     get_user_tier_limits,
 )
-from services.cache import get, get_cache_key, set
+from services.cache import get, get_cache_key, pack_columns, set, unpack_columns
 from services.cache import get_stats as get_cache_stats
 from services.circuit_breaker import get_all_breakers, reset_breaker
 from services.database import (
     cleanup_expired_cache,
+    flush_search_buffer,
     get_database_stats,
     get_db_session,
     get_search_history,
     init_database,
-    save_analytics,
-    save_company_cache,
-    save_search_history,
+    save_search_bundle,
 )
 from services.debt_registers import search_debt_registers
 from services.erp.erp_service import (
@@ -93,7 +93,6 @@ from services.pl_biala_lista import (
 from services.pl_krs import (
     calculate_pl_risk_score,
     fetch_krs_pl,
-    is_polish_krs,
     parse_krs_data,
 )
 from services.proxy_rotation import get_proxy_stats, init_proxy_pool
@@ -103,13 +102,18 @@ from services.risk_intelligence import (
     generate_risk_report,
 )
 from services.search_by_name import search_by_name
+from services.search_builders import (
+    detect_country,
+    entry_name,
+    fallback_labels,
+    truncate_label,
+)
 from services.sk_orsr_provider import get_orsr_provider
 
 # Import nových služieb
 from services.sk_rpo import (
     calculate_sk_risk_score,
     fetch_rpo_sk,
-    is_slovak_ico,
     parse_rpo_data,
 )
 from services.stripe_service import (
@@ -150,6 +154,12 @@ async def startup_event():
     init_proxy_pool()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Zapíše čakajúce vyhľadávania z buffera pred ukončením"""
+    flush_search_buffer()
+
+
 # --- KONFIGURÁCIA CORS (Prepojenie s Frontendom) ---
 origins = [
     # HTTP origins
@@ -176,6 +186,9 @@ app.add_middleware(
 
 # --- DÁTOVÉ MODELY (Podľa sekcie 3: Dátový Model) ---
 class Node(BaseModel):
+    # Nemenné uzly - po zostavení grafu sa už nemodifikujú
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     id: str
     label: str
     type: str  # 'company' | 'person' | 'address' | 'debt'
@@ -187,6 +200,8 @@ class Node(BaseModel):
 
 
 class Edge(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     source: str
     target: str
     type: str  # 'OWNED_BY' | 'MANAGED_BY' | 'LOCATED_AT' | 'HAS_DEBT'
@@ -1703,7 +1718,10 @@ async def stripe_webhook(request: FastAPIRequest):
 @app.get("/api/payment/subscription")
 async def get_subscription(current_user: User = Depends(get_current_user)):
     """Získa subscription status používateľa"""
-    result = get_subscription_status(current_user.email)  # type: ignore[arg-type]
+    result = get_subscription_status(
+        current_user.email,  # type: ignore[arg-type]
+        current_user.stripe_customer_id,  # type: ignore[arg-type]
+    )
 
     if result is None:
         return {"status": "no_subscription", "tier": current_user.tier.value}
@@ -1714,7 +1732,10 @@ async def get_subscription(current_user: User = Depends(get_current_user)):
 @app.post("/api/payment/cancel")
 async def cancel_user_subscription(current_user: User = Depends(get_current_user)):
     """Zruší subscription používateľa"""
-    result = cancel_subscription(current_user.email)  # type: ignore[arg-type]
+    result = cancel_subscription(
+        current_user.email,  # type: ignore[arg-type]
+        current_user.stripe_customer_id,  # type: ignore[arg-type]
+    )
 
     if "error" in result:
         raise HTTPException(
@@ -1754,7 +1775,7 @@ def generate_test_data_sk(ico: str):
     # Hlavná firma
     main_company_id = f"sk_{ico}"
     nodes.append(
-        Node(
+        Node.model_construct(
             id=main_company_id,
             label="Testovacia Spoločnosť s.r.o.",
             type="company",
@@ -1767,7 +1788,7 @@ def generate_test_data_sk(ico: str):
     # Adresa hlavnej firmy
     main_address_id = f"addr_{ico}_main"
     nodes.append(
-        Node(
+        Node.model_construct(
             id=main_address_id,
             label="Bratislava, Hlavná 1",
             type="address",
@@ -1777,13 +1798,15 @@ def generate_test_data_sk(ico: str):
         )
     )
     edges.append(
-        Edge(source=main_company_id, target=main_address_id, type="LOCATED_AT")
+        Edge.model_construct(
+            source=main_company_id, target=main_address_id, type="LOCATED_AT"
+        )
     )
 
     # Konateľ 1
     person1_id = f"pers_{ico}_1"
     nodes.append(
-        Node(
+        Node.model_construct(
             id=person1_id,
             label="Ján Novák",
             type="person",
@@ -1792,12 +1815,16 @@ def generate_test_data_sk(ico: str):
             details="Konateľ, 15+ firiem v registri",
         )
     )
-    edges.append(Edge(source=main_company_id, target=person1_id, type="MANAGED_BY"))
+    edges.append(
+        Edge.model_construct(
+            source=main_company_id, target=person1_id, type="MANAGED_BY"
+        )
+    )
 
     # Konateľ 2
     person2_id = f"pers_{ico}_2"
     nodes.append(
-        Node(
+        Node.model_construct(
             id=person2_id,
             label="Peter Horváth",
             type="person",
@@ -1806,12 +1833,14 @@ def generate_test_data_sk(ico: str):
             details="Spoločník, 8% podiel",
         )
     )
-    edges.append(Edge(source=main_company_id, target=person2_id, type="OWNED_BY"))
+    edges.append(
+        Edge.model_construct(source=main_company_id, target=person2_id, type="OWNED_BY")
+    )
 
     # Dcérska spoločnosť 1 (CZ)
     daughter1_id = "cz_12345678"
     nodes.append(
-        Node(
+        Node.model_construct(
             id=daughter1_id,
             label="Dcérska Firma CZ s.r.o.",
             type="company",
@@ -1820,12 +1849,16 @@ def generate_test_data_sk(ico: str):
             details="IČO: 12345678, Vlastníctvo: 100%",
         )
     )
-    edges.append(Edge(source=main_company_id, target=daughter1_id, type="OWNED_BY"))
+    edges.append(
+        Edge.model_construct(
+            source=main_company_id, target=daughter1_id, type="OWNED_BY"
+        )
+    )
 
     # Dcérska spoločnosť 2 (SK)
     daughter2_id = "sk_77777777"
     nodes.append(
-        Node(
+        Node.model_construct(
             id=daughter2_id,
             label="Sesterská Spoločnosť s.r.o.",
             type="company",
@@ -1834,12 +1867,16 @@ def generate_test_data_sk(ico: str):
             details="IČO: 77777777, Status: Likvidácia, Dlh: 15,000 EUR",
         )
     )
-    edges.append(Edge(source=main_company_id, target=daughter2_id, type="OWNED_BY"))
+    edges.append(
+        Edge.model_construct(
+            source=main_company_id, target=daughter2_id, type="OWNED_BY"
+        )
+    )
 
     # Adresa dcérskej spoločnosti 2
     daughter2_address_id = "addr_77777777"
     nodes.append(
-        Node(
+        Node.model_construct(
             id=daughter2_address_id,
             label="Košice, Mierová 5",
             type="address",
@@ -1849,13 +1886,15 @@ def generate_test_data_sk(ico: str):
         )
     )
     edges.append(
-        Edge(source=daughter2_id, target=daughter2_address_id, type="LOCATED_AT")
+        Edge.model_construct(
+            source=daughter2_id, target=daughter2_address_id, type="LOCATED_AT"
+        )
     )
 
     # Spoločný konateľ medzi firmami
     shared_person_id = f"pers_{ico}_shared"
     nodes.append(
-        Node(
+        Node.model_construct(
             id=shared_person_id,
             label="Mária Kováčová",
             type="person",
@@ -1864,13 +1903,21 @@ def generate_test_data_sk(ico: str):
             details="Konateľ v 12+ firmách (White Horse Detector)",
         )
     )
-    edges.append(Edge(source=daughter2_id, target=shared_person_id, type="MANAGED_BY"))
-    edges.append(Edge(source=daughter1_id, target=shared_person_id, type="MANAGED_BY"))
+    edges.append(
+        Edge.model_construct(
+            source=daughter2_id, target=shared_person_id, type="MANAGED_BY"
+        )
+    )
+    edges.append(
+        Edge.model_construct(
+            source=daughter1_id, target=shared_person_id, type="MANAGED_BY"
+        )
+    )
 
     # Dlhová väzba
     debt_id = f"debt_{ico}"
     nodes.append(
-        Node(
+        Node.model_construct(
             id=debt_id,
             label="Dlh Finančnej správe",
             type="debt",
@@ -1879,14 +1926,38 @@ def generate_test_data_sk(ico: str):
             details="Dlh: 25,000 EUR, Finančná správa SR",
         )
     )
-    edges.append(Edge(source=main_company_id, target=debt_id, type="HAS_DEBT"))
+    edges.append(
+        Edge.model_construct(source=main_company_id, target=debt_id, type="HAS_DEBT")
+    )
 
     return nodes, edges
 
 
+def _make_fallback_company(country: str, query: str) -> Node:
+    """Vytvorí fallback uzol firmy, keď register krajiny neodpovedá."""
+    label, details = fallback_labels(country, query)
+    return Node(
+        id=f"{country.lower()}_{query}",
+        label=label,
+        type="company",
+        country=country,
+        risk_score=3,
+        details=details,
+        ico=query,
+    )
+
+
+# Testovacie IČO a lokálne adresy, pre ktoré sa používa vyšší (pro) rate limit tier
+_TEST_QUERIES = frozenset(
+    {"88888888", "27074358", "123456789", "1234567890", "12345678"}
+)
+_LOCAL_HOSTS = frozenset({"127.0.0.1", "localhost", "::1"})
+
+
 @app.get("/api/search", response_model=GraphResponse, tags=["Search"])
 async def search_company(
     q: str,
+    background_tasks: BackgroundTasks,
     force_refresh: bool = False,
     request: Request = None,  # type: ignore[assignment]
     response_model_examples={
@@ -1909,13 +1980,15 @@ async def search_company(
     Returns:
         GraphResponse: Graf s nodes (firmy, osoby, adresy) a edges (vzťahy)
     """
+    # Prázdny dopyt odmietneme ešte pred metrikami a rate limitom (nemíňa tokeny)
+    query_clean = q.strip()
+    if not query_clean:
+        raise HTTPException(status_code=400, detail="Query parameter 'q' is required")
+
     # Metrics - začať timer
     with TimerContext("search.duration"):
         increment("search.requests")
 
-        # Najprv vyčistíme query pre rate limiting
-        query_clean = q.strip()
-
         # Rate limiting - použijeme vyšší tier pre testy
         if request:
             client_id = get_client_id(request)
@@ -1923,23 +1996,12 @@ async def search_company(
             # Detekcia test requestov - použijeme pro tier
             is_test_request = (
                 # Test queries
-                query_clean
-                in ["88888888", "27074358", "123456789", "1234567890", "12345678"]
-                or
+                query_clean in _TEST_QUERIES
                 # Test headers
-                (request.headers.get("X-Test-Request") == "true" if request else False)
-                or (
-                    request.headers.get("User-Agent", "").startswith("python-requests/")
-                    if request
-                    else False
-                )
-                or
+                or request.headers.get("X-Test-Request") == "true"
+                or request.headers.get("User-Agent", "").startswith("python-requests/")
                 # Local development
-                (
-                    request.client.host in ["127.0.0.1", "localhost", "::1"]
-                    if request and request.client
-                    else False
-                )
+                or (request.client is not None and request.client.host in _LOCAL_HOSTS)
             )
 
             tier = "pro" if is_test_request else "free"
@@ -1962,11 +2024,6 @@ async def search_company(
         # Získať user IP pre analytics
         user_ip = request.client.host if request and request.client else None  # type: ignore[union-attr]
 
-    """
-    """
-    if not q:
-        raise HTTPException(status_code=400, detail="Query parameter 'q' is required")
-
     print(f"🔍 Vyhľadávam: {query_clean}...")
 
     # Ak query nie je číslo, skúsiť vyhľadávanie podľa názvu (len lokálna DB)
@@ -2020,7 +2077,10 @@ async def search_company(
         if cached_result:
             print(f"✅ Cache hit pre query: {query_clean}")
             increment("search.cache_hits")
-            return GraphResponse(**cached_result)
+            # Graf je v cache ako msgpack (po stĺpcoch), staršie záznamy ako dict
+            if isinstance(cached_result, bytes):
+                cached_result = unpack_columns(cached_result)
+            return GraphResponse.model_validate(cached_result)
     else:
         # Vymazať cache pre tento query
         from services.cache import delete
@@ -2036,7 +2096,7 @@ async def search_company(
         nodes, edges = generate_test_data_sk("88888888")
         result = GraphResponse(nodes=nodes, edges=edges)
         # Uložiť do cache
-        set(cache_key, result.dict())
+        set(cache_key, pack_columns(result.model_dump()))
         return result
 
     nodes = []
@@ -2060,8 +2120,18 @@ async def search_company(
             print(f"✅ Nájdené v ARES (CZ): {query_clean}")
             increment("search.by_country", tags={"country": "CZ"})
 
+            # Dlhové registry - Finančná správa ČR (paralelne pre všetky subjekty)
+            debt_results = await asyncio.gather(
+                *(
+                    asyncio.to_thread(
+                        search_debt_registers, item.get("ico", "N/A"), "CZ"
+                    )
+                    for item in results
+                )
+            )
+
             # Normalizácia a budovanie grafu pre CZ
-            for item in results:
+            for item, debt_result in zip(results, debt_results):
                 ico = item.get("ico", "N/A")
                 name = item.get("obchodniJmeno", "Neznáma firma")
                 address_text = item.get("sidlo", {}).get(
@@ -2071,11 +2141,10 @@ async def search_company(
                 company_id = f"cz_{ico}"
                 risk = calculate_trust_score(item)
 
-                # Dlhové registry - Finančná správa ČR
-                debt_result = search_debt_registers(ico, "CZ")
-                if debt_result and debt_result.get("data", {}).get("has_debt"):
-                    debt_data = debt_result["data"]
-                    debt_risk = debt_result.get("risk_score", 0)
+                debt_data = (debt_result or {}).get("data") or {}
+                has_debt = bool(debt_data.get("has_debt"))
+                debt_risk = debt_result.get("risk_score", 0) if debt_result else 0
+                if has_debt:
                     risk = max(risk, debt_risk)  # Použiť vyšší risk
 
                 nodes.append(
@@ -2091,8 +2160,8 @@ async def search_company(
                 )
 
                 # Dlhové registry
-                if debt_result and debt_result.get("data", {}).get("has_debt"):
-                    total_debt = debt_result["data"].get("total_debt", 0)
+                if has_debt:
+                    total_debt = debt_data.get("total_debt", 0)
                     debt_id = f"debt_cz_{ico}"
                     nodes.append(
                         Node(
@@ -2100,12 +2169,14 @@ async def search_company(
                             label=f"Dlh: {total_debt:,.0f} CZK",
                             type="debt",
                             country="CZ",
-                            risk_score=debt_result.get("risk_score", 0),
+                            risk_score=debt_risk,
                             details=f"Dlh voči Finančnej správe ČR: {total_debt:,.0f} CZK",
                         )
                     )
                     edges.append(
-                        Edge(source=company_id, target=debt_id, type="HAS_DEBT")
+                        Edge(
+                            source=company_id, target=debt_id, type="HAS_DEBT"
+                        )
                     )
 
                 # Adresa
@@ -2114,14 +2185,16 @@ async def search_company(
                     nodes.append(
                         Node(
                             id=address_id,
-                            label=address_text[:20] + "...",
+                            label=truncate_label(address_text, 20),
                             type="address",
                             country="CZ",
                             details=address_text,
                         )
                     )
                     edges.append(
-                        Edge(source=company_id, target=address_id, type="LOCATED_AT")
+                        Edge(
+                            source=company_id, target=address_id, type="LOCATED_AT"
+                        )
                     )
 
                 # Konateľ
@@ -2156,14 +2229,20 @@ async def search_company(
             # ARES nevrátil dáta - skúsiť SK
             print(f"⚠️ ARES nevrátil dáta, skúšam SK pre {query_clean}...")
 
+    country_code = detect_country(query_clean)
+
     # SLOVENSKÉ IČO - Hybridný model: Cache → DB → Live Scraping
-    if is_slovak_ico(query_clean):
+    if country_code == "SK":
         # SLOVENSKÉ IČO - Hybridný model: Cache → DB → Live Scraping
         print(f"🇸🇰 Detekované slovenské IČO: {query_clean}")
         increment("search.by_country", tags={"country": "SK"})
 
-        # 1. Skúsiť RPO API (ak je dostupné)
-        rpo_data = fetch_rpo_sk(query_clean)
+        # 1. Skúsiť RPO API (ak je dostupné) a súbežne dlhové registry
+        # Finančnej správy SR - volania sú nezávislé, nech sa latencie prekrývajú
+        rpo_data, debt_result = await asyncio.gather(
+            asyncio.to_thread(fetch_rpo_sk, query_clean),
+            asyncio.to_thread(search_debt_registers, query_clean, "SK"),
+        )
 
         if rpo_data:
             normalized = parse_rpo_data(rpo_data, query_clean)
@@ -2172,8 +2251,9 @@ async def search_company(
             # 2. Hybridný model: Cache → DB → Live Scraping (ORSR)
             print("⚠️ RPO API nedostupné, používam hybridný model (ORSR)...")
             orsr_provider = get_orsr_provider()
-            orsr_data = orsr_provider.lookup_by_ico(
-                query_clean, force_refresh=force_refresh
+            # Blokujúce (scraping, čakanie na zámok iného workera) - mimo event loopu
+            orsr_data = await asyncio.to_thread(
+                orsr_provider.lookup_by_ico, query_clean, force_refresh=force_refresh
             )
 
             if orsr_data:
@@ -2192,28 +2272,26 @@ async def search_company(
                 risk_score = 3
 
         # Dlhové registry - Finančná správa SR
-        debt_result = search_debt_registers(query_clean, "SK")
-        if debt_result and debt_result.get("data", {}).get("has_debt"):
-            debt_data = debt_result["data"]
-            debt_risk = debt_result.get("risk_score", 0)
+        debt_data = (debt_result or {}).get("data") or {}
+        has_debt = bool(debt_data.get("has_debt"))
+        debt_risk = debt_result.get("risk_score", 0) if debt_result else 0
+        if has_debt:
             risk_score = max(risk_score, debt_risk)  # Použiť vyšší risk
 
         # Hlavná firma
         company_id = f"sk_{query_clean}"
         company_name = normalized.get("name", f"Firma {query_clean}")
-        if debt_result and debt_result.get("data", {}).get("has_debt"):
+        if has_debt:
             company_name += " [DLH]"
 
-        nodes.append(
-            Node(
-                id=company_id,
-                label=company_name,
-                type="company",
-                country="SK",
-                risk_score=risk_score,
-                details=f"IČO: {query_clean}, Status: {normalized.get('status', 'N/A')}, Forma: {normalized.get('legal_form', 'N/A')}",
-                ico=query_clean,
-            )
+        company_node = Node(
+            id=company_id,
+            label=company_name,
+            type="company",
+            country="SK",
+            risk_score=risk_score,
+            details=f"IČO: {query_clean}, Status: {normalized.get('status', 'N/A')}, Forma: {normalized.get('legal_form', 'N/A')}",
+            ico=query_clean,
         )
 
         # Adresa
@@ -2221,37 +2299,38 @@ async def search_company(
         if isinstance(address_text, dict):
             address_text = ", ".join([v for v in address_text.values() if v])
         address_id = f"addr_sk_{query_clean}"
-        nodes.append(
-            Node(
-                id=address_id,
-                label=address_text[:50] + ("..." if len(address_text) > 50 else ""),
-                type="address",
-                country="SK",
-                details=address_text,
-            )
+        address_node = Node(
+            id=address_id,
+            label=truncate_label(address_text, 50),
+            type="address",
+            country="SK",
+            details=address_text,
+        )
+        address_edge = Edge(
+            source=company_id, target=address_id, type="LOCATED_AT"
         )
-        edges.append(Edge(source=company_id, target=address_id, type="LOCATED_AT"))
 
         # Konatelia
         executives = normalized.get("executives", [])
-        for i, exec_data in enumerate(executives[:5]):  # Max 5 pre MVP
-            exec_name = (
-                exec_data
-                if isinstance(exec_data, str)
-                else exec_data.get("name", f"Konateľ {i + 1}")
-            )
-            exec_id = f"pers_sk_{query_clean}_{i}"
-            nodes.append(
-                Node(
-                    id=exec_id,
-                    label=exec_name,
-                    type="person",
-                    country="SK",
-                    risk_score=5 if len(executives) > 10 else 2,
-                    details="Konateľ",
-                )
+        exec_risk = 5 if len(executives) > 10 else 2
+        exec_nodes = [
+            Node(
+                id=f"pers_sk_{query_clean}_{i}",
+                label=entry_name(exec_data, f"Konateľ {i + 1}"),
+                type="person",
+                country="SK",
+                risk_score=exec_risk,
+                details="Konateľ",
             )
-            edges.append(Edge(source=company_id, target=exec_id, type="MANAGED_BY"))
+            for i, exec_data in enumerate(executives[:5])  # Max 5 pre MVP
+        ]
+        exec_edges = [
+            Edge(source=company_id, target=n.id, type="MANAGED_BY")
+            for n in exec_nodes
+        ]
+
+        nodes.extend([company_node, address_node, *exec_nodes])
+        edges.extend([address_edge, *exec_edges])
 
         # Spoločníci
         shareholders = normalized.get("shareholders", [])
@@ -2272,7 +2351,11 @@ async def search_company(
                     details="Spoločník",
                 )
             )
-            edges.append(Edge(source=company_id, target=share_id, type="OWNED_BY"))
+            edges.append(
+                Edge(
+                    source=company_id, target=share_id, type="OWNED_BY"
+                )
+            )
             if orsr_data:
                 # Použiť dáta z ORSR
                 company_id = f"sk_{query_clean}"
@@ -2299,7 +2382,9 @@ async def search_company(
                         )
                     )
                     edges.append(
-                        Edge(source=company_id, target=address_id, type="LOCATED_AT")
+                        Edge(
+                            source=company_id, target=address_id, type="LOCATED_AT"
+                        )
                     )
 
                 # Pridať konateľa ak je v dátach
@@ -2316,25 +2401,16 @@ async def search_company(
                         )
                     )
                     edges.append(
-                        Edge(source=company_id, target=exec_id, type="MANAGED_BY")
+                        Edge(
+                            source=company_id, target=exec_id, type="MANAGED_BY"
+                        )
                     )
             else:
                 # Fallback dáta
                 print("⚠️ ORSR scraping zlyhal, používam fallback dáta")
-                company_id = f"sk_{query_clean}"
-                nodes.append(
-                    Node(
-                        id=company_id,
-                        label=f"Slovenská Firma {query_clean}",
-                        type="company",
-                        country="SK",
-                        risk_score=3,
-                        details=f"IČO: {query_clean}",
-                        ico=query_clean,
-                    )
-                )
+                nodes.append(_make_fallback_company("SK", query_clean))
 
-    elif is_polish_krs(query_clean):
+    elif country_code == "HU":
         # MAĎARSKÝ ADÓSZÁM - NAV integrácia
         print(f"🇭🇺 Detekované maďarský adószám: {query_clean}")
         increment("search.by_country", tags={"country": "HU"})
@@ -2346,69 +2422,57 @@ async def search_company(
 
             # Hlavná firma
             company_id = f"hu_{query_clean}"
-            nodes.append(
-                Node(
-                    id=company_id,
-                    label=normalized.get("name", f"Firma {query_clean}"),
-                    type="company",
-                    country="HU",
-                    risk_score=risk_score,
-                    details=f"Adószám: {query_clean}, Status: {normalized.get('status', 'N/A')}, Forma: {normalized.get('legal_form', 'N/A')}",
-                    ico=query_clean,
-                )
+            company_node = Node(
+                id=company_id,
+                label=normalized.get("name", f"Firma {query_clean}"),
+                type="company",
+                country="HU",
+                risk_score=risk_score,
+                details=f"Adószám: {query_clean}, Status: {normalized.get('status', 'N/A')}, Forma: {normalized.get('legal_form', 'N/A')}",
+                ico=query_clean,
             )
 
             # Adresa
             address_text = normalized.get("address", "Cím nincs megadva")
             address_id = f"addr_hu_{query_clean}"
-            nodes.append(
-                Node(
-                    id=address_id,
-                    label=address_text[:30] + ("..." if len(address_text) > 30 else ""),
-                    type="address",
-                    country="HU",
-                    details=address_text,
-                )
+            address_node = Node(
+                id=address_id,
+                label=truncate_label(address_text),
+                type="address",
+                country="HU",
+                details=address_text,
+            )
+            address_edge = Edge(
+                source=company_id, target=address_id, type="LOCATED_AT"
             )
-            edges.append(Edge(source=company_id, target=address_id, type="LOCATED_AT"))
 
             # Igazgatók (konatelia)
             executives = normalized.get("executives", [])
-            for i, exec_data in enumerate(executives[:3]):  # Max 3 pre MVP
-                exec_name = (
-                    exec_data
-                    if isinstance(exec_data, str)
-                    else exec_data.get("name", f"Igazgató {i + 1}")
-                )
-                exec_id = f"pers_hu_{query_clean}_{i}"
-                nodes.append(
-                    Node(
-                        id=exec_id,
-                        label=exec_name,
-                        type="person",
-                        country="HU",
-                        risk_score=5 if len(executives) > 5 else 2,
-                        details="Igazgató",
-                    )
+            exec_risk = 5 if len(executives) > 5 else 2
+            exec_nodes = [
+                Node(
+                    id=f"pers_hu_{query_clean}_{i}",
+                    label=entry_name(exec_data, f"Igazgató {i + 1}"),
+                    type="person",
+                    country="HU",
+                    risk_score=exec_risk,
+                    details="Igazgató",
                 )
-                edges.append(Edge(source=company_id, target=exec_id, type="MANAGED_BY"))
+                for i, exec_data in enumerate(executives[:3])  # Max 3 pre MVP
+            ]
+            exec_edges = [
+                Edge(source=company_id, target=n.id, type="MANAGED_BY")
+                for n in exec_nodes
+            ]
+
+            nodes.extend([company_node, address_node, *exec_nodes])
+            edges.extend([address_edge, *exec_edges])
         else:
             # Fallback dáta
             print("⚠️ NAV API nedostupné, používam fallback dáta")
-            company_id = f"hu_{query_clean}"
-            nodes.append(
-                Node(
-                    id=company_id,
-                    label=f"Magyar Cég {query_clean}",
-                    type="company",
-                    country="HU",
-                    risk_score=3,
-                    details=f"Adószám: {query_clean}",
-                    ico=query_clean,
-                )
-            )
+            nodes.append(_make_fallback_company("HU", query_clean))
 
-    elif is_polish_krs(query_clean):
+    elif country_code == "PL":
         # POĽSKÉ KRS - KRS integrácia
         print(f"🇵🇱 Detekované poľské KRS: {query_clean}")
         increment("search.by_country", tags={"country": "PL"})
@@ -2436,67 +2500,55 @@ async def search_company(
                 if normalized.get("vat_status")
                 else ""
             )
-            nodes.append(
-                Node(
-                    id=company_id,
-                    label=normalized.get("name", f"Firma {query_clean}"),
-                    type="company",
-                    country="PL",
-                    risk_score=risk_score,
-                    details=f"KRS: {query_clean}, Status: {normalized.get('status', 'N/A')}, Forma: {normalized.get('legal_form', 'N/A')}{vat_info}",
-                    ico=query_clean,
-                )
+            company_node = Node(
+                id=company_id,
+                label=normalized.get("name", f"Firma {query_clean}"),
+                type="company",
+                country="PL",
+                risk_score=risk_score,
+                details=f"KRS: {query_clean}, Status: {normalized.get('status', 'N/A')}, Forma: {normalized.get('legal_form', 'N/A')}{vat_info}",
+                ico=query_clean,
             )
 
             # Adresa
             address_text = normalized.get("address", "Adres nie podano")
             address_id = f"addr_pl_{query_clean}"
-            nodes.append(
-                Node(
-                    id=address_id,
-                    label=address_text[:30] + ("..." if len(address_text) > 30 else ""),
-                    type="address",
-                    country="PL",
-                    details=address_text,
-                )
+            address_node = Node(
+                id=address_id,
+                label=truncate_label(address_text),
+                type="address",
+                country="PL",
+                details=address_text,
+            )
+            address_edge = Edge(
+                source=company_id, target=address_id, type="LOCATED_AT"
             )
-            edges.append(Edge(source=company_id, target=address_id, type="LOCATED_AT"))
 
             # Zarządcy (konatelia)
             executives = normalized.get("executives", [])
-            for i, exec_data in enumerate(executives[:3]):  # Max 3 pre MVP
-                exec_name = (
-                    exec_data
-                    if isinstance(exec_data, str)
-                    else exec_data.get("name", f"Zarządca {i + 1}")
-                )
-                exec_id = f"pers_pl_{query_clean}_{i}"
-                nodes.append(
-                    Node(
-                        id=exec_id,
-                        label=exec_name,
-                        type="person",
-                        country="PL",
-                        risk_score=5 if len(executives) > 5 else 2,
-                        details="Zarządca",
-                    )
+            exec_risk = 5 if len(executives) > 5 else 2
+            exec_nodes = [
+                Node(
+                    id=f"pers_pl_{query_clean}_{i}",
+                    label=entry_name(exec_data, f"Zarządca {i + 1}"),
+                    type="person",
+                    country="PL",
+                    risk_score=exec_risk,
+                    details="Zarządca",
                 )
-                edges.append(Edge(source=company_id, target=exec_id, type="MANAGED_BY"))
+                for i, exec_data in enumerate(executives[:3])  # Max 3 pre MVP
+            ]
+            exec_edges = [
+                Edge(source=company_id, target=n.id, type="MANAGED_BY")
+                for n in exec_nodes
+            ]
+
+            nodes.extend([company_node, address_node, *exec_nodes])
+            edges.extend([address_edge, *exec_edges])
         else:
             # Fallback dáta
             print("⚠️ KRS API nedostupné, používam fallback dáta")
-            company_id = f"pl_{query_clean}"
-            nodes.append(
-                Node(
-                    id=company_id,
-                    label=f"Polska Spółka {query_clean}",
-                    type="company",
-                    country="PL",
-                    risk_score=3,
-                    details=f"KRS: {query_clean}",
-                    ico=query_clean,
-                )
-            )
+            nodes.append(_make_fallback_company("PL", query_clean))
 
     else:
         # Textové vyhľadávanie (názov firmy) - ARES integrácia alebo lokálna DB
@@ -2552,13 +2604,14 @@ async def search_company(
 
             # Dlhové registry - Finančná správa ČR
             debt_result = search_debt_registers(ico, "CZ")
-            if debt_result and debt_result.get("data", {}).get("has_debt"):
-                debt_data = debt_result["data"]
-                debt_risk = debt_result.get("risk_score", 0)
+            debt_data = (debt_result or {}).get("data") or {}
+            has_debt = bool(debt_data.get("has_debt"))
+            debt_risk = debt_result.get("risk_score", 0) if debt_result else 0
+            if has_debt:
                 risk = max(risk, debt_risk)  # Použiť vyšší risk
 
             company_name = name
-            if debt_result and debt_result.get("data", {}).get("has_debt"):
+            if has_debt:
                 company_name += " [DLH]"
 
             nodes.append(
@@ -2574,8 +2627,7 @@ async def search_company(
             )
 
             # Pridať dlh do grafu ak existuje
-            if debt_result and debt_result.get("data", {}).get("has_debt"):
-                debt_data = debt_result["data"]
+            if has_debt:
                 debt_id = f"debt_cz_{ico}"
                 total_debt = debt_data.get("total_debt", 0)
                 nodes.append(
@@ -2584,24 +2636,32 @@ async def search_company(
                         label=f"Dlh: {total_debt:,.0f} CZK",
                         type="debt",
                         country="CZ",
-                        risk_score=debt_result.get("risk_score", 0),
+                        risk_score=debt_risk,
                         details=f"Dlh voči Finančnej správe ČR: {total_debt:,.0f} CZK",
                     )
                 )
-                edges.append(Edge(source=company_id, target=debt_id, type="HAS_DEBT"))
+                edges.append(
+                    Edge(
+                        source=company_id, target=debt_id, type="HAS_DEBT"
+                    )
+                )
 
             # Adresa
             address_id = f"addr_cz_{ico}"
             nodes.append(
                 Node(
                     id=address_id,
-                    label=address_text[:20] + "...",
+                    label=truncate_label(address_text, 20),
                     type="address",
                     country="CZ",
                     details=address_text,
                 )
             )
-            edges.append(Edge(source=company_id, target=address_id, type="LOCATED_AT"))
+            edges.append(
+                Edge(
+                    source=company_id, target=address_id, type="LOCATED_AT"
+                )
+            )
 
             # Osoba (simulácia)
             person_name = f"Jan Novák ({ico[-3:]})"
@@ -2615,7 +2675,11 @@ async def search_company(
                     details="Konateľ",
                 )
             )
-            edges.append(Edge(source=company_id, target=person_id, type="MANAGED_BY"))
+            edges.append(
+                Edge(
+                    source=company_id, target=person_id, type="MANAGED_BY"
+                )
+            )
 
     # Risk Intelligence - vylepšené risk scores
     if nodes and edges:
@@ -2639,7 +2703,7 @@ async def search_company(
 
     # Uložiť do cache
     result = GraphResponse(nodes=nodes, edges=edges)
-    set(cache_key, result.dict())
+    set(cache_key, pack_columns(result.model_dump()))
 
     # Uložiť do databázy (história a cache)
     main_company = next((n for n in nodes if n.type == "company"), None)
@@ -2648,33 +2712,39 @@ async def search_company(
         max((n.risk_score for n in nodes if n.risk_score), default=0) if nodes else 0
     )
 
-    save_search_history(
-        query=q,
-        country=country,
-        result_count=len(nodes),
-        risk_score=risk_score if risk_score > 0 else None,
-        user_ip=user_ip,
-        response_data={"nodes_count": len(nodes), "edges_count": len(edges)},
-    )
+    history_row = {
+        "query": q,
+        "country": country,
+        "result_count": len(nodes),
+        "risk_score": risk_score if risk_score > 0 else None,
+        "user_ip": user_ip,
+        "response_data": {"nodes_count": len(nodes), "edges_count": len(edges)},
+    }
 
-    # Uložiť hlavnú firmu do cache
-    if main_company and main_company.ico:
-        save_company_cache(
-            identifier=main_company.ico,
-            country=country or "UNKNOWN",
-            company_name=main_company.label,
-            data={
-                "nodes": [n.dict() for n in nodes],
-                "edges": [e.dict() for e in edges],
+    # Hlavná firma do cache (country je String(2) v kľúči - bez krajiny sa necachuje)
+    company_row = None
+    if main_company and main_company.ico and country:
+        company_row = {
+            "identifier": main_company.ico,
+            "country": country,
+            "company_name": main_company.label,
+            "data": {
+                "nodes": [n.model_dump() for n in nodes],
+                "edges": [e.model_dump() for e in edges],
             },
-            risk_score=risk_score if risk_score > 0 else None,
-        )
+            "risk_score": risk_score if risk_score > 0 else None,
+        }
 
     # Analytics
-    save_analytics(
-        event_type="search",
-        event_data={"query": q, "country": country, "result_count": len(nodes)},
-        user_ip=user_ip,
+    analytics_row = {
+        "event_type": "search",
+        "event_data": {"query": q, "country": country, "result_count": len(nodes)},
+        "user_ip": user_ip,
+    }
+
+    # DB zápisy idú do buffera až po odoslaní odpovede, flush je dávkový
+    background_tasks.add_task(
+        save_search_bundle, history_row, analytics_row, company=company_row
     )
 
     # Metrics
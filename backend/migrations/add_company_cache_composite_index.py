@@ -0,0 +1,61 @@
+"""
+Migration: Kompozitný unique kľúč a index (identifier, country) pre company_cache
+"""
+
+from services.database import get_db_session
+from sqlalchemy import text
+
+
+def add_company_cache_composite_index():
+    """
+    Nahradí unique index na identifier kompozitným kľúčom (identifier, country).
+
+    Vykoná:
+    1. Odstráni pôvodný unique index ix_company_cache_identifier
+    2. Vytvorí unique index uq_company_cache_ident_ctry (identifier, country)
+    3. Vytvorí index ix_company_cache_ident_ctry_exp (identifier, country, expires_at)
+    """
+    with get_db_session() as db:
+        if not db:
+            print("❌ Databáza nie je dostupná")
+            return False
+
+        try:
+            # 1. Pôvodný unique index len na identifier (kolízie IČO medzi krajinami)
+            db.execute(text("DROP INDEX IF EXISTS ix_company_cache_identifier;"))
+            print("✅ Index ix_company_cache_identifier odstránený")
+
+            # 2. Kompozitný unique kľúč
+            db.execute(
+                text(
+                    """
+                    CREATE UNIQUE INDEX IF NOT EXISTS uq_company_cache_ident_ctry
+                    ON company_cache (identifier, country);
+                    """
+                )
+            )
+            print("✅ Unique index (identifier, country) vytvorený")
+
+            # 3. Index pokrývajúci lookup aj podmienku na expires_at
+            db.execute(
+                text(
+                    """
+                    CREATE INDEX IF NOT EXISTS ix_company_cache_ident_ctry_exp
+                    ON company_cache (identifier, country, expires_at);
+                    """
+                )
+            )
+            print("✅ Index (identifier, country, expires_at) vytvorený")
+
+            db.commit()
+            print("✅ Migrácia úspešne dokončená")
+            return True
+
+        except Exception as e:
+            print(f"❌ Chyba pri migrácii: {e}")
+            db.rollback()
+            return False
+
+
+if __name__ == "__main__":
+    add_company_cache_composite_index()
@@ -0,0 +1,46 @@
+"""
+Migration: BRIN index na company_cache.expires_at (cleanup expirovaného cache)
+"""
+
+from services.database import get_db_session
+from sqlalchemy import text
+
+
+def add_company_cache_expires_brin():
+    """
+    Nahradí B-tree index na expires_at BRIN indexom.
+
+    Cleanup maže podľa expires_at < now; BRIN je pre časové dáta
+    zapisované prevažne na koniec tabuľky o rády menší ako B-tree.
+    """
+    with get_db_session() as db:
+        if not db:
+            print("❌ Databáza nie je dostupná")
+            return False
+
+        try:
+            db.execute(
+                text(
+                    """
+                    CREATE INDEX IF NOT EXISTS ix_company_cache_expires_brin
+                    ON company_cache USING brin (expires_at);
+                    """
+                )
+            )
+            print("✅ BRIN index pre expires_at vytvorený")
+
+            db.execute(text("DROP INDEX IF EXISTS ix_company_cache_expires_at;"))
+            print("✅ Index ix_company_cache_expires_at odstránený")
+
+            db.commit()
+            print("✅ Migrácia úspešne dokončená")
+            return True
+
+        except Exception as e:
+            print(f"❌ Chyba pri migrácii: {e}")
+            db.rollback()
+            return False
+
+
+if __name__ == "__main__":
+    add_company_cache_expires_brin()
@@ -0,0 +1,44 @@
+"""
+Migration: Kompozitný index (connection_id, started_at) pre erp_sync_logs
+"""
+
+from services.database import get_db_session
+from sqlalchemy import text
+
+
+def add_erp_sync_logs_index():
+    """
+    Nahradí index na connection_id indexom (connection_id, started_at),
+    ktorý pokrýva filter aj ORDER BY started_at DESC LIMIT v get_erp_sync_logs.
+    """
+    with get_db_session() as db:
+        if not db:
+            print("❌ Databáza nie je dostupná")
+            return False
+
+        try:
+            db.execute(
+                text(
+                    """
+                    CREATE INDEX IF NOT EXISTS ix_erp_sync_logs_connection_started
+                    ON erp_sync_logs (connection_id, started_at);
+                    """
+                )
+            )
+            print("✅ Index (connection_id, started_at) vytvorený")
+
+            db.execute(text("DROP INDEX IF EXISTS ix_erp_sync_logs_connection_id;"))
+            print("✅ Index ix_erp_sync_logs_connection_id odstránený")
+
+            db.commit()
+            print("✅ Migrácia úspešne dokončená")
+            return True
+
+        except Exception as e:
+            print(f"❌ Chyba pri migrácii: {e}")
+            db.rollback()
+            return False
+
+
+if __name__ == "__main__":
+    add_erp_sync_logs_index()
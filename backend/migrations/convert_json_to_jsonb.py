@@ -0,0 +1,60 @@
+"""
+Migration: Prevod JSON stĺpcov na JSONB + GIN index pre analytics.event_data
+"""
+
+from services.database import get_db_session
+from sqlalchemy import text
+
+# (tabuľka, stĺpec) - stĺpce, ktoré model mapuje na JSONB
+_JSONB_COLUMNS = [
+    ("search_history", "response_data"),
+    ("company_cache", "data"),
+    ("company_cache", "company_data"),
+    ("analytics", "event_data"),
+    ("favorite_companies", "company_data"),
+]
+
+
+def convert_json_to_jsonb():
+    """
+    Prevedie JSON stĺpce na JSONB a vytvorí GIN index na analytics.event_data.
+    """
+    with get_db_session() as db:
+        if not db:
+            print("❌ Databáza nie je dostupná")
+            return False
+
+        try:
+            for table, column in _JSONB_COLUMNS:
+                db.execute(
+                    text(
+                        f"""
+                        ALTER TABLE {table}
+                        ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb;
+                        """
+                    )
+                )
+                print(f"✅ {table}.{column} → jsonb")
+
+            db.execute(
+                text(
+                    """
+                    CREATE INDEX IF NOT EXISTS ix_analytics_event_data
+                    ON analytics USING gin (event_data);
+                    """
+                )
+            )
+            print("✅ GIN index pre analytics.event_data vytvorený")
+
+            db.commit()
+            print("✅ Migrácia úspešne dokončená")
+            return True
+
+        except Exception as e:
+            print(f"❌ Chyba pri migrácii: {e}")
+            db.rollback()
+            return False
+
+
+if __name__ == "__main__":
+    convert_json_to_jsonb()
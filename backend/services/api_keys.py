@@ -3,6 +3,7 @@ API Keys Management Service
 Pre Enterprise tier používateľov - generovanie a správa API kľúčov
 """
 
+import base64
 import secrets
 import hashlib
 from datetime import datetime, timedelta
@@ -51,6 +52,30 @@ def generate_api_key(prefix: str = "ilmn") -> tuple[str, str]:
     return full_key, key_hash
 
 
+def generate_api_keys_batch(n: int, prefix: str = "ilmn") -> List[tuple[str, str]]:
+    """
+    Generovať viac API keys naraz (napr. rotácia kľúčov pre Enterprise).
+    
+    Náhodné bajty pre všetky kľúče sa čítajú jedným volaním CSPRNG, hash ide
+    cez OpenSSL sha256 (SHA-NI). Formát kľúčov je rovnaký ako v generate_api_key.
+    
+    Args:
+        n: Počet kľúčov
+        prefix: Prefix pre key (default: "ilmn" - iluminati)
+        
+    Returns:
+        Zoznam tuple (full_key, key_hash)
+    """
+    raw = secrets.token_bytes(32 * n)
+    sha256 = hashlib.sha256
+    keys = []
+    for offset in range(0, 32 * n, 32):
+        suffix = base64.urlsafe_b64encode(raw[offset:offset + 32]).rstrip(b"=").decode("ascii")
+        full_key = f"{prefix}_{suffix}"
+        keys.append((full_key, sha256(full_key.encode()).hexdigest()))
+    return keys
+
+
 def create_api_key(
     db: Session,
     user_id: int,
@@ -8,7 +8,8 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 
-from jose import JWTError, jwt
+import jwt
+from jwt.exceptions import InvalidTokenError as JWTError
 from passlib.context import CryptContext
 from sqlalchemy import Boolean, Column, DateTime, Integer, String
 from sqlalchemy import Enum as SQLEnum
@@ -209,29 +210,32 @@ def update_user_tier(db: Session, user_id: int, tier: UserTier) -> bool:
     return True
 
 
+# Limity pre tier - zostavené raz pri importe, nie pri každom volaní
+_TIER_LIMITS: Dict[UserTier, Dict] = {
+    UserTier.FREE: {
+        "searches_per_day": 10,
+        "searches_per_month": 100,
+        "export_limit": 5,
+        "api_access": False,
+        "advanced_features": False,
+    },
+    UserTier.PRO: {
+        "searches_per_day": 100,
+        "searches_per_month": 2000,
+        "export_limit": 100,
+        "api_access": False,
+        "advanced_features": True,
+    },
+    UserTier.ENTERPRISE: {
+        "searches_per_day": -1,  # Unlimited
+        "searches_per_month": -1,  # Unlimited
+        "export_limit": -1,  # Unlimited
+        "api_access": True,
+        "advanced_features": True,
+    },
+}
+
+
 def get_user_tier_limits(tier: UserTier) -> Dict:
-    """Vráti limity pre tier"""
-    limits = {
-        UserTier.FREE: {
-            "searches_per_day": 10,
-            "searches_per_month": 100,
-            "export_limit": 5,
-            "api_access": False,
-            "advanced_features": False,
-        },
-        UserTier.PRO: {
-            "searches_per_day": 100,
-            "searches_per_month": 2000,
-            "export_limit": 100,
-            "api_access": False,
-            "advanced_features": True,
-        },
-        UserTier.ENTERPRISE: {
-            "searches_per_day": -1,  # Unlimited
-            "searches_per_month": -1,  # Unlimited
-            "export_limit": -1,  # Unlimited
-            "api_access": True,
-            "advanced_features": True,
-        },
-    }
-    return limits.get(tier, limits[UserTier.FREE])
+    """Vráti limity pre tier (kópia, aby volajúci nemenil zdieľanú tabuľku)"""
+    return dict(_TIER_LIMITS.get(tier, _TIER_LIMITS[UserTier.FREE]))
@@ -4,9 +4,24 @@ Kombinuje Redis (ak je dostupný) a in-memory fallback.
 """
 
 import hashlib
+import heapq
 import json
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import msgpack
+
+# Rýchly nekryptografický hash pre cache kľúče (ak je dostupný)
+try:
+    import xxhash
+
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
 
 # Import Redis cache (ak je dostupný)
 try:
@@ -16,12 +31,27 @@ try:
     from services.redis_cache import (
         redis_delete as _redis_delete,
     )
+    from services.redis_cache import (
+        redis_delete_if_equals as _redis_delete_if_equals,
+    )
     from services.redis_cache import (
         redis_get as _redis_get,
     )
+    from services.redis_cache import (
+        redis_mget as _redis_mget,
+    )
+    from services.redis_cache import (
+        redis_mset as _redis_mset,
+    )
     from services.redis_cache import (
         redis_set as _redis_set,
     )
+    from services.redis_cache import (
+        redis_exists as _redis_exists,
+    )
+    from services.redis_cache import (
+        redis_set_nx as _redis_set_nx,
+    )
 
     REDIS_ENABLED = get_redis_client() is not None
 except (ImportError, Exception):
@@ -29,47 +59,167 @@ except (ImportError, Exception):
     _redis_get = None
     _redis_set = None
     _redis_delete = None
+    _redis_delete_if_equals = None
+    _redis_mget = None
+    _redis_mset = None
+    _redis_exists = None
+    _redis_set_nx = None
 
 # In-memory cache (fallback)
-_cache: Dict[str, tuple[Any, datetime]] = {}
+# Expirácia ako time.monotonic() float - lacné porovnanie, bez datetime alokácií
+# Položka: (hodnota, expirácia, veľkosť v bajtoch); poradie = LRU (najstaršie prvé)
+_cache: "OrderedDict[str, tuple[Any, float, int]]" = OrderedDict()
+# Zámok pre _cache, haldu a počítadlo - mení sa zo súbežných vlákien (threadpool)
+_lock = threading.RLock()
+# Horný limit položiek - pri prekročení sa vyhodí najdlhšie nepoužitá
+_max_entries = 10000
+# Súčet veľkostí v _cache - priebežne, aby get_stats nemusel serializovať všetko
+_cache_bytes = 0
+# Min-halda (expiry_time, key) - čistenie rieši len naozaj expirované položky
+_expiry_heap: List[tuple[float, str]] = []
 _default_ttl = timedelta(hours=24)  # 24 hodín pre firmy
+# Lokálna kópia hodnoty načítanej z Redis (krátko, aby zmeny z iných procesov prešli)
+_redis_local_ttl = timedelta(seconds=60)
 
 
 def get_cache_key(query: str, source: str = "default") -> str:
     """
     Generuje cache key z query a source.
     """
-    key_string = f"{source}:{query}"
-    return hashlib.md5(key_string.encode()).hexdigest()
+    key_bytes = f"{source}:{query}".encode()
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(key_bytes)
+    return hashlib.blake2b(key_bytes, digest_size=16).hexdigest()
+
+
+def pack_columns(tables: Dict[str, List[Dict]]) -> bytes:
+    """
+    Zabalí zoznamy záznamov do msgpack po stĺpcoch (SoA).
+
+    {"nodes": [{"id": .., "label": ..}, ..]} sa uloží ako
+    {"nodes": {"id": [..], "label": [..]}} - názvy polí sa neopakujú
+    pre každý záznam.
+    """
+    columns = {
+        name: {field: [row[field] for row in rows] for field in rows[0]} if rows else {}
+        for name, rows in tables.items()
+    }
+    return msgpack.packb(columns, use_bin_type=True)
+
+
+def unpack_columns(data: bytes) -> Dict[str, List[Dict]]:
+    """Inverzia k pack_columns - vráti zoznamy záznamov (dict)."""
+    columns = msgpack.unpackb(data, raw=False)
+    return {
+        name: [dict(zip(fields, values)) for values in zip(*fields.values())]
+        for name, fields in columns.items()
+    }
+
+
+def _value_size(value: Any) -> int:
+    """Veľkosť hodnoty v bajtoch (raz pri vložení)."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str).encode())
+    except (TypeError, ValueError):
+        return 0
+
+
+def _drop(key: str) -> None:
+    """Odstráni kľúč z in-memory cache a odpočíta jeho veľkosť."""
+    global _cache_bytes
+    entry = _cache.pop(key, None)
+    if entry is not None:
+        _cache_bytes -= entry[2]
+
+
+def _purge_expired() -> int:
+    """
+    Odstráni expirované položky z in-memory cache cez min-haldu.
+
+    Záznam v halde, ktorého čas nesedí s _cache (kľúč bol prepísaný
+    alebo zmazaný), sa len zahodí - lazy invalidácia.
+
+    Returns:
+        Počet odstránených položiek
+    """
+    now = time.monotonic()
+    removed = 0
+    while _expiry_heap and _expiry_heap[0][0] < now:
+        expiry_time, key = heapq.heappop(_expiry_heap)
+        entry = _cache.get(key)
+        if entry is not None and entry[1] == expiry_time:
+            _drop(key)
+            removed += 1
+    return removed
 
 
 def get(key: str) -> Optional[Any]:
     """
-    Získa hodnotu z cache (Redis alebo in-memory fallback).
+    Získa hodnotu z cache (in-memory, pri lokálnom miss Redis).
 
     Returns:
         Cached hodnota alebo None ak nie je v cache alebo expirovala
     """
-    # Skúsiť Redis najprv
+    # In-memory najprv (najprv odstrániť expirované) - bez Redis round-tripu
+    with _lock:
+        _purge_expired()
+        value = _get_local(key)
+    if value is not None:
+        return value
+
+    # Lokálny miss - skúsiť Redis a hodnotu krátko podržať lokálne
     if REDIS_ENABLED and _redis_get:
         value = _redis_get(key)
         if value is not None:
+            _set_local(key, value, _redis_local_ttl)
             return value
 
-    # Fallback na in-memory cache
+    return None
+
+
+def _get_local(key: str) -> Optional[Any]:
+    """Hodnota z in-memory cache alebo None (expirovaná sa odstráni)."""
     if key not in _cache:
         return None
 
-    value, expiry_time = _cache[key]
+    value, expiry_time, _ = _cache[key]
 
-    if datetime.now() > expiry_time:
+    if time.monotonic() > expiry_time:
         # Expired - odstrániť
-        del _cache[key]
+        _drop(key)
         return None
 
+    _cache.move_to_end(key)
     return value
 
 
+def get_many(keys: List[str]) -> Dict[str, Any]:
+    """
+    Získa viac hodnôt naraz - z in-memory, chýbajúce z Redis jedným round-tripom.
+
+    Returns:
+        Dict kľúč → hodnota, len pre nájdené kľúče
+    """
+    found: Dict[str, Any] = {}
+    missing: List[str] = []
+    with _lock:
+        _purge_expired()
+        for key in keys:
+            value = _get_local(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+
+    if missing and REDIS_ENABLED and _redis_mget:
+        for key, value in _redis_mget(missing).items():
+            _set_local(key, value, _redis_local_ttl)
+            found[key] = value
+    return found
+
+
 def set(key: str, value: Any, ttl: Optional[timedelta | int] = None) -> None:
     """
     Uloží hodnotu do cache (Redis aj in-memory fallback).
@@ -79,19 +229,80 @@ def set(key: str, value: Any, ttl: Optional[timedelta | int] = None) -> None:
         value: Hodnota na uloženie
         ttl: Time to live (timedelta alebo sekundy ako int, ak None, použije sa default)
     """
-    if ttl is None:
-        ttl_delta = _default_ttl
-    elif isinstance(ttl, int):
-        ttl_delta = timedelta(seconds=ttl)
-    else:
-        ttl_delta = ttl
+    ttl_delta = _to_timedelta(ttl)
 
     if REDIS_ENABLED and _redis_set:
         ttl_seconds = int(ttl_delta.total_seconds())
         _redis_set(key, value, ttl_seconds)
 
-    expiry_time = datetime.now() + ttl_delta
-    _cache[key] = (value, expiry_time)
+    _set_local(key, value, _local_ttl(ttl_delta))
+
+
+def set_many(mapping: Dict[str, Any], ttl: Optional[timedelta | int] = None) -> None:
+    """
+    Uloží viac hodnôt naraz (Redis cez pipeline, jeden round-trip).
+
+    Args:
+        mapping: Dict kľúč → hodnota
+        ttl: Time to live (timedelta alebo sekundy ako int, ak None, použije sa default)
+    """
+    ttl_delta = _to_timedelta(ttl)
+
+    if REDIS_ENABLED and _redis_mset:
+        _redis_mset(mapping, int(ttl_delta.total_seconds()))
+
+    local_ttl = _local_ttl(ttl_delta)
+    for key, value in mapping.items():
+        _set_local(key, value, local_ttl)
+
+
+def _to_timedelta(ttl: Optional[timedelta | int]) -> timedelta:
+    """Normalizuje ttl (None → default, int → sekundy)."""
+    if ttl is None:
+        return _default_ttl
+    if isinstance(ttl, int):
+        return timedelta(seconds=ttl)
+    return ttl
+
+
+def _local_ttl(ttl_delta: timedelta) -> timedelta:
+    """
+    TTL pre in-memory kópiu (L1).
+
+    S Redis je zdrojom pravdy Redis - lokálna kópia žije max _redis_local_ttl,
+    aby sa zmeny a mazania z iných workerov prejavili. Bez Redis plný TTL.
+    """
+    if REDIS_ENABLED:
+        return min(ttl_delta, _redis_local_ttl)
+    return ttl_delta
+
+
+def _set_local(key: str, value: Any, ttl_delta: timedelta) -> None:
+    """Uloží hodnotu do in-memory cache."""
+    global _cache_bytes
+    size = _value_size(value)
+    with _lock:
+        _drop(key)
+        expiry_time = time.monotonic() + ttl_delta.total_seconds()
+        _cache[key] = (value, expiry_time, size)
+        _cache_bytes += size
+        heapq.heappush(_expiry_heap, (expiry_time, key))
+
+        # LRU eviction - záznam v halde ostane ako tombstone, _purge_expired ho preskočí
+        while len(_cache) > _max_entries:
+            _, (_, _, evicted_size) = _cache.popitem(last=False)
+            _cache_bytes -= evicted_size
+
+        # Príliš veľa tombstonov - haldu znovu zostaviť len z platných položiek
+        if len(_expiry_heap) > 2 * _max_entries:
+            _rebuild_expiry_heap()
+
+
+def _rebuild_expiry_heap() -> None:
+    """Zostaví expiračnú haldu nanovo z aktuálneho _cache."""
+    global _expiry_heap
+    _expiry_heap = [(entry[1], key) for key, entry in _cache.items()]
+    heapq.heapify(_expiry_heap)
 
 
 def delete(key: str) -> None:
@@ -101,14 +312,72 @@ def delete(key: str) -> None:
         _redis_delete(key)
 
     # Vymazať z in-memory
-    if key in _cache:
-        del _cache[key]
+    with _lock:
+        _drop(key)
+
+
+# Lokálne zámky (fallback bez Redis): kľúč → (expirácia (time.monotonic()), token)
+_locks: Dict[str, Tuple[float, str]] = {}
+
+
+def acquire_lock(key: str, ttl: int = 30) -> Optional[str]:
+    """
+    Získa zámok (single-flight) - cez Redis SET NX naprieč workermi,
+    bez Redis len v rámci procesu.
+
+    Returns:
+        Token držiteľa (pre release_lock) alebo None ak zámok drží niekto iný
+    """
+    token = secrets.token_hex(16)
+
+    if REDIS_ENABLED and _redis_set_nx:
+        acquired = _redis_set_nx(key, token, ttl)
+        if acquired is not None:
+            return token if acquired else None
+
+    now = time.monotonic()
+    with _lock:
+        # Vypršané zámky sa odstránia, inak by _locks len rástol
+        expired = [k for k, (expires, _) in _locks.items() if expires <= now]
+        for k in expired:
+            del _locks[k]
+
+        if key in _locks:
+            return None
+        _locks[key] = (now + ttl, token)
+        return token
+
+
+def is_locked(key: str) -> bool:
+    """Či zámok niekto drží (a ešte nevypršal)."""
+    if REDIS_ENABLED and _redis_exists and _redis_exists(key):
+        return True
+    with _lock:
+        entry = _locks.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+
+def release_lock(key: str, token: str) -> None:
+    """
+    Uvoľní zámok získaný cez acquire_lock - len ak ho stále drží tento token.
+
+    Ak zámok medzitým vypršal a získal ho iný držiteľ, ostane mu.
+    """
+    if REDIS_ENABLED and _redis_delete_if_equals:
+        _redis_delete_if_equals(key, token)
+    with _lock:
+        entry = _locks.get(key)
+        if entry is not None and entry[1] == token:
+            del _locks[key]
 
 
 def clear() -> None:
     """Vyčistí celý cache."""
-    global _cache
-    _cache = {}
+    global _cache, _expiry_heap, _cache_bytes
+    with _lock:
+        _cache = OrderedDict()
+        _expiry_heap = []
+        _cache_bytes = 0
 
 
 def get_stats() -> Dict:
@@ -128,31 +397,18 @@ def get_stats() -> Dict:
         except Exception as e:
             stats["redis"] = {"error": str(e)}
 
-    # In-memory štatistiky
-    now = datetime.now()
-    expired_count = sum(1 for _, (_, expiry) in _cache.items() if now > expiry)
-
-    # Vyčistiť expirované
-    if expired_count > 0:
-        keys_to_delete = [k for k, (_, expiry) in _cache.items() if now > expiry]
-        for k in keys_to_delete:
-            del _cache[k]
-
-    stats["in_memory"] = {
-        "total_items": len(_cache),
-        "expired_items": expired_count,
-        "cache_size_mb": _estimate_cache_size(),
-    }
+    # In-memory štatistiky (vyčistiť expirované)
+    with _lock:
+        expired_count = _purge_expired()
+        stats["in_memory"] = {
+            "total_items": len(_cache),
+            "expired_items": expired_count,
+            "cache_size_mb": _estimate_cache_size(),
+        }
 
     return stats
 
 
 def _estimate_cache_size() -> float:
-    """Odhad veľkosti cache v MB."""
-    try:
-        total_size = sum(
-            len(json.dumps(value, default=str).encode()) for value, _ in _cache.values()
-        )
-        return round(total_size / (1024 * 1024), 2)
-    except (TypeError, ValueError, KeyError):
-        return 0.0
+    """Odhad veľkosti cache v MB (z priebežného počítadla)."""
+    return round(_cache_bytes / (1024 * 1024), 2)
@@ -3,6 +3,7 @@ Circuit Breaker pattern pre externé API
 Chráni pred kaskádovými zlyhaniami pri výpadkoch externých služieb
 """
 
+import threading
 from enum import Enum
 from typing import Callable, Optional, Any
 from datetime import datetime
@@ -56,6 +57,8 @@ class CircuitBreaker:
         self.last_failure_time: Optional[datetime] = None
         self.success_count = 0
         self.half_open_success_threshold = 2  # Počet úspešných volaní pre uzavretie
+        # Breaker zdieľajú vlákna providerov - prechody stavov musia byť atomické
+        self._lock = threading.Lock()
     
     def call(self, func: Callable, *args, **kwargs) -> Any:
         """
@@ -73,16 +76,18 @@ class CircuitBreaker:
         """
         # Skontrolovať stav
         if self.state == CircuitState.OPEN:
-            if self._should_attempt_reset():
-                self.state = CircuitState.HALF_OPEN
-                self.success_count = 0
-            else:
-                raise CircuitBreakerOpenError(
-                    f"Circuit breaker '{self.name}' is OPEN. "
-                    f"Last failure: {self.last_failure_time}"
-                )
+            with self._lock:
+                if self.state == CircuitState.OPEN:
+                    if self._should_attempt_reset():
+                        self.state = CircuitState.HALF_OPEN
+                        self.success_count = 0
+                    else:
+                        raise CircuitBreakerOpenError(
+                            f"Circuit breaker '{self.name}' is OPEN. "
+                            f"Last failure: {self.last_failure_time}"
+                        )
         
-        # Skúsiť volanie
+        # Skúsiť volanie (bez zámku - externé API môže trvať dlho)
         try:
             result = func(*args, **kwargs)
             self._on_success()
@@ -101,32 +106,38 @@ class CircuitBreaker:
     
     def _on_success(self):
         """Spracuje úspešné volanie"""
-        if self.state == CircuitState.HALF_OPEN:
-            self.success_count += 1
-            if self.success_count >= self.half_open_success_threshold:
-                # Úspešne obnovené
-                self.state = CircuitState.CLOSED
+        # Bežný prípad (CLOSED bez zlyhaní) - nie je čo meniť, zámok netreba
+        if self.state == CircuitState.CLOSED and self.failure_count == 0:
+            return
+        
+        with self._lock:
+            if self.state == CircuitState.HALF_OPEN:
+                self.success_count += 1
+                if self.success_count >= self.half_open_success_threshold:
+                    # Úspešne obnovené
+                    self.state = CircuitState.CLOSED
+                    self.failure_count = 0
+                    self.success_count = 0
+                    print(f"✅ Circuit breaker '{self.name}' CLOSED (recovered)")
+            else:
+                # V CLOSED stave - resetovať počítadlo zlyhaní
                 self.failure_count = 0
-                self.success_count = 0
-                print(f"✅ Circuit breaker '{self.name}' CLOSED (recovered)")
-        else:
-            # V CLOSED stave - resetovať počítadlo zlyhaní
-            self.failure_count = 0
     
     def _on_failure(self):
         """Spracuje zlyhané volanie"""
-        self.failure_count += 1
-        self.last_failure_time = datetime.now()
-        
-        if self.state == CircuitState.HALF_OPEN:
-            # Zlyhanie v HALF_OPEN - vrátiť sa do OPEN
-            self.state = CircuitState.OPEN
-            self.success_count = 0
-            print(f"⚠️ Circuit breaker '{self.name}' OPEN (failed in half-open)")
-        elif self.failure_count >= self.failure_threshold:
-            # Dosiahnutý threshold - otvoriť circuit
-            self.state = CircuitState.OPEN
-            print(f"⚠️ Circuit breaker '{self.name}' OPEN (threshold reached: {self.failure_count})")
+        with self._lock:
+            self.failure_count += 1
+            self.last_failure_time = datetime.now()
+            
+            if self.state == CircuitState.HALF_OPEN:
+                # Zlyhanie v HALF_OPEN - vrátiť sa do OPEN
+                self.state = CircuitState.OPEN
+                self.success_count = 0
+                print(f"⚠️ Circuit breaker '{self.name}' OPEN (failed in half-open)")
+            elif self.state == CircuitState.CLOSED and self.failure_count >= self.failure_threshold:
+                # Dosiahnutý threshold - otvoriť circuit
+                self.state = CircuitState.OPEN
+                print(f"⚠️ Circuit breaker '{self.name}' OPEN (threshold reached: {self.failure_count})")
     
     def get_state(self) -> dict:
         """Vráti aktuálny stav circuit breakeru"""
@@ -142,10 +153,11 @@ class CircuitBreaker:
     
     def reset(self):
         """Manuálne resetovať circuit breaker"""
-        self.state = CircuitState.CLOSED
-        self.failure_count = 0
-        self.success_count = 0
-        self.last_failure_time = None
+        with self._lock:
+            self.state = CircuitState.CLOSED
+            self.failure_count = 0
+            self.success_count = 0
+            self.last_failure_time = None
         print(f"🔄 Circuit breaker '{self.name}' manually reset")
 
 
@@ -3,21 +3,33 @@ PostgreSQL databázový servis pre ILUMINATI SYSTEM
 Ukladá históriu vyhľadávaní, cache a analytics
 """
 
+import atexit
 import os
+import threading
+from collections import deque
 from contextlib import contextmanager
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
 
+import orjson
 from sqlalchemy import (
     JSON,
     Column,
     DateTime,
     Float,
+    Index,
     Integer,
     String,
     Text,
+    UniqueConstraint,
     create_engine,
+    delete,
+    select,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -28,8 +40,23 @@ DATABASE_URL = os.getenv(
     "DATABASE_URL", f"postgresql://{_default_user}@localhost:5432/iluminati_db"
 )
 
+# Pool spojení - viac súbežných workerov nečaká na checkout spojenia
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+
 Base = declarative_base()
 
+# Na PostgreSQL binárny JSONB (rýchlejšie čítanie, GIN indexy), inde bežný JSON
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+def _json_serializer(obj) -> str:
+    """orjson serializer pre JSON stĺpce (response_data, event_data, data)"""
+    # OPT_NON_STR_KEYS - int kľúče na str ako pri json.dumps
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
 
 # Database Models
 class SearchHistory(Base):
@@ -44,7 +71,7 @@ class SearchHistory(Base):
     risk_score = Column(Float)
     search_timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     user_ip = Column(String(45))  # IPv6 support
-    response_data = Column(JSON)  # Full response for analytics
+    response_data = Column(JSONType)  # Full response for analytics
 
     def to_dict(self) -> Dict:
         return {
@@ -64,20 +91,26 @@ class CompanyCache(Base):
     """Cache pre firmy (dlhodobé uloženie) - Hybridný model"""
 
     __tablename__ = "company_cache"
+    __table_args__ = (
+        # Rovnaké IČO môže existovať vo viacerých krajinách
+        UniqueConstraint("identifier", "country", name="uq_company_cache_ident_ctry"),
+        # Pokrýva lookup v get_company_cache vrátane podmienky na expires_at
+        Index("ix_company_cache_ident_ctry_exp", "identifier", "country", "expires_at"),
+        # BRIN pre cleanup podľa expires_at - na PostgreSQL takmer zadarmo
+        Index("ix_company_cache_expires_brin", "expires_at", postgresql_using="brin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    identifier = Column(
-        String(100), unique=True, nullable=False, index=True
-    )  # IČO, KRS, etc.
+    identifier = Column(String(100), nullable=False)  # IČO, KRS, etc.
     country = Column(String(2), nullable=False, index=True)
     company_name = Column(String(500))
-    data = Column(JSON, nullable=False)  # Full company data (legacy)
-    company_data = Column(JSON)  # Normalized company data (12-poľový formát)
+    data = Column(JSONType, nullable=False)  # Full company data (legacy)
+    company_data = Column(JSONType)  # Normalized company data (12-poľový formát)
     risk_score = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_synced_at = Column(DateTime, default=datetime.utcnow, index=True)  # Posledná synchronizácia
-    expires_at = Column(DateTime, index=True)
+    expires_at = Column(DateTime)
 
     def to_dict(self) -> Dict:
         return {
@@ -96,10 +129,16 @@ class Analytics(Base):
     """Analytics a štatistiky"""
 
     __tablename__ = "analytics"
+    __table_args__ = (
+        # GIN index pre containment filtre (event_data @> '{...}')
+        Index(
+            "ix_analytics_event_data", "event_data", postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_type = Column(String(50), nullable=False, index=True)  # search, export, error
-    event_data = Column(JSON)
+    event_data = Column(JSONType)
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     user_ip = Column(String(45))
     user_agent = Column(Text)
@@ -123,7 +162,7 @@ class FavoriteCompany(Base):
     company_identifier = Column(String(100), nullable=False, index=True)  # IČO, KRS, etc.
     company_name = Column(String(500), nullable=False)
     country = Column(String(2), nullable=False)
-    company_data = Column(JSON)  # Full company data snapshot
+    company_data = Column(JSONType)  # Full company data snapshot
     risk_score = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     notes = Column(Text)  # User notes about this company
@@ -155,7 +194,25 @@ def init_database():
         return
 
     try:
-        engine = create_engine(DATABASE_URL, echo=False)
+        engine_kwargs = {}
+        if DATABASE_URL.startswith("postgresql"):
+            engine_kwargs = {
+                "pool_size": DB_POOL_SIZE,
+                "max_overflow": DB_MAX_OVERFLOW,
+                "pool_recycle": DB_POOL_RECYCLE,
+                "connect_args": {
+                    "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+                },
+            }
+
+        engine = create_engine(
+            DATABASE_URL,
+            echo=False,
+            pool_pre_ping=True,
+            json_serializer=_json_serializer,
+            json_deserializer=orjson.loads,
+            **engine_kwargs,
+        )
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
         # Import ERP models to ensure tables are created
@@ -206,28 +263,24 @@ def save_search_history(
     user_ip: Optional[str] = None,
     response_data: Optional[Dict] = None,
 ) -> bool:
-    """Uloží vyhľadávanie do histórie"""
+    """Zaradí vyhľadávanie do histórie (zapisuje sa dávkovo, viď flush_search_buffer)"""
     if not _initialized:
         return False
 
-    try:
-        with get_db_session() as session:
-            if session is None:
-                return False
-
-            history = SearchHistory(
-                query=query,
-                country=country,
-                result_count=result_count,
-                risk_score=risk_score,
-                user_ip=user_ip,
-                response_data=response_data,
-            )
-            session.add(history)
-            return True
-    except Exception as e:
-        print(f"⚠️ Chyba pri ukladaní histórie: {e}")
-        return False
+    _enqueue_search(
+        {
+            "query": query,
+            "country": country,
+            "result_count": result_count,
+            "risk_score": risk_score,
+            "user_ip": user_ip,
+            "response_data": response_data,
+            "search_timestamp": datetime.utcnow(),
+        },
+        None,
+        None,
+    )
+    return True
 
 
 def get_search_history(limit: int = 100, country: Optional[str] = None) -> List[Dict]:
@@ -264,47 +317,275 @@ def save_company_cache(
         return False
 
     try:
-        from datetime import timedelta
-
         with get_db_session() as session:
             if session is None:
                 return False
 
             expires_at = datetime.utcnow() + timedelta(hours=expires_hours)
+            _upsert_company_cache(
+                session,
+                [
+                    {
+                        "identifier": identifier,
+                        "country": country,
+                        "company_name": company_name,
+                        "data": data,
+                        "risk_score": risk_score,
+                        "expires_at": expires_at,
+                    }
+                ],
+            )
+
+            return True
+    except Exception as e:
+        print(f"⚠️ Chyba pri ukladaní cache: {e}")
+        return False
+
 
-            # Skúsiť nájsť existujúcu
+# Dialekty s INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+# Stĺpce, ktoré sa pri konflikte (identifier, country) prepíšu
+_COMPANY_CACHE_UPDATE_COLUMNS = ("company_name", "data", "risk_score", "expires_at")
+# Stĺpce prepisované pri uložení live-scrapnutých dát (hybridný model providerov)
+_COMPANY_SYNC_UPDATE_COLUMNS = (
+    "company_name",
+    "data",
+    "company_data",
+    "risk_score",
+    "last_synced_at",
+)
+
+
+def _upsert_company_cache(
+    session,
+    rows: List[Dict],
+    update_columns: Tuple[str, ...] = _COMPANY_CACHE_UPDATE_COLUMNS,
+) -> None:
+    """
+    Vloží alebo aktualizuje firmy v cache podľa (identifier, country).
+
+    Na PostgreSQL/SQLite jeden INSERT ... ON CONFLICT DO UPDATE bez predchádzajúceho
+    SELECT; riadky musia mať rovnaké kľúče a unikátne (identifier, country).
+    """
+    if not rows:
+        return
+
+    insert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    if insert is None:
+        # Iné dialekty - read-modify-write cez ORM
+        for row in rows:
             existing = (
                 session.query(CompanyCache)
                 .filter(
-                    CompanyCache.identifier == identifier,
-                    CompanyCache.country == country,
+                    CompanyCache.identifier == row["identifier"],
+                    CompanyCache.country == row["country"],
                 )
                 .first()
             )
-
             if existing:
-                existing.company_name = company_name
-                existing.data = data
-                existing.risk_score = risk_score
+                for column in update_columns:
+                    setattr(existing, column, row.get(column))
                 existing.updated_at = datetime.utcnow()
-                existing.expires_at = expires_at
             else:
-                cache = CompanyCache(
-                    identifier=identifier,
-                    country=country,
-                    company_name=company_name,
-                    data=data,
-                    risk_score=risk_score,
-                    expires_at=expires_at,
+                session.add(CompanyCache(**row))
+        return
+
+    stmt = insert(CompanyCache).values(rows)
+    update = {column: stmt.excluded[column] for column in update_columns}
+    update["updated_at"] = datetime.utcnow()
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["identifier", "country"], set_=update
+        )
+    )
+
+
+def save_synced_companies(country: str, companies: Dict[str, Dict]) -> bool:
+    """
+    Uloží live-scrapnuté firmy (identifier -> normalizované dáta) jedným upsertom
+    a jedným commitom - bez SELECT na existenciu záznamu.
+    """
+    if not companies:
+        return True
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "identifier": identifier,
+            "country": country,
+            "company_name": data.get("name"),
+            "data": data,  # Legacy field
+            "company_data": data,
+            "risk_score": data.get("risk_score"),
+            "last_synced_at": now,
+        }
+        for identifier, data in companies.items()
+    ]
+
+    try:
+        with get_db_session() as session:
+            if session is None:
+                return False
+
+            _upsert_company_cache(session, rows, _COMPANY_SYNC_UPDATE_COLUMNS)
+            return True
+    except Exception as e:
+        print(f"⚠️ Chyba pri ukladaní firiem ({len(rows)}): {e}")
+        return False
+
+
+# Buffer zápisov vyhľadávaní: (história, analytics, firma) - zapisuje sa dávkovo
+# jedným multi-VALUES INSERT každé _FLUSH_INTERVAL sekúnd alebo po _FLUSH_BATCH položkách
+_search_buffer: Deque[Tuple[Dict, Optional[Dict], Optional[Dict]]] = deque(maxlen=10000)
+_FLUSH_INTERVAL = 2.0
+_FLUSH_BATCH = 500
+_flush_event = threading.Event()
+_flush_thread: Optional[threading.Thread] = None
+_flush_thread_lock = threading.Lock()
+
+
+def _enqueue_search(
+    history: Dict, analytics: Optional[Dict], company: Optional[Dict]
+) -> None:
+    """Pridá záznamy do buffera a podľa potreby spustí flush vlákno"""
+    global _flush_thread
+
+    _search_buffer.append((history, analytics, company))
+
+    if _flush_thread is None:
+        with _flush_thread_lock:
+            if _flush_thread is None:
+                _flush_thread = threading.Thread(
+                    target=_flush_loop, name="search-history-flush", daemon=True
                 )
-                session.add(cache)
+                _flush_thread.start()
+                # Daemon vlákno pri ukončení procesu nedobehne - zapísať zvyšok
+                atexit.register(flush_search_buffer)
+
+    if len(_search_buffer) >= _FLUSH_BATCH:
+        _flush_event.set()
+
+
+def _flush_loop() -> None:
+    """Vlákno, ktoré periodicky zapisuje buffer do databázy"""
+    while True:
+        _flush_event.wait(_FLUSH_INTERVAL)
+        _flush_event.clear()
+        flush_search_buffer()
+
+
+def _restore_batch(batch: List[Tuple[Dict, Optional[Dict], Optional[Dict]]]) -> None:
+    """Vráti nezapísané vyhľadávania na začiatok buffera (v pôvodnom poradí)"""
+    # Pri plnom bufferi (maxlen) deque zahodí najnovšie položky z konca
+    _search_buffer.extendleft(reversed(batch))
+
 
+def _insert_searches(session, batch) -> None:
+    """História a analytics cez bulk_insert_mappings (bez ORM unit-of-work)"""
+    session.bulk_insert_mappings(SearchHistory, [history for history, _, _ in batch])
+    analytics = [event for _, event, _ in batch if event is not None]
+    if analytics:
+        session.bulk_insert_mappings(Analytics, analytics)
+
+
+def _write_in_transaction(write, rows) -> Optional[bool]:
+    """
+    Zapíše rows funkciou write(session, rows) v samostatnej transakcii.
+
+    Returns:
+        True ak úspešné, False pri chybe zápisu, None ak DB nie je dostupná
+    """
+    try:
+        with get_db_session() as session:
+            if session is None:
+                return None
+            write(session, rows)
             return True
     except Exception as e:
-        print(f"⚠️ Chyba pri ukladaní cache: {e}")
+        print(f"⚠️ Chyba pri ukladaní vyhľadávaní ({len(rows)}): {e}")
         return False
 
 
+def flush_search_buffer() -> int:
+    """
+    Zapíše všetky čakajúce vyhľadávania.
+
+    História a analytics idú jednou transakciou, firmy samostatnou transakciou
+    jedným upsertom cez _upsert_company_cache (posledný záznam vyhráva).
+    Ak dávka zlyhá, zapisuje sa po jednom zázname - chybný záznam sa zahodí,
+    ostatné sa uložia. Ak DB nie je dostupná, dávka sa vráti do buffera.
+
+    Returns:
+        Počet zapísaných vyhľadávaní
+    """
+    batch = []
+    while _search_buffer:
+        try:
+            batch.append(_search_buffer.popleft())
+        except IndexError:
+            break
+
+    if not batch:
+        return 0
+    if not _initialized:
+        _restore_batch(batch)
+        return 0
+
+    result = _write_in_transaction(_insert_searches, batch)
+    if result is None:
+        _restore_batch(batch)
+        return 0
+
+    written = len(batch)
+    if result is False:
+        written = 0
+        pending = []
+        for entry in batch:
+            row_result = _write_in_transaction(_insert_searches, [entry])
+            if row_result:
+                written += 1
+            elif row_result is None:
+                pending.append(entry)
+        _restore_batch(pending)
+
+    # Cache firiem je len cache - jej chyba neruší už zapísanú históriu
+    companies = list(
+        {
+            (company["identifier"], company["country"]): company
+            for _, _, company in batch
+            if company is not None
+        }.values()
+    )
+    if companies and _write_in_transaction(_upsert_company_cache, companies) is False:
+        for company in companies:
+            _write_in_transaction(_upsert_company_cache, [company])
+
+    return written
+
+
+def save_search_bundle(
+    history: Dict,
+    analytics: Dict,
+    company: Optional[Dict] = None,
+    expires_hours: int = 24,
+) -> bool:
+    """
+    Zaradí históriu vyhľadávania, analytics a cache firmy do buffera;
+    do DB sa zapíšu dávkovo spolu s ostatnými vyhľadávaniami.
+    """
+    if not _initialized:
+        return False
+
+    now = datetime.utcnow()
+    history.setdefault("search_timestamp", now)
+    analytics.setdefault("timestamp", now)
+    if company is not None and company.get("expires_at") is None:
+        company["expires_at"] = now + timedelta(hours=expires_hours)
+
+    _enqueue_search(history, analytics, company)
+    return True
+
+
 def get_company_cache(identifier: str, country: str) -> Optional[Dict]:
     """Získa firmu z cache"""
     if not _initialized:
@@ -361,6 +642,31 @@ def save_analytics(
         return False
 
 
+def _table_counts(session, models: List) -> Dict[str, int]:
+    """
+    Počty riadkov pre tabuľky modelov.
+
+    Na PostgreSQL použije odhad z pg_class.reltuples (O(1), aktualizuje ANALYZE),
+    COUNT(*) len pre tabuľky, ktoré ešte neboli analyzované (reltuples < 0).
+    """
+    counts: Dict[str, int] = {}
+    if session.get_bind().dialect.name == "postgresql":
+        rows = session.execute(
+            text(
+                "SELECT relname, reltuples::bigint FROM pg_class "
+                "WHERE relkind = 'r' AND relname = ANY(:names) "
+                "AND pg_table_is_visible(oid)"
+            ),
+            {"names": [model.__tablename__ for model in models]},
+        ).fetchall()
+        counts = {name: int(estimate) for name, estimate in rows if estimate >= 0}
+
+    for model in models:
+        if model.__tablename__ not in counts:
+            counts[model.__tablename__] = session.query(model).count()
+    return counts
+
+
 def get_database_stats() -> Dict:
     """Vráti štatistiky databázy"""
     if not _initialized:
@@ -371,21 +677,22 @@ def get_database_stats() -> Dict:
             if session is None:
                 return {"status": "no_session", "available": False}
 
-            search_count = session.query(SearchHistory).count()
-            cache_count = session.query(CompanyCache).count()
-            analytics_count = session.query(Analytics).count()
+            counts = _table_counts(session, [SearchHistory, CompanyCache, Analytics])
 
             return {
                 "status": "ok",
                 "available": True,
-                "search_history_count": search_count,
-                "company_cache_count": cache_count,
-                "analytics_count": analytics_count,
+                "search_history_count": counts[SearchHistory.__tablename__],
+                "company_cache_count": counts[CompanyCache.__tablename__],
+                "analytics_count": counts[Analytics.__tablename__],
             }
     except Exception as e:
         return {"status": "error", "available": False, "error": str(e)}
 
 
+_CLEANUP_CHUNK = 10000
+
+
 def cleanup_expired_cache() -> int:
     """Vymaže expirovaný cache"""
     if not _initialized:
@@ -396,11 +703,23 @@ def cleanup_expired_cache() -> int:
             if session is None:
                 return 0
 
-            deleted = (
-                session.query(CompanyCache)
-                .filter(CompanyCache.expires_at < datetime.utcnow())
-                .delete()
-            )
+            # Mazať po dávkach - krátke transakcie bez dlhých zámkov na tabuľke
+            now = datetime.utcnow()
+            deleted = 0
+            while True:
+                expired_ids = (
+                    select(CompanyCache.id)
+                    .where(CompanyCache.expires_at < now)
+                    .limit(_CLEANUP_CHUNK)
+                    .scalar_subquery()
+                )
+                count = session.execute(
+                    delete(CompanyCache).where(CompanyCache.id.in_(expired_ids))
+                ).rowcount
+                session.commit()
+                deleted += count
+                if count < _CLEANUP_CHUNK:
+                    break
 
             return deleted
     except Exception as e:
@@ -3,13 +3,52 @@ Dlhové registre - Finančná správa SK/CZ
 Kontrola dlhov voči daňovým úradom
 """
 
-from typing import Dict, Optional
+import asyncio
+from typing import Dict, Iterable, Optional
 from datetime import datetime, timedelta
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 # Cache pre dlhové registry
 _debt_cache = {}
 _cache_ttl = timedelta(hours=12)  # Kratší TTL pre dlhy (častejšie sa menia)
 
+# Oddeľovače v IČO (napr. "123 456 78", "123-45-678") - odstránia sa cez str.translate
+_ICO_STRIP = str.maketrans("", "", "- \t\n\r")
+
+
+# Zdieľaná HTTP session pre API finančných správ (keep-alive, pool, retry)
+_session: Optional[requests.Session] = None
+
+
+def _get_session() -> requests.Session:
+    """Vráti zdieľanú requests.Session s poolom spojení a retry na 502/503/504"""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504]
+            ),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session = session
+    return _session
+
+
+def _clean_ico(ico: str, lengths: tuple) -> Optional[str]:
+    """Vráti IČO bez oddeľovačov, ak má povolenú dĺžku a len číslice, inak None"""
+    if not ico:
+        return None
+    ico_clean = ico.translate(_ICO_STRIP)
+    if len(ico_clean) in lengths and ico_clean.isdigit():
+        return ico_clean
+    return None
+
 
 def search_debt_registers(identifier: str, country: str) -> Optional[Dict]:
     """
@@ -25,8 +64,9 @@ def search_debt_registers(identifier: str, country: str) -> Optional[Dict]:
     if country not in ["SK", "CZ"]:
         return None
     
-    # Kontrola cache
-    cache_key = f"debt_{country}_{identifier}"
+    # Kontrola cache - kľúč z IČO bez oddeľovačov, rovnako ako ho ukladá _search_debt
+    ico = _clean_ico(identifier, _DEBT_REGISTERS[country]["ico_lengths"])
+    cache_key = f"debt_{country}_{ico or identifier}"
     if cache_key in _debt_cache:
         cached_data, cached_time = _debt_cache[cache_key]
         if datetime.now() - cached_time < _cache_ttl:
@@ -34,136 +74,108 @@ def search_debt_registers(identifier: str, country: str) -> Optional[Dict]:
             return cached_data
     
     try:
-        if country == "SK":
-            return _search_sk_debt(identifier)
-        elif country == "CZ":
-            return _search_cz_debt(identifier)
+        return _search_debt(identifier, country)
     except Exception as e:
         print(f"⚠️ Chyba pri vyhľadávaní dlhov ({country}): {e}")
         return _generate_fallback_debt_data(identifier, country)
 
 
-def _search_sk_debt(ico: str) -> Optional[Dict]:
+async def search_all_debt_registers(
+    identifier: str, countries: Iterable[str] = ("SK", "CZ")
+) -> Dict[str, Optional[Dict]]:
     """
-    Vyhľadá dlhy voči Finančnej správe SR.
-    
-    Poznámka: V reálnom nasadení by sme použili oficiálny API
-    alebo web scraping z https://www.financnasprava.sk/
+    Súbežne vyhľadá dlhy vo viacerých registroch (predvolene SK aj CZ).
+
+    Latencia je max(t_SK, t_CZ) namiesto súčtu. Výnimka jedného registra
+    neprepadne ostatným - daná krajina dostane None.
+
+    Returns:
+        Dict {krajina: výsledok search_debt_registers alebo None}
     """
-    # Validácia IČO (8 miest)
-    if not ico or len(ico) != 8 or not ico.isdigit():
-        return None
-    
-    try:
-        # Simulácia API volania
-        # V produkcii: requests.get(f"https://api.financnasprava.sk/debt/{ico}")
-        
-        # Fallback pre MVP - simulácia
-        has_debt = int(ico[-1]) % 4 == 0  # 25% šanca že má dlh
-        
-        if has_debt:
-            total_debt = int(ico[-3:]) * 100  # Simulovaný dlh
-            debt_data = {
-                "has_debt": True,
-                "total_debt": total_debt,
-                "currency": "EUR",
-                "debt_items": [
-                    {
-                        "type": "DPH",
-                        "amount": total_debt * 0.6,
-                        "due_date": "2024-12-31"
-                    },
-                    {
-                        "type": "Daň z príjmu",
-                        "amount": total_debt * 0.4,
-                        "due_date": "2024-12-31"
-                    }
-                ],
-                "last_updated": datetime.now().isoformat()
-            }
-        else:
-            debt_data = {
-                "has_debt": False,
-                "total_debt": 0,
-                "currency": "EUR",
-                "debt_items": [],
-                "last_updated": datetime.now().isoformat()
-            }
-        
-        result = {
-            "country": "SK",
-            "identifier": ico,
-            "data": debt_data,
-            "risk_score": 8 if has_debt else 0
-        }
-        
-        _debt_cache[f"debt_SK_{ico}"] = (result, datetime.now())
-        return result
-        
-    except Exception as e:
-        print(f"⚠️ Chyba pri SK dlhovom registri: {e}")
-        return None
+    countries = tuple(countries)
+    results = await asyncio.gather(
+        *(
+            asyncio.to_thread(search_debt_registers, identifier, country)
+            for country in countries
+        ),
+        return_exceptions=True,
+    )
+    return {
+        country: None if isinstance(result, BaseException) else result
+        for country, result in zip(countries, results)
+    }
+
 
+# Parametre registrov podľa krajiny - jedna implementácia namiesto vetvenia SK/CZ
+_DEBT_REGISTERS: Dict[str, Dict] = {
+    "SK": {
+        "ico_lengths": (8,),
+        "currency": "EUR",
+        "income_tax": "Daň z príjmu",
+    },
+    "CZ": {
+        "ico_lengths": (8, 9),
+        "currency": "CZK",
+        "income_tax": "Daň z příjmu",
+    },
+}
 
-def _search_cz_debt(ico: str) -> Optional[Dict]:
+# Riziko podľa toho, či firma má dlh (index = has_debt)
+_DEBT_RISK_SCORES = (0, 8)
+
+
+def _search_debt(ico: str, country: str) -> Optional[Dict]:
     """
-    Vyhľadá dlhy voči Finančnej správe ČR.
+    Vyhľadá dlhy voči Finančnej správe SR/ČR.
     
     Poznámka: V reálnom nasadení by sme použili oficiálny API
-    alebo web scraping z https://www.financnisprava.cz/
+    alebo web scraping z https://www.financnasprava.sk/ resp. https://www.financnisprava.cz/
+    V produkcii: _get_session().get(<API finančnej správy>/debt/{ico}, timeout=10)
     """
-    # Validácia IČO (8 alebo 9 miest)
-    if not ico or len(ico) not in [8, 9] or not ico.isdigit():
+    register = _DEBT_REGISTERS[country]
+    ico = _clean_ico(ico, register["ico_lengths"])
+    if ico is None:
         return None
     
     try:
-        # Simulácia API volania
-        # V produkcii: requests.get(f"https://api.financnisprava.cz/debt/{ico}")
-        
         # Fallback pre MVP - simulácia
         has_debt = int(ico[-1]) % 4 == 0  # 25% šanca že má dlh
         
+        debt_items = []
+        total_debt = 0
         if has_debt:
             total_debt = int(ico[-3:]) * 100  # Simulovaný dlh
-            debt_data = {
-                "has_debt": True,
-                "total_debt": total_debt,
-                "currency": "CZK",
-                "debt_items": [
-                    {
-                        "type": "DPH",
-                        "amount": total_debt * 0.6,
-                        "due_date": "2024-12-31"
-                    },
-                    {
-                        "type": "Daň z příjmu",
-                        "amount": total_debt * 0.4,
-                        "due_date": "2024-12-31"
-                    }
-                ],
-                "last_updated": datetime.now().isoformat()
-            }
-        else:
-            debt_data = {
-                "has_debt": False,
-                "total_debt": 0,
-                "currency": "CZK",
-                "debt_items": [],
-                "last_updated": datetime.now().isoformat()
-            }
+            debt_items = [
+                {
+                    "type": "DPH",
+                    "amount": total_debt * 0.6,
+                    "due_date": "2024-12-31"
+                },
+                {
+                    "type": register["income_tax"],
+                    "amount": total_debt * 0.4,
+                    "due_date": "2024-12-31"
+                }
+            ]
         
         result = {
-            "country": "CZ",
+            "country": country,
             "identifier": ico,
-            "data": debt_data,
-            "risk_score": 8 if has_debt else 0
+            "data": {
+                "has_debt": has_debt,
+                "total_debt": total_debt,
+                "currency": register["currency"],
+                "debt_items": debt_items,
+                "last_updated": datetime.now().isoformat()
+            },
+            "risk_score": _DEBT_RISK_SCORES[has_debt]
         }
         
-        _debt_cache[f"debt_CZ_{ico}"] = (result, datetime.now())
+        _debt_cache[f"debt_{country}_{ico}"] = (result, datetime.now())
         return result
         
     except Exception as e:
-        print(f"⚠️ Chyba pri CZ dlhovom registri: {e}")
+        print(f"⚠️ Chyba pri {country} dlhovom registri: {e}")
         return None
 
 
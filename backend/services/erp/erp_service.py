@@ -3,10 +3,13 @@ ERP Service Manager
 Spravuje ERP pripojenia a synchronizácie
 """
 
+import json
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Any, Dict, List, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from .models import ErpConnection, ErpConnectionStatus, ErpSyncLog, ErpType
 from .money_s3_connector import MoneyS3Connector
@@ -14,7 +17,42 @@ from .pohoda_connector import PohodaConnector
 from .sap_connector import SapConnector
 
 
+# LRU cache connectorov podľa (typ, connection_data) - znovupoužije HTTP session
+# a autentifikáciu (napr. SAP login) medzi test/activate/sync volaniami
+_CONNECTOR_CACHE_SIZE = 32
+_connector_cache: "OrderedDict[Tuple[ErpType, str], Any]" = OrderedDict()
+_connector_lock = threading.RLock()
+
+
+def _connector_key(erp_type: ErpType, connection_data: Dict) -> Tuple[ErpType, str]:
+    """Kľúč cache - connection_data serializované so zoradenými kľúčmi"""
+    return erp_type, json.dumps(connection_data, sort_keys=True, default=str)
+
+
 def get_connector(erp_type: ErpType, connection_data: Dict):
+    """Vráti connector podľa typu ERP (z cache, ak už bol vytvorený)"""
+    key = _connector_key(erp_type, connection_data)
+    with _connector_lock:
+        connector = _connector_cache.get(key)
+        if connector is not None:
+            _connector_cache.move_to_end(key)
+            return connector
+
+    connector = _create_connector(erp_type, connection_data)
+    with _connector_lock:
+        _connector_cache[key] = connector
+        while len(_connector_cache) > _CONNECTOR_CACHE_SIZE:
+            _connector_cache.popitem(last=False)
+    return connector
+
+
+def _evict_connector(erp_type: ErpType, connection_data: Dict) -> None:
+    """Odstráni connector z cache (napr. po neúspešnom teste pripojenia)"""
+    with _connector_lock:
+        _connector_cache.pop(_connector_key(erp_type, connection_data), None)
+
+
+def _create_connector(erp_type: ErpType, connection_data: Dict):
     """Vytvorí správny connector podľa typu ERP"""
     if erp_type == ErpType.POHODA:
         return PohodaConnector(connection_data)
@@ -47,8 +85,12 @@ def test_erp_connection(erp_type: ErpType, connection_data: Dict) -> Dict:
     try:
         connector = get_connector(erp_type, connection_data)
         result = connector.test_connection()
+        if not result.get("success"):
+            # Neúspešný connector (napr. zlyhaný login) nenechávať v cache
+            _evict_connector(erp_type, connection_data)
         return result
     except Exception as e:
+        _evict_connector(erp_type, connection_data)
         return {
             "success": False,
             "message": f"Connection test failed: {str(e)}",
@@ -230,6 +272,7 @@ def get_erp_sync_logs(
 
     return (
         db.query(ErpSyncLog)
+        .options(selectinload(ErpSyncLog.connection))
         .filter(ErpSyncLog.connection_id == connection_id)
         .order_by(ErpSyncLog.started_at.desc())
         .limit(limit)
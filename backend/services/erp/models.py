@@ -12,6 +12,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -103,11 +104,13 @@ class ErpSyncLog(Base):
     """Log synchronizácií ERP dát"""
 
     __tablename__ = "erp_sync_logs"
+    __table_args__ = (
+        # get_erp_sync_logs: WHERE connection_id = ? ORDER BY started_at DESC LIMIT n
+        Index("ix_erp_sync_logs_connection_started", "connection_id", "started_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    connection_id = Column(
-        Integer, ForeignKey("erp_connections.id"), nullable=False, index=True
-    )
+    connection_id = Column(Integer, ForeignKey("erp_connections.id"), nullable=False)
 
     # Sync details
     sync_type = Column(String(50), nullable=False)  # full, incremental, manual
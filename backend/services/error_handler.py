@@ -3,7 +3,10 @@ Error handling & logging service
 Centralizované error handling pre ILUMINATI SYSTEM
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 from pathlib import Path
 import traceback
 from typing import Optional, Dict, Any
@@ -17,14 +20,28 @@ LOG_DIR = Path("logs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOG_DIR / "iluminati.log"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler(LOG_FILE, encoding="utf-8"),
+    logging.StreamHandler(),
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+# Volajúce vlákno len vloží záznam do fronty, zápis do súboru/stdout robí
+# QueueListener na pozadí (bez blokovania na I/O a stdout locku)
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, *_log_handlers, respect_handler_level=True
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+# Finálny formát aplikujú handlery listenera, do fronty ide len text správy
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 
 logger = logging.getLogger("iluminati")
 
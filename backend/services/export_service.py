@@ -6,7 +6,8 @@ Podporuje Excel (xlsx), CSV, JSON export
 import io
 import json
 from datetime import datetime
-from typing import Dict, List, Optional
+from itertools import repeat
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 import importlib.util
 
@@ -21,13 +22,54 @@ try:
 except ImportError:
     OPENPYXL_AVAILABLE = False
 
+# Polia (názov, default) pre riadky nodov a hrán v exporte
+_NODE_FIELDS = (
+    ("type", ""),
+    ("id", ""),
+    ("label", ""),
+    ("country", ""),
+    ("risk_score", 0),
+    ("details", ""),
+)
+_EDGE_FIELDS = (("source", ""), ("target", ""), ("type", ""), ("weight", 1))
+
+
+def _records(
+    records: Union[List[Dict], Dict[str, List]], fields: Tuple[Tuple[str, object], ...]
+) -> Iterator[Tuple]:
+    """
+    Riadky ako tuple hodnôt polí - z listu dictov (AoS) aj z dictu stĺpcov (SoA).
+
+    SoA je rovnaký tvar ako pack_columns v services.cache:
+    {"id": [..], "label": [..]} - chýbajúci stĺpec dostane default hodnotu.
+
+    Raises:
+        ValueError: ak majú stĺpce SoA rôznu dĺžku (inak by sa riadky stratili)
+    """
+    if isinstance(records, dict):
+        lengths = {len(records[field]) for field, _ in fields if field in records}
+        if not lengths:
+            return iter(())
+        if len(lengths) > 1:
+            raise ValueError(f"Stĺpce majú rôznu dĺžku: {sorted(lengths)}")
+        (length,) = lengths
+        columns = [
+            records[field] if field in records else repeat(default, length)
+            for field, default in fields
+        ]
+        return zip(*columns, strict=True)
+    return (
+        tuple(record.get(field, default) for field, default in fields)
+        for record in records
+    )
+
 
 def export_to_excel(graph_data: Dict, filename: Optional[str] = None) -> bytes:
     """
     Exportuje grafové dáta do Excel (xlsx) formátu.
 
     Args:
-        graph_data: Dict s nodes a edges
+        graph_data: Dict s nodes a edges (list dictov alebo dict stĺpcov)
         filename: Voliteľný názov súboru
 
     Returns:
@@ -61,19 +103,20 @@ def export_to_excel(graph_data: Dict, filename: Optional[str] = None) -> bytes:
         cell.alignment = header_alignment
 
     # Pridať nodes
-    nodes = graph_data.get("nodes", [])
-    for node in nodes:
+    nodes = list(_records(graph_data.get("nodes", []), _NODE_FIELDS))
+    created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for node_type, node_id, label, country, risk_score, details in nodes:
         ws.append(
             [
-                node.get("type", ""),
-                node.get("id", ""),
-                node.get("label", ""),
-                node.get("country", ""),
-                node.get("risk_score", 0) or 0,
-                json.dumps(node.get("details", {}), ensure_ascii=False)
-                if isinstance(node.get("details"), dict)
-                else str(node.get("details", "")),
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                node_type,
+                node_id,
+                label,
+                country,
+                risk_score or 0,
+                json.dumps(details, ensure_ascii=False)
+                if isinstance(details, dict)
+                else str(details),
+                created_at,
             ]
         )
 
@@ -101,16 +144,9 @@ def export_to_excel(graph_data: Dict, filename: Optional[str] = None) -> bytes:
         cell.alignment = header_alignment
 
     # Pridať edges
-    edges = graph_data.get("edges", [])
-    for edge in edges:
-        ws2.append(
-            [
-                edge.get("source", ""),
-                edge.get("target", ""),
-                edge.get("type", ""),
-                edge.get("weight", 1) or 1,
-            ]
-        )
+    edges = list(_records(graph_data.get("edges", []), _EDGE_FIELDS))
+    for source, target, edge_type, weight in edges:
+        ws2.append([source, target, edge_type, weight or 1])
 
     # Auto-width pre edges
     for column in ws2.columns:
@@ -147,7 +183,7 @@ def export_to_excel(graph_data: Dict, filename: Optional[str] = None) -> bytes:
     # Počítanie typov nodov
     node_types = {}
     for node in nodes:
-        node_type = node.get("type", "Unknown")
+        node_type = node[0] or "Unknown"
         node_types[node_type] = node_types.get(node_type, 0) + 1
 
     for node_type, count in sorted(node_types.items()):
@@ -159,7 +195,7 @@ def export_to_excel(graph_data: Dict, filename: Optional[str] = None) -> bytes:
     # Počítanie typov vzťahov
     edge_types = {}
     for edge in edges:
-        edge_type = edge.get("type", "Unknown")
+        edge_type = edge[2] or "Unknown"
         edge_types[edge_type] = edge_types.get(edge_type, 0) + 1
 
     for edge_type, count in sorted(edge_types.items()):
@@ -209,8 +245,10 @@ def export_to_csv(graph_data: Dict) -> str:
             if isinstance(node.get("details"), dict)
             else str(node.get("details", ""))
         )
+        # Úvodzovky sa escapujú mimo f-stringu (rovnaké úvodzovky vo vnútri vyžadujú Python 3.12)
+        details = details.replace('"', '""')
         csv_lines.append(
-            f'{node.get("type", "")},{node.get("id", "")},"{node.get("label", "")}",{node.get("country", "")},{node.get("risk_score", 0) or 0},"{details.replace('"', '""')}"'
+            f'{node.get("type", "")},{node.get("id", "")},"{node.get("label", "")}",{node.get("country", "")},{node.get("risk_score", 0) or 0},"{details}"'
         )
 
     # Edges
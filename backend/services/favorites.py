@@ -3,7 +3,7 @@ Favorites service pre ILUMINATI SYSTEM
 Správa obľúbených firiem používateľov
 """
 
-from typing import Optional
+from typing import Dict, List, Optional
 from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
@@ -6,7 +6,6 @@ API dokumentácia: https://api.nav.gov.hu/
 import requests
 from typing import Dict, Optional
 from datetime import datetime, timedelta
-import re
 from services.proxy_rotation import make_request_with_proxy
 
 # Cache pre NAV odpovede
@@ -14,6 +13,12 @@ _nav_cache = {}
 _cache_ttl = timedelta(hours=24)
 
 
+def _is_tax_number(value: str) -> bool:
+    """Či je value adószám (8-11 ASCII číslic)."""
+    # isascii - \d aj isdigit() akceptujú aj iné Unicode číslice (napr. '²', arabské)
+    return 8 <= len(value) <= 11 and value.isascii() and value.isdigit()
+
+
 def fetch_nav_hu(tax_number: str) -> Optional[Dict]:
     """
     Získa dáta z maďarského NAV registra.
@@ -33,7 +38,7 @@ def fetch_nav_hu(tax_number: str) -> Optional[Dict]:
             return cached_data
     
     # Validácia adószám (8 alebo 11 miest)
-    if not tax_number or not re.match(r'^\d{8,11}$', tax_number):
+    if not tax_number or not _is_tax_number(tax_number):
         return None
     
     try:
@@ -128,15 +133,12 @@ def _parse_address(address_data: Dict) -> str:
     if isinstance(address_data, str):
         return address_data
     
-    parts = []
-    if address_data.get("street"):
-        parts.append(address_data["street"])
-    if address_data.get("city"):
-        parts.append(address_data["city"])
-    if address_data.get("postal_code"):
-        parts.append(address_data["postal_code"])
-    
-    return ", ".join(parts) if parts else "Cím nincs megadva"
+    parts = (
+        address_data.get("street"),
+        address_data.get("city"),
+        address_data.get("postal_code"),
+    )
+    return ", ".join(filter(None, parts)) or "Cím nincs megadva"
 
 
 def calculate_hu_risk_score(company_data: Dict) -> int:
@@ -180,7 +182,7 @@ def calculate_hu_risk_score(company_data: Dict) -> int:
 
 def is_hungarian_tax_number(query: str) -> bool:
     """Kontroluje, či je query maďarský adószám (8-11 miest, len čísla)."""
-    return bool(re.match(r'^\d{8,11}$', query.strip()))
+    return _is_tax_number(query.strip())
 
 
 def get_cache_stats() -> Dict:
@@ -4,13 +4,56 @@ Oficiálny register DPH plátcov
 API dokumentácia: https://wl-api.mf.gov.pl/
 """
 
+import asyncio
+import time
+import orjson
 import requests
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
 
-# Cache pre Biała Lista odpovede
-_biala_cache = {}
-_cache_ttl = timedelta(hours=12)  # Kratší TTL pre VAT status (častejšie sa mení)
+from services.cache import get as cache_get
+from services.cache import set as cache_set
+from services.circuit_breaker import get_circuit_breaker
+
+# Odpovede Biała Lista sa cachujú v zdieľanej cache (Redis + in-memory).
+# Kľúč obsahuje dátum dotazu, takže záznam platí najviac do konca dňa.
+_cache_ttl = timedelta(hours=24)
+
+# Oddeľovače v NIP (medzery, pomlčky) - odstránia sa cez str.translate
+_NIP_STRIP = str.maketrans("", "", "- ")
+
+# Zdieľaná session - keep-alive spojenia na API, pool stačí pre dávkové volania
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_maxsize=32))
+
+# Pri výpadku Biała Lista API (5 zlyhaní po sebe) sa 30 s nevolá vôbec -
+# požiadavky hneď dostanú fallback namiesto čakania na 10 s timeout
+_breaker = get_circuit_breaker(
+    "biala_lista",
+    failure_threshold=5,
+    recovery_timeout=30,
+    expected_exception=requests.RequestException,
+)
+
+_BIALA_URL_PREFIX = "https://wl-api.mf.gov.pl/api/search/nip/"
+
+# Dnešný dátum (YYYY-MM-DD) a UNIX čas najbližšej lokálnej polnoci,
+# do ktorej platí - bez strftime pri každom volaní
+_today_cache: Tuple[float, str] = (0.0, "")
+
+
+def _today_str() -> str:
+    """Dnešný lokálny dátum ako YYYY-MM-DD (cachovaný do polnoci)"""
+    global _today_cache
+    valid_until, today = _today_cache
+    if time.time() < valid_until:
+        return today
+    current = date.today()
+    midnight = datetime.combine(current + timedelta(days=1), datetime.min.time())
+    today = current.isoformat()
+    _today_cache = (midnight.timestamp(), today)
+    return today
 
 
 def fetch_biala_lista_pl(nip: str) -> Optional[Dict]:
@@ -23,35 +66,38 @@ def fetch_biala_lista_pl(nip: str) -> Optional[Dict]:
     Returns:
         Dict s VAT statusom alebo None pri chybe
     """
-    # Kontrola cache
-    cache_key = f"biala_pl_{nip}"
-    if cache_key in _biala_cache:
-        cached_data, cached_time = _biala_cache[cache_key]
-        if datetime.now() - cached_time < _cache_ttl:
-            print(f"✅ Cache hit pre Biała Lista {nip}")
-            return cached_data
-    
     # Validácia NIP (10 číslic)
-    if not nip or len(nip.replace("-", "").replace(" ", "")) != 10:
+    if not nip:
+        return None
+    clean_nip = nip.translate(_NIP_STRIP)
+    if len(clean_nip) != 10:
         return None
     
+    today = _today_str()
+
+    # Kontrola cache
+    cache_key = f"biala_pl_{clean_nip}_{today}"
+    cached_data = cache_get(cache_key)
+    if cached_data is not None:
+        print(f"✅ Cache hit pre Biała Lista {nip}")
+        return cached_data
+    
     try:
         # Biała Lista API endpoint
         # Poznámka: V reálnom nasadení by sme použili oficiálny API
         # API je verejné a bezplatné, ale má rate limiting
-        clean_nip = nip.replace("-", "").replace(" ", "")
-        api_url = f"https://wl-api.mf.gov.pl/api/search/nip/{clean_nip}?date={datetime.now().strftime('%Y-%m-%d')}"
+        api_url = _BIALA_URL_PREFIX + clean_nip + "?date=" + today
         
         headers = {
             "Accept": "application/json"
         }
         
         # API volanie
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = _breaker.call(_session.get, api_url, headers=headers, timeout=10)
         
         if response.status_code == 200:
-            data = response.json()
-            _biala_cache[cache_key] = (data, datetime.now())
+            data = orjson.loads(response.content)
+            cache_set(cache_key, data, ttl=_cache_ttl)
             return data
         else:
             # Fallback na simulované dáta pre MVP
@@ -63,6 +109,23 @@ def fetch_biala_lista_pl(nip: str) -> Optional[Dict]:
         return _generate_fallback_biala_data(nip)
 
 
+async def fetch_biala_lista_pl_batch_async(nips: List[str]) -> List[Optional[Dict]]:
+    """
+    Súbežne získa dáta z Biała Lista pre viac čísel (dávkové KYC).
+
+    Returns:
+        Zoznam výsledkov fetch_biala_lista_pl v poradí vstupu
+    """
+    return await asyncio.gather(
+        *(asyncio.to_thread(fetch_biala_lista_pl, nip) for nip in nips)
+    )
+
+
+def fetch_biala_lista_pl_batch(nips: List[str]) -> List[Optional[Dict]]:
+    """Synchrónny wrapper pre fetch_biala_lista_pl_batch_async (nevolať z bežiaceho event loopu)"""
+    return asyncio.run(fetch_biala_lista_pl_batch_async(nips))
+
+
 def _generate_fallback_biala_data(nip: str) -> Dict:
     """Generuje fallback dáta pre Biała Lista (pre MVP/testing)"""
     # Simulácia: väčšina firiem je VAT payer
@@ -130,8 +193,8 @@ def is_polish_nip(query: str) -> bool:
         return False
     
     # Odstrániť medzery a pomlčky
-    clean = query.replace(" ", "").replace("-", "")
+    clean = query.translate(_NIP_STRIP)
     
     # NIP: 10 číslic
-    return len(clean) == 10 and clean.isdigit()
+    return len(clean) == 10 and clean.isascii() and clean.isdigit()
 
@@ -6,13 +6,18 @@ API dokumentácia: https://api-krs.ms.gov.pl/api/krs
 import requests
 from typing import Dict, Optional
 from datetime import datetime, timedelta
-import re
 
 # Cache pre KRS odpovede
 _krs_cache = {}
 _cache_ttl = timedelta(hours=24)
 
 
+def _is_krs_number(value: str) -> bool:
+    """Či je value KRS číslo (9-10 ASCII číslic)."""
+    # isascii - \d aj isdigit() akceptujú aj iné Unicode číslice (napr. '²', arabské)
+    return 9 <= len(value) <= 10 and value.isascii() and value.isdigit()
+
+
 def fetch_krs_pl(krs_number: str) -> Optional[Dict]:
     """
     Získa dáta z poľského KRS registra.
@@ -32,7 +37,7 @@ def fetch_krs_pl(krs_number: str) -> Optional[Dict]:
             return cached_data
     
     # Validácia KRS čísla (9 alebo 10 miest)
-    if not krs_number or not re.match(r'^\d{9,10}$', krs_number):
+    if not krs_number or not _is_krs_number(krs_number):
         return None
     
     try:
@@ -122,15 +127,12 @@ def _parse_address(address_data: Dict) -> str:
     if isinstance(address_data, str):
         return address_data
     
-    parts = []
-    if address_data.get("street"):
-        parts.append(address_data["street"])
-    if address_data.get("city"):
-        parts.append(address_data["city"])
-    if address_data.get("postal_code"):
-        parts.append(address_data["postal_code"])
-    
-    return ", ".join(parts) if parts else "Adres nie podano"
+    parts = (
+        address_data.get("street"),
+        address_data.get("city"),
+        address_data.get("postal_code"),
+    )
+    return ", ".join(filter(None, parts)) or "Adres nie podano"
 
 
 def calculate_pl_risk_score(company_data: Dict) -> int:
@@ -174,7 +176,7 @@ def calculate_pl_risk_score(company_data: Dict) -> int:
 
 def is_polish_krs(query: str) -> bool:
     """Kontroluje, či je query poľské KRS číslo (9-10 miest, len čísla)."""
-    return bool(re.match(r'^\d{9,10}$', query.strip()))
+    return _is_krs_number(query.strip())
 
 
 def get_cache_stats() -> Dict:
@@ -3,23 +3,157 @@ Proxy rotation služba pre externé API volania.
 Zabezpečuje stabilitu a obchádza rate limiting.
 """
 
+import heapq
+import itertools
+import logging
 import os
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import threading
+import time
+from array import array
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("iluminati.proxy_rotation")
+
+
+def _new_session() -> requests.Session:
+    """Session s poolom keep-alive spojení (retry rieši make_request_with_proxy)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _from_timestamp(timestamp: Optional[float]) -> Optional[datetime]:
+    """UNIX timestamp -> datetime pre výstup štatistík"""
+    return datetime.fromtimestamp(timestamp) if timestamp is not None else None
 
 
 class ProxyPool:
     """Pool proxy serverov s rotáciou a health checking"""
 
+    # Pevná množina atribútov - bez __dict__, rýchlejší prístup v get_next_proxy
+    __slots__ = (
+        "proxies",
+        "_proxy_ids",
+        "_index_by_key",
+        "_index_by_obj",
+        "_ready",
+        "_gen",
+        "_cooling",
+        "_cooldown_heap",
+        "_heap_seq",
+        "_seq",
+        "_next_release",
+        "_in_failure",
+        "_failed_count",
+        "_success",
+        "_failed",
+        "_last_used",
+        "_last_failed",
+        "failure_cooldown_secs",
+        "_sessions",
+        "_direct_session",
+        "_lock",
+    )
+
     def __init__(self):
         self.proxies: List[Dict[str, str]] = []
-        self.current_index = 0
-        self.failed_proxies: Dict[str, datetime] = {}
-        self.proxy_stats: Dict[str, Dict] = defaultdict(
-            lambda: {"success": 0, "failed": 0, "last_used": None, "last_failed": None}
-        )
-        self.failure_cooldown = timedelta(minutes=5)  # 5 minút cooldown po chybe
+        # Stabilné kľúče proxy (priradené v add_proxy) - bez str(dict) pri lookupe
+        self._proxy_ids: List[str] = []
+        self._index_by_key: Dict[str, int] = {}
+        # id() vrátených proxy dictov - pool ich drží, takže id sú stabilné
+        self._index_by_obj: Dict[int, int] = {}
+        # Rotácia bez zámku: dostupné proxy krúžia v deque záznamov (index, gen).
+        # deque.popleft/append sú v CPythone atomické, takže výber proxy
+        # nepotrebuje lock. Zlyhanie zvýši gen proxy - jeho záznam v deque
+        # sa tým zneplatní a pri najbližšom popleft zahodí.
+        self._ready: Deque[Tuple[int, int]] = deque()
+        self._gen: List[int] = []
+        self._cooling: List[bool] = []
+        # Proxy v cooldown: min-heap (ready_at, seq, index) pod zámkom. Platný je
+        # len záznam s posledným seq pre daný index. ready_at je time.monotonic()
+        # - lacnejšie ako datetime.now() a odolné voči posunom systémových hodín.
+        self._cooldown_heap: List[Tuple[float, int, int]] = []
+        self._heap_seq: List[int] = []
+        self._seq = itertools.count()
+        # Najskorší koniec cooldownu - čítaný bez zámku v get_next_proxy
+        self._next_release = float("inf")
+        # Proxy označený ako zlyhaný (pre štatistiky) až do mark_success
+        self._in_failure: List[bool] = []
+        self._failed_count = 0
+        # Štatistiky ako paralelné polia indexované proxy (namiesto dictu per proxy),
+        # časy ako UNIX timestamp - dict pre get_stats sa skladá až na požiadanie
+        self._success = array("Q")
+        self._failed = array("Q")
+        self._last_used: List[Optional[float]] = []
+        self._last_failed: List[Optional[float]] = []
+        self.failure_cooldown_secs = 300.0  # 5 minút cooldown po chybe
+        # HTTP session per proxy (kľúč = index proxy) + jedna pre priame volania,
+        # aby sa TCP/TLS spojenia znovupoužívali medzi requestmi
+        self._sessions: Dict[int, requests.Session] = {}
+        self._direct_session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    def _index_of(self, proxy: Dict[str, str]) -> Optional[int]:
+        """Index proxy v poole (objekt z get_next_proxy, inak podľa obsahu)"""
+        index = self._index_by_obj.get(id(proxy))
+        if index is not None and self.proxies[index] is proxy:
+            return index
+        return self._index_by_key.get(str(proxy))
+
+    def _update_next_release(self) -> None:
+        """Prepočíta najskorší koniec cooldownu (volať pod zámkom)"""
+        heap = self._cooldown_heap
+        self._next_release = heap[0][0] if heap else float("inf")
+
+    def _release_expired(self) -> None:
+        """Vráti proxy s uplynutým cooldownom späť do rotácie"""
+        with self._lock:
+            now = time.monotonic()
+            heap = self._cooldown_heap
+            while heap and heap[0][0] <= now:
+                _, seq, index = heapq.heappop(heap)
+                if seq == self._heap_seq[index] and self._cooling[index]:
+                    self._cooling[index] = False
+                    self._ready.append((index, self._gen[index]))
+            self._update_next_release()
+
+    def _soonest_ready(self) -> Optional[int]:
+        """Index proxy, ktorému cooldown skončí najskôr (všetky sú v cooldown)"""
+        with self._lock:
+            heap = self._cooldown_heap
+            while heap:
+                _, seq, index = heap[0]
+                if seq == self._heap_seq[index] and self._cooling[index]:
+                    return index
+                heapq.heappop(heap)
+            self._update_next_release()
+            return None
+
+    def get_session(self, proxy: Optional[Dict[str, str]] = None) -> requests.Session:
+        """Vráti (lazy vytvorenú) session pre daný proxy alebo pre priame volania"""
+        with self._lock:
+            if proxy is None:
+                if self._direct_session is None:
+                    self._direct_session = _new_session()
+                return self._direct_session
+
+            index = self._index_of(proxy)
+            session = self._sessions.get(index) if index is not None else None
+            if session is None:
+                session = _new_session()
+                # Proxy (vrátane auth) je nastavený na session raz; trust_env ostáva
+                # zapnuté, aby platili NO_PROXY, REQUESTS_CA_BUNDLE aj .netrc
+                session.proxies.update(proxy)
+                if index is not None:
+                    self._sessions[index] = session
+            return session
 
     def add_proxy(self, proxy_url: str, auth: Optional[Dict[str, str]] = None):
         """
@@ -41,8 +175,23 @@ class ProxyPool:
                 )
                 proxy_config["https"] = proxy_config["http"]
 
-        self.proxies.append(proxy_config)
-        print(f"✅ Proxy pridané: {proxy_url}")
+        with self._lock:
+            index = len(self.proxies)
+            proxy_key = str(proxy_config)
+            self.proxies.append(proxy_config)
+            self._proxy_ids.append(proxy_key)
+            self._index_by_key[proxy_key] = index
+            self._index_by_obj[id(proxy_config)] = index
+            self._gen.append(0)
+            self._cooling.append(False)
+            self._heap_seq.append(-1)
+            self._in_failure.append(False)
+            self._success.append(0)
+            self._failed.append(0)
+            self._last_used.append(None)
+            self._last_failed.append(None)
+            self._ready.append((index, 0))
+        logger.info("Proxy pridané: %s", proxy_url)
 
     def get_next_proxy(self) -> Optional[Dict[str, str]]:
         """
@@ -51,57 +200,96 @@ class ProxyPool:
         Returns:
             Proxy config dict alebo None ak nie sú dostupné proxy
         """
-        if not self.proxies:
-            return None
-
-        # Skúsiť nájsť dostupný proxy
-        attempts = 0
-        max_attempts = len(self.proxies)
-
-        while attempts < max_attempts:
-            proxy = self.proxies[self.current_index]
-            proxy_key = str(proxy)
-
-            # Skontrolovať, či proxy nie je v cooldown
-            if proxy_key in self.failed_proxies:
-                last_failed = self.failed_proxies[proxy_key]
-                if datetime.now() - last_failed < self.failure_cooldown:
-                    # Proxy je stále v cooldown, preskočiť
-                    self.current_index = (self.current_index + 1) % len(self.proxies)
-                    attempts += 1
-                    continue
-
-            # Proxy je dostupný
-            self.current_index = (self.current_index + 1) % len(self.proxies)
-            self.proxy_stats[proxy_key]["last_used"] = datetime.now()
-            return proxy
-
-        # Všetky proxy sú v cooldown, vrátiť prvý dostupný
-        return self.proxies[0] if self.proxies else None
+        if self._next_release <= time.monotonic():
+            self._release_expired()
+
+        ready = self._ready
+        gen = self._gen
+        while True:
+            try:
+                entry = ready.popleft()
+            except IndexError:
+                # Všetky proxy sú v cooldown - vrátiť ten, ktorý sa uvoľní najskôr
+                index = self._soonest_ready()
+                if index is None:
+                    return None
+                break
+            if entry[1] == gen[entry[0]]:
+                # Proxy je dostupný - zaradiť ho na koniec rotácie
+                ready.append(entry)
+                index = entry[0]
+                break
+            # Zastaraný záznam (proxy medzitým zlyhal) - zahodiť
+
+        self._last_used[index] = time.time()
+        return self.proxies[index]
 
     def mark_success(self, proxy: Dict[str, str]):
         """Označiť proxy ako úspešné"""
-        proxy_key = str(proxy)
-        self.proxy_stats[proxy_key]["success"] += 1
+        with self._lock:
+            index = self._index_of(proxy)
+            if index is None:
+                return
+            self._success[index] += 1
+
+            if self._in_failure[index]:
+                self._in_failure[index] = False
+                self._failed_count -= 1
 
-        # Odstrániť z failed_proxies ak tam bol
-        if proxy_key in self.failed_proxies:
-            del self.failed_proxies[proxy_key]
+            # Ukončiť prípadný cooldown - vrátiť proxy do rotácie
+            if self._cooling[index]:
+                self._cooling[index] = False
+                self._ready.append((index, self._gen[index]))
 
     def mark_failed(self, proxy: Dict[str, str]):
         """Označiť proxy ako zlyhané"""
-        proxy_key = str(proxy)
-        self.proxy_stats[proxy_key]["failed"] += 1
-        self.proxy_stats[proxy_key]["last_failed"] = datetime.now()
-        self.failed_proxies[proxy_key] = datetime.now()
+        with self._lock:
+            index = self._index_of(proxy)
+            if index is None:
+                return
+            self._failed[index] += 1
+            self._last_failed[index] = time.time()
+            if not self._in_failure[index]:
+                self._in_failure[index] = True
+                self._failed_count += 1
+
+            # Vyradiť z rotácie (zneplatniť záznam v deque) a naplánovať návrat
+            self._gen[index] += 1
+            self._cooling[index] = True
+            seq = next(self._seq)
+            self._heap_seq[index] = seq
+            heapq.heappush(
+                self._cooldown_heap,
+                (time.monotonic() + self.failure_cooldown_secs, seq, index),
+            )
+            self._update_next_release()
+
+            # Proxy ide do cooldown - zavrieť jeho spojenia, nech neostanú visieť
+            session = self._sessions.pop(index, None)
+        if session is not None:
+            session.close()
 
     def get_stats(self) -> Dict:
         """Získať štatistiky proxy poolu"""
         return {
             "total_proxies": len(self.proxies),
-            "available_proxies": len(self.proxies) - len(self.failed_proxies),
-            "failed_proxies": len(self.failed_proxies),
-            "proxy_stats": dict(self.proxy_stats),
+            "available_proxies": len(self.proxies) - self._failed_count,
+            "failed_proxies": self._failed_count,
+            "proxy_stats": {
+                proxy_key: {
+                    "success": success,
+                    "failed": failed,
+                    "last_used": _from_timestamp(last_used),
+                    "last_failed": _from_timestamp(last_failed),
+                }
+                for proxy_key, success, failed, last_used, last_failed in zip(
+                    self._proxy_ids,
+                    self._success,
+                    self._failed,
+                    self._last_used,
+                    self._last_failed,
+                )
+            },
         }
 
 
@@ -126,7 +314,7 @@ def init_proxy_pool(proxy_list: Optional[List[str]] = None):
     if proxy_list:
         for proxy_url in proxy_list:
             _proxy_pool.add_proxy(proxy_url)
-        print(f"✅ Proxy pool inicializovaný s {len(proxy_list)} proxy")
+        logger.info("Proxy pool inicializovaný s %d proxy", len(proxy_list))
         return
 
     # Načítať z environment variables
@@ -146,16 +334,16 @@ def init_proxy_pool(proxy_list: Optional[List[str]] = None):
             else:
                 _proxy_pool.add_proxy(proxy_url)
 
-        print(
-            f"✅ Proxy pool inicializovaný s {len(proxies)} proxy z environment variables"
+        logger.info(
+            "Proxy pool inicializovaný s %d proxy z environment variables", len(proxies)
         )
         return
 
     # Žiadne proxy - používajú sa priame API volania
-    print("ℹ️ Proxy pool prázdny - používajú sa priame API volania")
-    print("   💡 Tip: Nastav PROXY_LIST environment variable pre proxy rotation")
-    print(
-        "   💡 Príklad: export PROXY_LIST='http://proxy1.com:8080,http://proxy2.com:8080'"
+    logger.info(
+        "Proxy pool prázdny - používajú sa priame API volania "
+        "(pre proxy rotation nastav PROXY_LIST, napr. "
+        "'http://proxy1.com:8080,http://proxy2.com:8080')"
     )
 
 
@@ -204,8 +392,6 @@ def make_request_with_proxy(
     Returns:
         Response object alebo None pri chybe
     """
-    import requests
-
     if headers is None:
         headers = {}
 
@@ -215,30 +401,32 @@ def make_request_with_proxy(
     for attempt in range(max_retries):
         try:
             if proxy:
-                response = requests.get(
-                    url, headers=headers, proxies=proxy, timeout=timeout
+                response = _proxy_pool.get_session(proxy).get(
+                    url, headers=headers, timeout=timeout
                 )
                 mark_proxy_success(proxy)
                 return response
             else:
                 # Priame volanie bez proxy
-                response = requests.get(url, headers=headers, timeout=timeout)
+                response = _proxy_pool.get_session().get(
+                    url, headers=headers, timeout=timeout
+                )
                 return response
 
         except requests.exceptions.ProxyError as e:
             if proxy:
                 mark_proxy_failed(proxy)
-                print(f"⚠️ Proxy chyba: {e}, skúšam ďalší proxy...")
+                logger.warning("Proxy chyba: %s, skúšam ďalší proxy...", e)
                 proxy = get_proxy() if use_proxy else None
             else:
-                print(f"⚠️ Request chyba: {e}")
+                logger.warning("Request chyba: %s", e)
                 return None
 
         except requests.exceptions.RequestException as e:
             if proxy:
                 mark_proxy_failed(proxy)
                 proxy = get_proxy() if use_proxy else None
-            print(f"⚠️ Request chyba: {e}")
+            logger.warning("Request chyba: %s", e)
             if attempt == max_retries - 1:
                 return None
 
@@ -3,17 +3,12 @@ Rate Limiting Service pre ILUMINATI SYSTEM
 Implementuje Token Bucket algoritmus
 """
 
-from datetime import datetime
-from typing import Dict, Optional
-from collections import defaultdict
-
-# Token Bucket pre každého klienta
-_buckets: Dict[str, Dict] = defaultdict(lambda: {
-    'tokens': 10,  # Počiatočný počet tokenov
-    'last_refill': datetime.now(),
-    'capacity': 10,  # Maximálna kapacita
-    'refill_rate': 1.0,  # Tokenov za sekundu
-})
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Token Bucket pre každého klienta: [tokens, last_refill (time.monotonic())]
+# Mutable list - refill aj odber tokenu prepisujú hodnoty na mieste
+_buckets: Dict[str, List[float]] = {}
 
 # Konfigurácia pre rôzne tiery
 TIER_CONFIGS = {
@@ -34,31 +29,36 @@ TIER_CONFIGS = {
 # Default tier
 DEFAULT_TIER = 'free'
 
+# (capacity, refill_rate) pre každý tier
+_TIER_LIMITS: Dict[str, Tuple[float, float]] = {
+    name: (config['capacity'], config['refill_rate'])
+    for name, config in TIER_CONFIGS.items()
+}
+
+
+def _refill(client_id: str, tier: str) -> Tuple[List[float], float, float]:
+    """
+    Lenivo doplní bucket klienta a vráti (bucket, capacity, refill_rate).
+    """
+    capacity, refill_rate = _TIER_LIMITS.get(tier) or _TIER_LIMITS[DEFAULT_TIER]
+    now = time.monotonic()
+
+    bucket = _buckets.get(client_id)
+    if bucket is None:
+        bucket = _buckets[client_id] = [capacity, now]
+    else:
+        # Pridať tokeny podľa uplynutého času (max do capacity)
+        bucket[0] = min(capacity, bucket[0] + refill_rate * (now - bucket[1]))
+        bucket[1] = now
+
+    return bucket, capacity, refill_rate
+
 
 def refill_tokens(client_id: str, tier: str = DEFAULT_TIER) -> None:
     """
     Doplní tokeny do bucketu podľa refill rate.
     """
-    if client_id not in _buckets:
-        config = TIER_CONFIGS.get(tier, TIER_CONFIGS[DEFAULT_TIER])
-        _buckets[client_id] = {
-            'tokens': config['capacity'],
-            'last_refill': datetime.now(),
-            'capacity': config['capacity'],
-            'refill_rate': config['refill_rate'],
-        }
-        return
-    
-    bucket = _buckets[client_id]
-    now = datetime.now()
-    elapsed = (now - bucket['last_refill']).total_seconds()
-    
-    # Vypočítať koľko tokenov pridať
-    tokens_to_add = elapsed * bucket['refill_rate']
-    
-    # Pridať tokeny (max do capacity)
-    bucket['tokens'] = min(bucket['capacity'], bucket['tokens'] + tokens_to_add)
-    bucket['last_refill'] = now
+    _refill(client_id, tier)
 
 
 def is_allowed(client_id: str, tokens_required: int = 1, tier: str = DEFAULT_TIER) -> tuple[bool, Optional[Dict]]:
@@ -68,28 +68,28 @@ def is_allowed(client_id: str, tokens_required: int = 1, tier: str = DEFAULT_TIE
     Args:
         client_id: Identifikátor klienta (IP, API key, atď.)
         tokens_required: Počet tokenov potrebných pre request
-        tier: Tier klienta (free/pro/enterprise)
+        tier: Tier klienta (free/pro/enterprise alebo UserTier - hashuje sa ako jeho hodnota)
         
     Returns:
         Tuple (is_allowed, info_dict)
         info_dict obsahuje: allowed, remaining, reset_after
     """
-    refill_tokens(client_id, tier)
-    bucket = _buckets[client_id]
+    bucket, capacity, refill_rate = _refill(client_id, tier)
+    tokens = bucket[0]
     
-    if bucket['tokens'] >= tokens_required:
-        bucket['tokens'] -= tokens_required
+    if tokens >= tokens_required:
+        tokens = bucket[0] = tokens - tokens_required
         return True, {
             'allowed': True,
-            'remaining': int(bucket['tokens']),
-            'reset_after': int((bucket['capacity'] - bucket['tokens']) / bucket['refill_rate']),
+            'remaining': int(tokens),
+            'reset_after': int((capacity - tokens) / refill_rate),
         }
     else:
         return False, {
             'allowed': False,
-            'remaining': int(bucket['tokens']),
-            'reset_after': int((bucket['capacity'] - bucket['tokens']) / bucket['refill_rate']),
-            'retry_after': int((tokens_required - bucket['tokens']) / bucket['refill_rate']),
+            'remaining': int(tokens),
+            'reset_after': int((capacity - tokens) / refill_rate),
+            'retry_after': int((tokens_required - tokens) / refill_rate),
         }
 
 
@@ -132,11 +132,11 @@ def cleanup_old_buckets(max_age_hours: int = 24) -> int:
     Vymaže staré buckety (neaktívne viac ako max_age_hours).
     Vráti počet vymazaných bucketov.
     """
-    now = datetime.now()
+    now = time.monotonic()
     to_delete = []
     
     for client_id, bucket in _buckets.items():
-        age = (now - bucket['last_refill']).total_seconds() / 3600
+        age = (now - bucket[1]) / 3600
         if age > max_age_hours:
             to_delete.append(client_id)
     
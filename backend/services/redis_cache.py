@@ -3,9 +3,10 @@ Redis Cache Service pre ILUMINATI SYSTEM
 Migrácia z in-memory cache na Redis pre lepšiu škálovateľnosť
 """
 
-import json
 import os
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
+
+import orjson
 
 try:
     import redis
@@ -20,6 +21,7 @@ REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
 REDIS_URL = os.getenv("REDIS_URL", None)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
 
 # Redis client (singleton)
 _redis_client: Optional[Any] = None
@@ -36,18 +38,26 @@ def get_redis_client():
     if _redis_client is None and not _redis_initialized:
         _redis_initialized = True
         try:
+            # Jeden zdieľaný pool spojení pre celý proces
             if REDIS_URL:
-                _redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+                pool = redis.ConnectionPool.from_url(
+                    REDIS_URL,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    decode_responses=False,
+                )
             else:
-                _redis_client = redis.Redis(
+                pool = redis.ConnectionPool(
                     host=REDIS_HOST,
                     port=REDIS_PORT,
                     db=REDIS_DB,
                     password=REDIS_PASSWORD,
-                    decode_responses=True,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    # Bez dekódovania - cache drží aj binárne (msgpack) payloady
+                    decode_responses=False,
                     socket_connect_timeout=2,
                     socket_timeout=2,
                 )
+            _redis_client = redis.Redis(connection_pool=pool)
             # Test connection
             _redis_client.ping()
             print("✅ Redis cache pripojený")
@@ -59,6 +69,28 @@ def get_redis_client():
     return _redis_client
 
 
+def _decode_value(value: bytes) -> Any:
+    """Dekóduje hodnotu z Redis: JSON, inak text, binárne (msgpack) bez zmeny."""
+    # orjson parsuje priamo bytes (bez medzikroku cez str)
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        pass
+
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value
+
+
+def _encode_value(value: Any) -> Any:
+    """Serializuje dict/list do JSON (orjson, UTF-8 bytes), ostatné hodnoty nechá tak."""
+    if isinstance(value, (dict, list)):
+        # OPT_NON_STR_KEYS - int kľúče na str ako pri json.dumps
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return value
+
+
 def redis_get(key: str) -> Optional[Any]:
     """
     Získa hodnotu z Redis cache.
@@ -77,12 +109,7 @@ def redis_get(key: str) -> Optional[Any]:
         value = client.get(key)
         if value is None:
             return None
-        
-        # Pokúsiť sa deserializovať JSON
-        try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            return value
+        return _decode_value(value)
     except Exception as e:
         print(f"⚠️ Redis get error: {e}")
         return None
@@ -105,17 +132,84 @@ def redis_set(key: str, value: Any, ttl: int = 3600) -> bool:
         return False
     
     try:
-        # Serializovať JSON ak je to dict/list
-        if isinstance(value, (dict, list)):
-            value = json.dumps(value, ensure_ascii=False)
-        
-        client.setex(key, ttl, value)
+        client.setex(key, ttl, _encode_value(value))
         return True
     except Exception as e:
         print(f"⚠️ Redis set error: {e}")
         return False
 
 
+def redis_mget(keys: List[str]) -> Dict[str, Any]:
+    """
+    Získa viac hodnôt naraz jedným round-tripom (MGET).
+    
+    Args:
+        keys: Zoznam cache kľúčov
+        
+    Returns:
+        Dict kľúč → hodnota, len pre nájdené kľúče
+    """
+    client = get_redis_client()
+    if not client or not keys:
+        return {}
+    
+    try:
+        values = client.mget(keys)
+        return {
+            key: _decode_value(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+    except Exception as e:
+        print(f"⚠️ Redis mget error: {e}")
+        return {}
+
+
+def redis_mset(mapping: Dict[str, Any], ttl: int = 3600) -> bool:
+    """
+    Uloží viac hodnôt naraz cez pipeline (jeden round-trip).
+    
+    Args:
+        mapping: Dict kľúč → hodnota
+        ttl: Time to live v sekundách (default: 1 hodina)
+        
+    Returns:
+        True ak úspešné, False inak
+    """
+    client = get_redis_client()
+    if not client:
+        return False
+    
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.setex(key, ttl, _encode_value(value))
+        pipe.execute()
+        return True
+    except Exception as e:
+        print(f"⚠️ Redis mset error: {e}")
+        return False
+
+
+def redis_pipeline(transaction: bool = False) -> Optional[Any]:
+    """
+    Vráti Redis pipeline - viac príkazov v jednom round-tripe.
+    
+    Hodnoty treba serializovať cez _encode_value a výsledky GET
+    dekódovať cez _decode_value (rovnako ako redis_set / redis_get).
+    
+    Args:
+        transaction: Zabaliť príkazy do MULTI/EXEC (default: nie)
+        
+    Returns:
+        Pipeline alebo None ak Redis nie je dostupný
+    """
+    client = get_redis_client()
+    if not client:
+        return None
+    return client.pipeline(transaction=transaction)
+
+
 def redis_delete(key: str) -> bool:
     """
     Vymaže kľúč z Redis cache.
@@ -159,6 +253,67 @@ def redis_exists(key: str) -> bool:
         return False
 
 
+def redis_set_nx(key: str, value: Any, ttl: int = 30) -> Optional[bool]:
+    """
+    Atomicky uloží hodnotu len ak kľúč neexistuje (SET NX EX) - distribuovaný zámok.
+    
+    Args:
+        key: Cache kľúč
+        value: Hodnota na uloženie
+        ttl: Time to live v sekundách (zámok sa uvoľní aj pri páde držiteľa)
+        
+    Returns:
+        True ak sa kľúč nastavil, False ak už existuje, None ak Redis nie je dostupný
+    """
+    client = get_redis_client()
+    if not client:
+        return None
+    
+    try:
+        return bool(client.set(key, _encode_value(value), nx=True, ex=ttl))
+    except Exception as e:
+        print(f"⚠️ Redis set nx error: {e}")
+        return None
+
+
+# DEL len ak kľúč stále drží očakávanú hodnotu (atomicky na strane Redis)
+_DELETE_IF_EQUALS_LUA = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+_delete_if_equals_script = None
+
+
+def redis_delete_if_equals(key: str, value: Any) -> Optional[bool]:
+    """
+    Atomicky vymaže kľúč len ak jeho hodnota je value (compare-and-delete).
+    
+    Args:
+        key: Cache kľúč
+        value: Očakávaná hodnota (napr. token držiteľa zámku)
+        
+    Returns:
+        True ak sa kľúč vymazal, False ak mal inú hodnotu, None ak Redis nie je dostupný
+    """
+    global _delete_if_equals_script
+    
+    client = get_redis_client()
+    if not client:
+        return None
+    
+    try:
+        if _delete_if_equals_script is None:
+            _delete_if_equals_script = client.register_script(_DELETE_IF_EQUALS_LUA)
+        return bool(
+            _delete_if_equals_script(keys=[key], args=[_encode_value(value)], client=client)
+        )
+    except Exception as e:
+        print(f"⚠️ Redis delete if equals error: {e}")
+        return None
+
+
 def redis_clear_pattern(pattern: str) -> int:
     """
     Vymaže všetky kľúče zodpovedajúce patternu.
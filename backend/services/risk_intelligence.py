@@ -7,6 +7,19 @@ from typing import Dict, List
 from collections import defaultdict
 
 
+def _node_types(nodes: List[Dict]) -> Dict[str, str]:
+    """
+    Index id uzla -> typ uzla (pri duplicitnom id platí prvý uzol).
+    
+    Hrany sa potom párujú s uzlami cez dict lookup namiesto prechodu
+    celého zoznamu uzlov pre každú hranu.
+    """
+    node_types = {}
+    for node in nodes:
+        node_types.setdefault(node.get("id"), node.get("type"))
+    return node_types
+
+
 def detect_white_horse(nodes: List[Dict], edges: List[Dict]) -> Dict[str, int]:
     """
     Detekuje "bielych koní" - osoby, ktoré sú konateľmi v príliš veľkom počte firiem.
@@ -16,19 +29,15 @@ def detect_white_horse(nodes: List[Dict], edges: List[Dict]) -> Dict[str, int]:
     """
     # Zistiť, koľko firiem má každá osoba
     person_companies = defaultdict(set)
+    node_types = _node_types(nodes)
     
     for edge in edges:
         if edge.get("type") == "MANAGED_BY":
             source = edge.get("source")
             target = edge.get("target")
             
-            # Nájsť typy uzlov
-            source_node = next((n for n in nodes if n.get("id") == source), None)
-            target_node = next((n for n in nodes if n.get("id") == target), None)
-            
-            if source_node and target_node:
-                if source_node.get("type") == "company" and target_node.get("type") == "person":
-                    person_companies[target].add(source)
+            if node_types.get(source) == "company" and node_types.get(target) == "person":
+                person_companies[target].add(source)
     
     # Filtrovať osoby s viac ako 5 firmami
     white_horses = {
@@ -49,18 +58,15 @@ def detect_circular_structures(nodes: List[Dict], edges: List[Dict]) -> List[Lis
     """
     # Vytvoriť graf vlastníctva
     ownership_graph = defaultdict(set)
+    node_types = _node_types(nodes)
     
     for edge in edges:
         if edge.get("type") == "OWNED_BY":
             source = edge.get("source")
             target = edge.get("target")
             
-            source_node = next((n for n in nodes if n.get("id") == source), None)
-            target_node = next((n for n in nodes if n.get("id") == target), None)
-            
-            if source_node and target_node:
-                if source_node.get("type") == "company" and target_node.get("type") == "company":
-                    ownership_graph[source].add(target)
+            if node_types.get(source) == "company" and node_types.get(target) == "company":
+                ownership_graph[source].add(target)
     
     # Hľadať cykly v grafe (jednoduchá BFS verzia)
     circular_structures = []
@@ -102,18 +108,15 @@ def detect_virtual_seats(nodes: List[Dict], edges: List[Dict]) -> Dict[str, int]
         Dict s address_id -> počet firiem
     """
     address_companies = defaultdict(set)
+    node_types = _node_types(nodes)
     
     for edge in edges:
         if edge.get("type") == "LOCATED_AT":
             source = edge.get("source")
             target = edge.get("target")
             
-            source_node = next((n for n in nodes if n.get("id") == source), None)
-            target_node = next((n for n in nodes if n.get("id") == target), None)
-            
-            if source_node and target_node:
-                if source_node.get("type") == "company" and target_node.get("type") == "address":
-                    address_companies[target].add(source)
+            if node_types.get(source) == "company" and node_types.get(target) == "address":
+                address_companies[target].add(source)
     
     # Filtrovať adresy s viac ako 3 firmami
     virtual_seats = {
@@ -0,0 +1,54 @@
+"""
+Search Builders - čisté pomocné funkcie pre /api/search
+Routing krajiny a skladanie labelov uzlov grafu
+Plne typované, bez dynamických atribútov - modul je kompilovateľný cez mypyc
+"""
+
+from typing import Dict, Tuple, Union
+
+from services.hu_nav import is_hungarian_tax_number
+from services.pl_krs import is_polish_krs
+
+# Fallback firma, keď register neodpovedá: krajina → (názov, typ identifikátora)
+FALLBACK_META: Dict[str, Tuple[str, str]] = {
+    "SK": ("Slovenská Firma", "IČO"),
+    "HU": ("Magyar Cég", "Adószám"),
+    "PL": ("Polska Spółka", "KRS"),
+}
+
+
+def detect_country(query: str) -> str:
+    """
+    Určí krajinu podľa tvaru identifikátora (dĺžka + číslice).
+
+    8 číslic → SK IČO, 9-10 → PL KRS (is_polish_krs; KRS je 10-miestne
+    s úvodnými nulami), 11 → HU adószám (is_hungarian_tax_number), inak CZ (ARES).
+    České 8-9 miestne IČO sa overuje cez ARES ešte pred týmto routingom.
+    """
+    if not (query.isascii() and query.isdigit()):
+        return "CZ"
+    if len(query) == 8:
+        return "SK"
+    if is_polish_krs(query):
+        return "PL"
+    if is_hungarian_tax_number(query):
+        return "HU"
+    return "CZ"
+
+
+def fallback_labels(country: str, query: str) -> Tuple[str, str]:
+    """Vráti (label, details) fallback firmy pre krajinu z FALLBACK_META."""
+    noun, id_name = FALLBACK_META[country]
+    return f"{noun} {query}", f"{id_name}: {query}"
+
+
+def entry_name(entry: Union[str, Dict[str, str]], fallback: str) -> str:
+    """Meno osoby z parsera - buď priamo reťazec, alebo dict s kľúčom 'name'."""
+    if isinstance(entry, str):
+        return entry
+    return entry.get("name", fallback)
+
+
+def truncate_label(text: str, limit: int = 30) -> str:
+    """Skráti label na max. `limit` znakov vrátane '...'."""
+    return text if len(text) <= limit else text[: limit - 3] + "..."
@@ -2,6 +2,7 @@
 Vyhľadávanie podľa názvu - Full-text search v lokálnej DB
 """
 
+import unicodedata
 from typing import Dict, List, Optional
 
 from sqlalchemy import func, or_
@@ -9,6 +10,18 @@ from sqlalchemy import func, or_
 from services.database import CompanyCache, get_db_session
 
 
+def _strip_marks(text: str) -> str:
+    """Odstráni diakritiku cez NFD rozklad (bez combining znakov)"""
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(c for c in decomposed if unicodedata.category(c) != "Mn")
+
+
+# Znak -> znak bez diakritiky pre ASCII a latinku (Latin-1 Supplement + Latin Extended-A/B),
+# t.j. všetko potrebné pre SK, CZ, PL a HU názvy firiem
+_LATIN_FOLD = {chr(code): _strip_marks(chr(code)) for code in range(0x250)}
+_fold_char = _LATIN_FOLD.__getitem__
+
+
 def normalize_query(query: str) -> str:
     """
     Normalizuje vyhľadávací query.
@@ -17,11 +30,14 @@ def normalize_query(query: str) -> str:
     - Zmení na lowercase
     - Odstráni extra medzery
     """
-    import unicodedata
-
-    # Odstrániť diakritiku
-    normalized = unicodedata.normalize("NFD", query)
-    normalized = "".join(c for c in normalized if unicodedata.category(c) != "Mn")
+    # Odstrániť diakritiku (ASCII query nemá čo odstraňovať)
+    normalized = query
+    if not normalized.isascii():
+        try:
+            normalized = "".join(map(_fold_char, normalized))
+        except KeyError:
+            # Znaky mimo tabuľky (combining znaky, iné písma) - plný NFD rozklad
+            normalized = _strip_marks(normalized)
 
     # Lowercase a trim
     normalized = normalized.lower().strip()
@@ -3,16 +3,112 @@ Slovensko - ORSR Provider (Live Scraping)
 Hybridný model: Cache → DB → Live Scraping
 """
 
+import asyncio
+import logging
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Set
 
 import requests
 from bs4 import BeautifulSoup
-
-from services.cache import get, get_cache_key
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from services.cache import (
+    acquire_lock,
+    get,
+    get_cache_key,
+    get_many,
+    is_locked,
+    release_lock,
+)
 from services.cache import set as cache_set
-from services.database import CompanyCache, get_db_session
+from services.cache import set_many as cache_set_many
+from services.database import CompanyCache, get_db_session, save_synced_companies
+from services.sk_region_resolver import enrich_address_with_region
+from services.sk_ruz_provider import get_ruz_provider
+from services.sk_zrsr_provider import get_zrsr_provider
+
+# lxml (C parser) je voliteľný - ak je nainštalovaný, BeautifulSoup parsuje
+# výpisy ORSR rádovo rýchlejšie ako čistý Python html.parser
+try:
+    import lxml  # noqa: F401
+
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+_HTML_PARSER = "lxml" if LXML_AVAILABLE else "html.parser"
+# ORSR servíruje stránky vo windows-1250 - surové bajty sa dekódujú priamo
+# v parseri, bez detekcie kódovania cez response.text
+_ORSR_ENCODING = "windows-1250"
+
+logger = logging.getLogger("iluminati.sk_orsr")
+
+# Vlákna pre súbežné obohatenie výpisu (ZRSR + RUZ) v _parse_orsr_html
+_ENRICH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="orsr-enrich")
+_ENRICH_TIMEOUT = 15  # sekundy na výsledok jedného obohatenia
+
+# Obnova starých DB záznamov na pozadí (stale-while-revalidate); _refreshing
+# drží IČO, ktoré sa práve obnovujú, aby sa jedno IČO nescrapovalo viackrát naraz
+_REFRESH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="orsr-refresh")
+_refreshing: Set[str] = set()
+_refreshing_lock = threading.Lock()
+
+# "(od: 01.01.2020)" za hodnotami vo výpise a PSČ v adrese
+_RE_OD = re.compile(r"\s*\(od:.*?\)")
+_RE_POSTAL = re.compile(r"\b\d{5}\b")
+# Link na detail výpisu vo výsledkoch vyhľadávania (skupina = ID výpisu)
+_RE_DETAIL_ID = re.compile(r"vypis\.asp\?ID=([^&]+)")
+
+# Kľúčové slová v texte výpisu, ktoré znamenajú likvidáciu/konkurz
+_STATUS_WORDS = ("likvidácia", "konkurz")
+
+# Labely polí vo výpise ORSR (bunka s hodnotou je nasledujúci <td>)
+_ORSR_LABELS = (
+    "Obchodné meno:",
+    "Právna forma:",
+    "Sídlo:",
+    "štatutárny orgán:",
+    "Spoločníci:",
+    "Deň zápisu:",
+)
+
+
+def _scrape_lock_key(ico: str) -> str:
+    """Kľúč single-flight zámku live scrapingu IČO (lookup_by_ico aj obnova na pozadí)"""
+    return f"lock:orsr:{ico}"
+
+
+def _link_texts(cell) -> List[str]:
+    """Neprázdne texty všetkých <a> v bunke (get_text sa volá raz na link)"""
+    return [name for link in cell.find_all("a") if (name := link.get_text(strip=True))]
+
+
+def _find_label_cells(soup: BeautifulSoup) -> Dict[str, Dict]:
+    """
+    Nájde bunky s labelmi jedným prechodom cez všetky <td>.
+
+    Returns:
+        {"string": {label: td}, "text": {label: td}} - prvý <td>, ktorého
+        .string, resp. get_text() obsahuje label (v poradí dokumentu)
+    """
+    by_string: Dict[str, object] = {}
+    by_text: Dict[str, object] = {}
+    for td in soup.find_all("td"):
+        if len(by_text) == len(_ORSR_LABELS) and len(by_string) == len(_ORSR_LABELS):
+            break
+        text = td.get_text()
+        string = td.string
+        for label in _ORSR_LABELS:
+            if label in text and label not in by_text:
+                by_text[label] = td
+            if string and label in string and label not in by_string:
+                by_string[label] = td
+    return {"string": by_string, "text": by_text}
 
 
 class OrsrProvider:
@@ -23,9 +119,30 @@ class OrsrProvider:
 
     CACHE_TTL = timedelta(hours=12)  # Cache na 12 hodín
     DB_REFRESH_DAYS = 7  # Auto-refresh po 7 dňoch
+    MAX_CONCURRENCY = 16  # Súbežné scrapovanie v lookup_by_ico_batch
+    SCRAPE_LOCK_TTL = 30  # Sekundy, kým zámok scrapovania IČO sám vyprší
+    SCRAPE_WAIT_STEP = 0.25  # Interval kontroly cache pri čakaní na iný worker
 
     def __init__(self):
         self.session = requests.Session()
+        # Pool spojení dimenzovaný na súbežné lookupy (keep-alive na orsr.sk),
+        # retry na prechodné chyby IIS backendu
+        adapter = HTTPAdapter(
+            pool_connections=self.MAX_CONCURRENCY,
+            pool_maxsize=self.MAX_CONCURRENCY,
+            max_retries=Retry(
+                total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Connection": "keep-alive",
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            }
+        )
         # Obísť SSL overovanie pre ORSR (nutné)
         self.session.verify = False
         requests.packages.urllib3.disable_warnings()
@@ -36,22 +153,23 @@ class OrsrProvider:
 
         Vrstvy:
         1. Cache (Redis/File) - najrýchlejšie
-        2. DB - ak cache expirovala
-        3. Live Scraping - ak DB je stará alebo neexistuje
+        2. DB - ak cache expirovala; starý záznam sa vráti hneď a obnoví na pozadí
+        3. Live Scraping - ak záznam v DB neexistuje
 
         Args:
             ico: 8-miestne slovenské IČO
-            force_refresh: Vynútiť nový scraping
+            force_refresh: Vynútiť nový scraping (blokujúci, napr. pre admin)
 
         Returns:
             Dict s dátami firmy alebo None
         """
+        cache_key = get_cache_key(f"orsr_sk_{ico}")
+
         # 1. Cache vrstva (najrýchlejšia)
         if not force_refresh:
-            cache_key = get_cache_key(f"orsr_sk_{ico}")
             cached_data = get(cache_key)
             if cached_data:
-                print(f"✅ Cache hit pre IČO {ico}")
+                logger.debug("Cache hit pre IČO %s", ico)
                 return cached_data
 
         # 2. DB vrstva
@@ -69,65 +187,219 @@ class OrsrProvider:
                     # Kontrola, či je DB záznam aktuálny
                     days_old = (datetime.utcnow() - company.last_synced_at).days
 
-                    if days_old < self.DB_REFRESH_DAYS and not force_refresh:
-                        print(f"✅ DB hit pre IČO {ico} (staré {days_old} dní)")
+                    if not force_refresh:
                         data = (
                             company.company_data or company.data
                         )  # Fallback na legacy field
-                        # Uložiť do cache
-                        cache_set(cache_key, data, ttl=self.CACHE_TTL)
+                        if days_old < self.DB_REFRESH_DAYS:
+                            logger.debug(
+                                "DB hit pre IČO %s (staré %d dní)", ico, days_old
+                            )
+                            # Uložiť do cache
+                            cache_set(cache_key, data, ttl=self.CACHE_TTL)
+                        else:
+                            # Stale-while-revalidate - starý záznam hneď, scraping na pozadí
+                            logger.info(
+                                "DB záznam IČO %s starý (%d dní), obnovujem na pozadí",
+                                ico,
+                                days_old,
+                            )
+                            self._schedule_refresh(ico)
                         return data
-                    else:
-                        print(
-                            f"⚠️ DB záznam starý ({days_old} dní), spúšťam live scraping..."
-                        )
 
-        # 3. Live Scraping (najpomalšie, ale najaktuálnejšie)
-        print(f"🔄 Live scraping pre IČO {ico}...")
+        # 3. Live Scraping (najpomalšie, ale najaktuálnejšie) - single-flight:
+        # scrapuje len držiteľ zámku, ostatní čakajú na jeho výsledok v cache
+        lock_key = _scrape_lock_key(ico)
+        token = acquire_lock(lock_key, ttl=self.SCRAPE_LOCK_TTL)
+        if token:
+            try:
+                logger.info("Live scraping pre IČO %s", ico)
+                return self._scrape_and_store(ico)
+            finally:
+                release_lock(lock_key, token)
+
+        return self._wait_for_scrape(ico)
+
+    def _wait_for_scrape(self, ico: str) -> Optional[Dict]:
+        """Počká na výsledok scrapingu IČO, ktorý drží iný worker (blokujúce)"""
+        logger.debug("IČO %s už scrapuje iný worker, čakám na cache", ico)
+        cache_key = get_cache_key(f"orsr_sk_{ico}")
+        lock_key = _scrape_lock_key(ico)
+        deadline = time.monotonic() + self.SCRAPE_LOCK_TTL
+        while time.monotonic() < deadline:
+            time.sleep(self.SCRAPE_WAIT_STEP)
+            cached_data = get(cache_key)
+            if cached_data:
+                return cached_data
+            if not is_locked(lock_key):
+                # Držiteľ skončil bez dát (IČO nenájdené alebo chyba)
+                return get(cache_key)
+
+        # Zámok vypršal bez výsledku - scrapnúť sami
+        return self._scrape_and_store(ico)
+
+    def _scrape_and_store(self, ico: str) -> Optional[Dict]:
+        """Scrapne IČO z ORSR a uloží výsledok do cache aj DB"""
         live_data = self._scrape_orsr(ico)
 
         if live_data:
-            # Uložiť do cache
-            cache_set(cache_key, live_data, ttl=self.CACHE_TTL)
+            cache_set(get_cache_key(f"orsr_sk_{ico}"), live_data, ttl=self.CACHE_TTL)
+
+            # Uložiť do DB (upsert bez SELECT na existenciu)
+            if save_synced_companies("SK", {ico: live_data}):
+                logger.debug("Dáta uložené do DB pre IČO %s", ico)
+
+        return live_data
+
+    def _schedule_refresh(self, ico: str) -> None:
+        """Naplánuje obnovu IČO na pozadí, ak už nebeží"""
+        with _refreshing_lock:
+            if ico in _refreshing:
+                return
+            _refreshing.add(ico)
+
+        def refresh() -> None:
+            lock_key = _scrape_lock_key(ico)
+            token = None
+            try:
+                # Rovnaký single-flight zámok ako live scraping v lookup_by_ico
+                token = acquire_lock(lock_key, ttl=self.SCRAPE_LOCK_TTL)
+                if token:
+                    self._scrape_and_store(ico)
+                else:
+                    logger.debug(
+                        "IČO %s už scrapuje iný worker, obnova preskočená", ico
+                    )
+            except Exception as e:
+                logger.warning("Obnova IČO %s na pozadí zlyhala: %s", ico, e)
+            finally:
+                if token:
+                    release_lock(lock_key, token)
+                with _refreshing_lock:
+                    _refreshing.discard(ico)
+
+        _REFRESH_POOL.submit(refresh)
+
+    async def lookup_by_ico_batch(
+        self, icos: List[str], force_refresh: bool = False
+    ) -> Dict[str, Optional[Dict]]:
+        """
+        Vyhľadá viac firiem naraz s rovnakým hybridným modelom ako lookup_by_ico,
+        ale po vrstvách pre celú dávku:
+
+        1. Cache - jeden get_many (Redis MGET)
+        2. DB - jeden dotaz WHERE identifier IN (...); staré záznamy sa vrátia
+           hneď a obnovia na pozadí (_schedule_refresh)
+        3. Live Scraping - len chýbajúce IČO, súbežne (MAX_CONCURRENCY), pod
+           rovnakým zámkom ako lookup_by_ico; IČO, ktoré scrapuje iný worker,
+           sa počká na jeho výsledok
+        4. Zápis - cache cez set_many, DB v jednej transakcii (pod zámkami)
+
+        Returns:
+            Dict IČO → dáta firmy alebo None
+        """
+        icos = list(dict.fromkeys(icos))
+        results: Dict[str, Optional[Dict]] = {ico: None for ico in icos}
+        cache_keys = {ico: get_cache_key(f"orsr_sk_{ico}") for ico in icos}
+        remaining = icos
+
+        # 1. Cache vrstva
+        if not force_refresh:
+            cached = get_many(list(cache_keys.values()))
+            for ico in icos:
+                if cached.get(cache_keys[ico]):
+                    results[ico] = cached[cache_keys[ico]]
+            remaining = [ico for ico in icos if results[ico] is None]
 
-            # Uložiť do DB
+        # 2. DB vrstva
+        to_scrape = remaining
+        if remaining and not force_refresh:
+            fresh: Dict[str, Dict] = {}
+            stale: Dict[str, Dict] = {}
             with get_db_session() as db:
                 if db:
-                    company = (
+                    companies = (
                         db.query(CompanyCache)
                         .filter(
-                            CompanyCache.identifier == ico, CompanyCache.country == "SK"
+                            CompanyCache.country == "SK",
+                            CompanyCache.identifier.in_(remaining),
                         )
-                        .first()
+                        .all()
                     )
+                    now = datetime.utcnow()
+                    for company in companies:
+                        days_old = (now - company.last_synced_at).days
+                        # Fallback na legacy field
+                        data = company.company_data or company.data
+                        if days_old < self.DB_REFRESH_DAYS:
+                            fresh[company.identifier] = data
+                        else:
+                            stale[company.identifier] = data
+            if fresh:
+                logger.debug("DB hit pre %d IČO z dávky", len(fresh))
+                results.update(fresh)
+                cache_set_many(
+                    {cache_keys[ico]: data for ico, data in fresh.items()},
+                    ttl=self.CACHE_TTL,
+                )
+            if stale:
+                # Stale-while-revalidate ako v lookup_by_ico
+                logger.info("%d IČO z dávky starých, obnovujem na pozadí", len(stale))
+                results.update(stale)
+                for ico in stale:
+                    self._schedule_refresh(ico)
+            to_scrape = [
+                ico for ico in remaining if ico not in fresh and ico not in stale
+            ]
+
+        if not to_scrape:
+            return results
+
+        # 3. Live Scraping (súbežne, obmedzene) - single-flight per IČO
+        tokens: Dict[str, str] = {}
+        for ico in to_scrape:
+            token = acquire_lock(_scrape_lock_key(ico), ttl=self.SCRAPE_LOCK_TTL)
+            if token:
+                tokens[ico] = token
+        owned = [ico for ico in to_scrape if ico in tokens]
+        waiting = [ico for ico in to_scrape if ico not in tokens]
+        logger.info(
+            "Live scraping pre %d IČO z dávky (%d scrapuje iný worker)",
+            len(owned),
+            len(waiting),
+        )
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
 
-                    if company:
-                        # Aktualizovať existujúci záznam
-                        company.company_data = live_data
-                        company.data = live_data  # Legacy field
-                        company.company_name = live_data.get("name")
-                        company.risk_score = live_data.get("risk_score")
-                        company.last_synced_at = datetime.utcnow()
-                        company.updated_at = datetime.utcnow()
-                    else:
-                        # Vytvoriť nový záznam
-                        company = CompanyCache(
-                            identifier=ico,
-                            country="SK",
-                            company_data=live_data,
-                            data=live_data,  # Legacy field
-                            company_name=live_data.get("name"),
-                            risk_score=live_data.get("risk_score"),
-                            last_synced_at=datetime.utcnow(),
-                        )
-                        db.add(company)
-
-                    db.commit()
-                    print(f"✅ Dáta uložené do DB pre IČO {ico}")
+        async def scrape_one(ico: str) -> Optional[Dict]:
+            async with semaphore:
+                return await asyncio.to_thread(self._scrape_orsr, ico)
 
-            return live_data
+        try:
+            scraped, waited = await asyncio.gather(
+                asyncio.gather(*(scrape_one(ico) for ico in owned)),
+                asyncio.gather(
+                    *(asyncio.to_thread(self._wait_for_scrape, ico) for ico in waiting)
+                ),
+            )
+            results.update(zip(waiting, waited))
+            live = {ico: data for ico, data in zip(owned, scraped) if data}
+            if not live:
+                return results
+            results.update(live)
+
+            # 4. Zápis - cache jedným set_many, DB jedným upsertom a commitom;
+            # zámky sa uvoľnia až po zápise, aby čakajúci našli výsledok v cache
+            cache_set_many(
+                {cache_keys[ico]: data for ico, data in live.items()},
+                ttl=self.CACHE_TTL,
+            )
+            if save_synced_companies("SK", live):
+                logger.debug("Dáta uložené do DB pre %d IČO z dávky", len(live))
 
-        return None
+            return results
+        finally:
+            for ico, token in tokens.items():
+                release_lock(_scrape_lock_key(ico), token)
 
     def _scrape_orsr(self, ico: str) -> Optional[Dict]:
         """
@@ -143,45 +415,37 @@ class OrsrProvider:
             # 1. Vyhľadávanie podľa IČO
             search_url = f"https://www.orsr.sk/hladaj_subjekt.asp?ICO={ico}"
 
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            }
-
-            response = self.session.get(search_url, headers=headers, timeout=10)
+            response = self.session.get(search_url, timeout=10)
 
             if response.status_code != 200:
-                print(f"❌ ORSR search failed: {response.status_code}")
+                logger.warning("ORSR search failed: %s", response.status_code)
                 return None
 
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = BeautifulSoup(
+                response.content, _HTML_PARSER, from_encoding=_ORSR_ENCODING
+            )
 
             # 2. Nájsť link na detail výpisu
-            detail_link = soup.find("a", href=lambda x: x and "vypis.asp?ID=" in x)
-            if not detail_link:
-                # Alternatíva: hľadať všetky linky obsahujúce "vypis"
-                all_links = soup.find_all("a", href=True)
-                for link in all_links:
-                    href = link.get("href", "")
-                    if "vypis.asp?ID=" in href:
-                        detail_link = link
-                        break
+            detail_link = soup.find("a", href=_RE_DETAIL_ID)
             if not detail_link:
-                print(f"⚠️ IČO {ico} sa nenašlo v ORSR")
-                # Debug: uložiť HTML pre analýzu
-                print(f"   HTML preview: {response.text[:500]}")
+                logger.info("IČO %s sa nenašlo v ORSR", ico)
+                # Debug: HTML pre analýzu (text sa reže len pri zapnutom DEBUG)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("HTML preview: %s", response.text[:500])
                 return None
 
-            detail_id = detail_link["href"].split("ID=")[1].split("&")[0]
+            detail_id = _RE_DETAIL_ID.search(detail_link["href"]).group(1)
             detail_url = f"https://www.orsr.sk/vypis.asp?ID={detail_id}&SID=2&P=0"
 
             # 3. Stiahnuť detail výpisu
-            detail_response = self.session.get(detail_url, headers=headers, timeout=10)
+            detail_response = self.session.get(detail_url, timeout=10)
             if detail_response.status_code != 200:
-                print(f"❌ ORSR detail failed: {detail_response.status_code}")
+                logger.warning("ORSR detail failed: %s", detail_response.status_code)
                 return None
 
-            detail_soup = BeautifulSoup(detail_response.text, "html.parser")
+            detail_soup = BeautifulSoup(
+                detail_response.content, _HTML_PARSER, from_encoding=_ORSR_ENCODING
+            )
 
             # 4. Parsovať HTML a extrahovať dáta
             data = self._parse_orsr_html(detail_soup, ico)
@@ -189,7 +453,7 @@ class OrsrProvider:
             return data if data.get("name") else None
 
         except Exception as e:
-            print(f"❌ Chyba pri scraping ORSR: {e}")
+            logger.error("Chyba pri scraping ORSR: %s", e)
             return None
 
     def _parse_orsr_html(self, soup: BeautifulSoup, ico: str) -> Dict:
@@ -217,115 +481,85 @@ class OrsrProvider:
             "ic_dph": None,  # IČ DPH - často chýba v ORSR
         }
 
+        # Jeden prechod cez všetky <td> namiesto samostatného hľadania každého labelu
+        cells = _find_label_cells(soup)
+
+        def value_cell(label: str, text_fallback: bool = False):
+            """<td> s hodnotou vedľa labelu (podľa .string, voliteľne get_text())"""
+            label_cell = cells["string"].get(label)
+            if label_cell is None and text_fallback:
+                label_cell = cells["text"].get(label)
+            if label_cell is None:
+                return None
+            return label_cell.find_next_sibling("td")
+
         # Názov firmy
-        name_elem = soup.find("td", string=lambda x: x and "Obchodné meno:" in str(x))
-        if not name_elem:
-            # Alternatíva: hľadať <td> obsahujúci text "Obchodné meno:"
-            tds = soup.find_all("td")
-            for td in tds:
-                if "Obchodné meno:" in td.get_text():
-                    name_elem = td
-                    break
-        if name_elem:
-            name_row = name_elem.find_next_sibling("td")
-            if name_row:
-                name_text = name_row.get_text(strip=True)
-                # Odstrániť dátum v zátvorkách
-                data["name"] = re.sub(r"\s*\(od:.*?\)", "", name_text).strip()
+        name_row = value_cell("Obchodné meno:", text_fallback=True)
+        if name_row:
+            name_text = name_row.get_text(strip=True)
+            # Odstrániť dátum v zátvorkách
+            data["name"] = _RE_OD.sub("", name_text).strip()
 
         # Právna forma
-        form_elem = soup.find("td", string=lambda x: x and "Právna forma:" in str(x))
-        if not form_elem:
-            # Alternatíva: hľadať <td> obsahujúci text "Právna forma:"
-            tds = soup.find_all("td")
-            for td in tds:
-                if "Právna forma:" in td.get_text():
-                    form_elem = td
-                    break
-        if form_elem:
-            form_row = form_elem.find_next_sibling("td")
-            if form_row:
-                form_text = form_row.get_text(strip=True)
-                data["legal_form"] = re.sub(r"\s*\(od:.*?\)", "", form_text).strip()
+        form_row = value_cell("Právna forma:", text_fallback=True)
+        if form_row:
+            form_text = form_row.get_text(strip=True)
+            data["legal_form"] = _RE_OD.sub("", form_text).strip()
 
         # Adresa (Sídlo)
-        address_elem = soup.find("td", string=lambda x: x and "Sídlo:" in str(x))
-        if not address_elem:
-            # Alternatíva: hľadať <td> obsahujúci text "Sídlo:"
-            tds = soup.find_all("td")
-            for td in tds:
-                if "Sídlo:" in td.get_text():
-                    address_elem = td
-                    break
-        if address_elem:
-            address_row = address_elem.find_next_sibling("td")
-            if address_row:
-                address_text = address_row.get_text(strip=True)
-                # Odstrániť dátum v zátvorkách
-                address_text = re.sub(r"\s*\(od:.*?\)", "", address_text).strip()
-                data["address"] = address_text
-
-                # Extrahovať PSČ a mesto
-                postal_match = re.search(r"\b\d{5}\b", address_text)
-                if postal_match:
-                    data["postal_code"] = postal_match.group()
-
-                # Mesto (posledné slovo pred PSČ alebo po PSČ)
-                city_parts = address_text.split(",")
-                if len(city_parts) > 1:
-                    data["city"] = (
-                        city_parts[-1].strip().split()[0]
-                        if city_parts[-1].strip()
-                        else None
-                    )
+        address_row = value_cell("Sídlo:", text_fallback=True)
+        if address_row:
+            address_text = address_row.get_text(strip=True)
+            # Odstrániť dátum v zátvorkách
+            address_text = _RE_OD.sub("", address_text).strip()
+            data["address"] = address_text
+
+            # Extrahovať PSČ a mesto
+            postal_match = _RE_POSTAL.search(address_text)
+            if postal_match:
+                data["postal_code"] = postal_match.group()
+
+            # Mesto (posledné slovo pred PSČ alebo po PSČ)
+            city_parts = address_text.split(",")
+            if len(city_parts) > 1:
+                data["city"] = (
+                    city_parts[-1].strip().split()[0]
+                    if city_parts[-1].strip()
+                    else None
+                )
 
         # Konatelia (Štatutárny orgán)
-        exec_elem = soup.find(
-            "td", string=lambda x: x and "štatutárny orgán:" in str(x)
-        )
-        if exec_elem:
-            exec_row = exec_elem.find_next_sibling("td")
-            if exec_row:
-                exec_links = exec_row.find_all("a")
-                for link in exec_links:
-                    exec_name = link.get_text(strip=True)
-                    if exec_name:
-                        data["executives"].append(exec_name)
+        exec_row = value_cell("štatutárny orgán:")
+        if exec_row:
+            data["executives"] = _link_texts(exec_row)
 
         # Spoločníci
-        share_elem = soup.find("td", string=lambda x: x and "Spoločníci:" in str(x))
-        if share_elem:
-            share_row = share_elem.find_next_sibling("td")
-            if share_row:
-                share_links = share_row.find_all("a")
-                for link in share_links:
-                    share_name = link.get_text(strip=True)
-                    if share_name:
-                        data["shareholders"].append(share_name)
+        share_row = value_cell("Spoločníci:")
+        if share_row:
+            data["shareholders"] = _link_texts(share_row)
 
         # Deň zápisu (founded)
-        founded_elem = soup.find("td", string=lambda x: x and "Deň zápisu:" in str(x))
-        if founded_elem:
-            founded_row = founded_elem.find_next_sibling("td")
-            if founded_row:
-                founded_text = founded_row.get_text(strip=True)
-                founded_text = re.sub(r"\s*\(od:.*?\)", "", founded_text).strip()
-                try:
-                    # Parsovať dátum DD.MM.YYYY
-                    data["founded"] = datetime.strptime(
-                        founded_text, "%d.%m.%Y"
-                    ).strftime("%Y-%m-%d")
-                except (ValueError, TypeError):
-                    pass
-
-        # Status (ak je v likvidácii alebo konkurze)
-        if "likvidácia" in str(soup).lower() or "konkurz" in str(soup).lower():
+        founded_row = value_cell("Deň zápisu:")
+        if founded_row:
+            founded_text = founded_row.get_text(strip=True)
+            founded_text = _RE_OD.sub("", founded_text).strip()
+            try:
+                # Parsovať dátum DD.MM.YYYY
+                data["founded"] = datetime.strptime(founded_text, "%d.%m.%Y").strftime(
+                    "%Y-%m-%d"
+                )
+            except (ValueError, TypeError):
+                pass
+
+        # Status (ak je v likvidácii alebo konkurze) - len text stránky, bez
+        # serializácie celého DOM späť do HTML
+        page_text = soup.get_text().lower()
+        if any(word in page_text for word in _STATUS_WORDS):
             data["status"] = "Likvidácia/Konkurz"
 
         # Obohatenie o geolokáciu (Kraj, Okres z PSČ)
         if data.get("postal_code"):
-            from services.sk_region_resolver import enrich_address_with_region
-
+            # PSČ → kraj/okres je memoizované v sk_region_resolver (resolve_region)
             region_data = enrich_address_with_region(
                 data.get("address", ""), data["postal_code"]
             )
@@ -334,39 +568,56 @@ class OrsrProvider:
             if region_data.get("city"):
                 data["city"] = region_data.get("city")
 
-        # Obohatenie o DIČ/IČ DPH (ak chýba)
+        # Obohatenie o DIČ/IČ DPH (ZRSR) a finančné ukazovatele (RUZ) - nezávislé
+        # externé volania, bežia súbežne (latencia max namiesto súčtu)
+        zrsr_future = None
         if not data.get("dic") and not data.get("ic_dph"):
-            print(f"🔍 Hľadám DIČ/IČ DPH pre IČO {ico}...")
+            logger.debug("Hľadám DIČ/IČ DPH pre IČO %s", ico)
             try:
-                from services.sk_zrsr_provider import get_zrsr_provider
+                zrsr_future = _ENRICH_POOL.submit(
+                    get_zrsr_provider().lookup_dic_ic_dph, ico, data.get("name")
+                )
+            except Exception as e:
+                logger.warning("ZRSR obohatenie zlyhalo: %s", e)
 
-                zrsr_provider = get_zrsr_provider()
-                zrsr_data = zrsr_provider.lookup_dic_ic_dph(ico, data.get("name"))
+        # Finančné ukazovatele z RUZ (voliteľné)
+        ruz_future = None
+        try:
+            ruz_future = _ENRICH_POOL.submit(
+                get_ruz_provider().get_financial_indicators, ico
+            )
+        except Exception as e:
+            logger.warning("RUZ obohatenie zlyhalo: %s", e)
+
+        if zrsr_future is not None:
+            try:
+                zrsr_data = zrsr_future.result(timeout=_ENRICH_TIMEOUT)
                 if zrsr_data:
                     # Aktualizovať len ak sú dostupné
                     if zrsr_data.get("dic"):
                         data["dic"] = zrsr_data.get("dic")
                     if zrsr_data.get("ic_dph"):
                         data["ic_dph"] = zrsr_data.get("ic_dph")
-                    print(
-                        f"✅ Nájdené DIČ/IČ DPH: dic={data.get('dic')}, ic_dph={data.get('ic_dph')}"
+                    logger.debug(
+                        "Nájdené DIČ/IČ DPH: dic=%s, ic_dph=%s",
+                        data.get("dic"),
+                        data.get("ic_dph"),
                     )
             except Exception as e:
-                print(f"⚠️ ZRSR obohatenie zlyhalo: {e}")
+                logger.warning("ZRSR obohatenie zlyhalo: %s", e)
 
-        # Obohatenie o finančné ukazovatele z RUZ (voliteľné)
-        try:
-            from services.sk_ruz_provider import get_ruz_provider
-
-            ruz_provider = get_ruz_provider()
-            financial_data = ruz_provider.get_financial_indicators(ico)
-            if financial_data:
-                data["financial_data"] = financial_data
-                print(
-                    f"✅ Nájdené finančné dáta: rok={financial_data.get('year')}, revenue={financial_data.get('revenue')}"
-                )
-        except Exception as e:
-            print(f"⚠️ RUZ obohatenie zlyhalo: {e}")
+        if ruz_future is not None:
+            try:
+                financial_data = ruz_future.result(timeout=_ENRICH_TIMEOUT)
+                if financial_data:
+                    data["financial_data"] = financial_data
+                    logger.debug(
+                        "Nájdené finančné dáta: rok=%s, revenue=%s",
+                        financial_data.get("year"),
+                        financial_data.get("revenue"),
+                    )
+            except Exception as e:
+                logger.warning("RUZ obohatenie zlyhalo: %s", e)
 
         return data
 
@@ -5,6 +5,7 @@ Načítava dáta z CSV súboru alebo používa fallback mapping
 """
 
 import csv
+import functools
 import os
 from typing import Dict, Optional
 
@@ -148,31 +149,22 @@ def _load_postal_codes_from_csv() -> Dict[str, Dict[str, str]]:
 _POSTAL_CODE_REGIONS = _load_postal_codes_from_csv()
 
 
-def resolve_region(postal_code: str) -> Optional[Dict[str, str]]:
+@functools.lru_cache(maxsize=4096)
+def _lookup_region(postal_clean: str) -> Optional[Dict[str, str]]:
     """
-    Vyrieši kraj a okres z PSČ.
+    Kraj/okres pre normalizované PSČ - memoizované (PSČ je málo, adries veľa).
 
-    Args:
-        postal_code: PSČ (môže byť s medzerou alebo bez)
-
-    Returns:
-        Dict s 'kraj' a 'okres' alebo None ak sa nenašlo
+    Vracia zdieľaný dict z _POSTAL_CODE_REGIONS; kópiu robí resolve_region.
     """
-    if not postal_code:
-        return None
-
-    # Normalizovať PSČ (odstrániť medzery)
-    postal_clean = postal_code.replace(" ", "").strip()
-
     # Skúsiť presné zhodu
     if postal_clean in _POSTAL_CODE_REGIONS:
-        return _POSTAL_CODE_REGIONS[postal_clean].copy()
+        return _POSTAL_CODE_REGIONS[postal_clean]
 
     # Skúsiť prvých 5 číslic (pre PSČ typu "811 01")
     if len(postal_clean) >= 5:
         postal_5 = postal_clean[:5]
         if postal_5 in _POSTAL_CODE_REGIONS:
-            return _POSTAL_CODE_REGIONS[postal_5].copy()
+            return _POSTAL_CODE_REGIONS[postal_5]
 
     # Skúsiť prvých 3 číslice (pre okres)
     if len(postal_clean) >= 3:
@@ -180,11 +172,29 @@ def resolve_region(postal_code: str) -> Optional[Dict[str, str]]:
         # Nájsť najbližší match
         for code, region in _POSTAL_CODE_REGIONS.items():
             if code.startswith(postal_3):
-                return region.copy()
+                return region
 
     return None
 
 
+def resolve_region(postal_code: str) -> Optional[Dict[str, str]]:
+    """
+    Vyrieši kraj a okres z PSČ.
+
+    Args:
+        postal_code: PSČ (môže byť s medzerou alebo bez)
+
+    Returns:
+        Dict s 'kraj' a 'okres' alebo None ak sa nenašlo
+    """
+    if not postal_code:
+        return None
+
+    # Normalizovať PSČ (odstrániť medzery)
+    region = _lookup_region(postal_code.replace(" ", "").strip())
+    return region.copy() if region else None
+
+
 def enrich_address_with_region(
     address: str, postal_code: Optional[str] = None
 ) -> Dict[str, Optional[str]]:
@@ -124,15 +124,12 @@ def _parse_address(address_data: Dict) -> str:
     if isinstance(address_data, str):
         return address_data
 
-    parts = []
-    if address_data.get("street"):
-        parts.append(address_data["street"])
-    if address_data.get("city"):
-        parts.append(address_data["city"])
-    if address_data.get("postal_code"):
-        parts.append(address_data["postal_code"])
-
-    return ", ".join(parts) if parts else "Adresa neuvedená"
+    parts = (
+        address_data.get("street"),
+        address_data.get("city"),
+        address_data.get("postal_code"),
+    )
+    return ", ".join(filter(None, parts)) or "Adresa neuvedená"
 
 
 def calculate_sk_risk_score(company_data: Dict) -> int:
@@ -10,11 +10,14 @@ Customer ID Mapping Flow:
 """
 
 import os
-from typing import Dict, Optional
+import threading
+import time
+from typing import Dict, Optional, Tuple
 
 import stripe
 
 from services.auth import (
+    User,
     UserTier,
     get_user_by_stripe_customer_id,
     update_user_stripe_customer_id,
@@ -40,6 +43,68 @@ DEFAULT_PRICES = {
     UserTier.ENTERPRISE: 9999,  # $99.99/month
 }
 
+# Webhook eventy, ktoré spracúvame - ostatné (invoice.* a pod.) sa hneď ignorujú
+_WEBHOOK_EVENT_TYPES = frozenset(
+    {"checkout.session.completed", "customer.subscription.deleted"}
+)
+
+# In-process TTL cache email -> Stripe customer ID (šetrí Customer.list RTT)
+_CUSTOMER_ID_TTL = 300.0
+_CUSTOMER_ID_CACHE_MAX = 10_000
+_customer_id_cache: Dict[str, Tuple[float, str]] = {}
+_customer_id_lock = threading.Lock()
+
+
+def _cache_customer_id(user_email: str, customer_id: str) -> None:
+    """Uloží customer ID do in-process cache"""
+    with _customer_id_lock:
+        if len(_customer_id_cache) >= _CUSTOMER_ID_CACHE_MAX:
+            now = time.monotonic()
+            for key in [k for k, v in _customer_id_cache.items() if v[0] <= now]:
+                del _customer_id_cache[key]
+            if len(_customer_id_cache) >= _CUSTOMER_ID_CACHE_MAX:
+                _customer_id_cache.pop(next(iter(_customer_id_cache)))
+        _customer_id_cache[user_email] = (
+            time.monotonic() + _CUSTOMER_ID_TTL,
+            customer_id,
+        )
+
+
+def _resolve_customer_id(
+    user_email: str, stripe_customer_id: Optional[str] = None
+) -> Optional[str]:
+    """
+    Nájde Stripe customer ID používateľa s čo najmenej volaniami Stripe API.
+
+    Poradie: explicitne zadané ID -> in-process cache -> User.stripe_customer_id
+    v DB -> stripe.Customer.list(email=...) ako posledná možnosť.
+    """
+    if stripe_customer_id:
+        return stripe_customer_id
+
+    with _customer_id_lock:
+        cached = _customer_id_cache.get(user_email)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    customer_id = None
+    with get_db_session() as db:
+        if db:
+            from services.auth import get_user_by_email
+
+            user = get_user_by_email(db, user_email)
+            if user and user.stripe_customer_id:
+                customer_id = user.stripe_customer_id
+
+    if not customer_id:
+        customers = stripe.Customer.list(email=user_email, limit=1)
+        if not customers.data:
+            return None
+        customer_id = customers.data[0].id
+
+    _cache_customer_id(user_email, customer_id)
+    return customer_id
+
 
 def create_checkout_session(user_id: int, user_email: str, tier: UserTier) -> Dict:
     """
@@ -56,12 +121,11 @@ def create_checkout_session(user_id: int, user_email: str, tier: UserTier) -> Di
     """
     try:
         # Získať alebo vytvoriť Stripe customer
+        # Happy path: jedno čítanie používateľa podľa PK, bez volania Stripe
         customer_id = None
         with get_db_session() as db:
             if db:
-                from services.auth import get_user_by_email
-
-                user = get_user_by_email(db, user_email)
+                user = db.get(User, user_id)
 
                 if user and user.stripe_customer_id:
                     # Použiť existujúci customer ID
@@ -76,9 +140,12 @@ def create_checkout_session(user_id: int, user_email: str, tier: UserTier) -> Di
                     )
                     customer_id = customer.id
 
-                    # Uložiť customer ID do databázy
+                    # Uložiť customer ID na načítaný riadok (commit pri výstupe zo session)
                     if user:
-                        update_user_stripe_customer_id(db, user_id, customer_id)
+                        user.stripe_customer_id = customer_id
+
+        if customer_id:
+            _cache_customer_id(user_email, customer_id)
 
         # Vytvoriť checkout session s customer ID
         session_params = {
@@ -153,6 +220,10 @@ def handle_webhook(payload: bytes, signature: str) -> Dict:
     except stripe.error.SignatureVerificationError:
         return {"error": "Invalid signature", "status": "error"}
 
+    # Nezaujímavé eventy (nárazy invoice.*) bez ďalšej práce
+    if event["type"] not in _WEBHOOK_EVENT_TYPES:
+        return {"status": "ignored", "event_type": event["type"]}
+
     # Spracovať event
     if event["type"] == "checkout.session.completed":
         session = event["data"]["object"]
@@ -210,54 +281,63 @@ def handle_webhook(payload: bytes, signature: str) -> Dict:
     return {"status": "ignored", "event_type": event["type"]}
 
 
-def get_subscription_status(user_email: str) -> Optional[Dict]:
+def get_subscription_status(
+    user_email: str, stripe_customer_id: Optional[str] = None
+) -> Optional[Dict]:
     """
     Získa status subscriptionu pre používateľa.
 
     Args:
         user_email: Email používateľa
+        stripe_customer_id: Uložený Stripe customer ID (preskočí lookup podľa emailu)
 
     Returns:
         Dict so subscription status alebo None
     """
     try:
-        customers = stripe.Customer.list(email=user_email, limit=1)
-        if not customers.data:
+        customer_id = _resolve_customer_id(user_email, stripe_customer_id)
+        if not customer_id:
             return None
 
-        customer = customers.data[0]
-        subscriptions = stripe.Subscription.list(customer=customer.id, limit=1)
+        # Jedno volanie vráti aj poslednú faktúru (bez ďalšieho RTT)
+        subscriptions = stripe.Subscription.list(
+            customer=customer_id, limit=1, expand=["data.latest_invoice"]
+        )
 
         if not subscriptions.data:
             return None
 
         subscription = subscriptions.data[0]
+        latest_invoice = getattr(subscription, "latest_invoice", None)
         return {
             "status": subscription.status,
             "current_period_end": subscription.current_period_end,
             "cancel_at_period_end": subscription.cancel_at_period_end,
+            "latest_invoice_status": getattr(latest_invoice, "status", None),
         }
     except Exception as e:
         return {"error": str(e)}
 
 
-def cancel_subscription(user_email: str) -> Dict:
+def cancel_subscription(
+    user_email: str, stripe_customer_id: Optional[str] = None
+) -> Dict:
     """
     Zruší subscription používateľa.
 
     Args:
         user_email: Email používateľa
+        stripe_customer_id: Uložený Stripe customer ID (preskočí lookup podľa emailu)
 
     Returns:
         Dict s výsledkom
     """
     try:
-        customers = stripe.Customer.list(email=user_email, limit=1)
-        if not customers.data:
+        customer_id = _resolve_customer_id(user_email, stripe_customer_id)
+        if not customer_id:
             return {"error": "Customer not found", "status": "error"}
 
-        customer = customers.data[0]
-        subscriptions = stripe.Subscription.list(customer=customer.id, limit=1)
+        subscriptions = stripe.Subscription.list(customer=customer_id, limit=1)
 
         if not subscriptions.data:
             return {"error": "No active subscription", "status": "error"}
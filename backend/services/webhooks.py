@@ -4,6 +4,7 @@ Pre Enterprise tier - real-time event notifications
 """
 
 import json
+import functools
 import hashlib
 import hmac
 import os
@@ -131,6 +132,17 @@ def delete_webhook(db: Session, webhook_id: int, user_id: int) -> bool:
     return True
 
 
+@functools.lru_cache(maxsize=1024)
+def _hmac_base(secret: str):
+    """
+    HMAC kontext s už spracovaným kľúčom (inner/outer pad) pre daný secret.
+    
+    Secret webhooku sa používa pri každom evente - kontext sa len kopíruje
+    a bloky kľúča sa nehashujú znova.
+    """
+    return hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+
 def generate_webhook_signature(payload: dict | str, secret: str) -> str:
     """
     Generovať HMAC SHA256 signature pre webhook payload.
@@ -143,18 +155,14 @@ def generate_webhook_signature(payload: dict | str, secret: str) -> str:
         HMAC signature s prefixom 'sha256=' (hex)
     """
     if isinstance(payload, dict):
-        import json
         payload_str = json.dumps(payload, separators=(',', ':'))
     else:
         payload_str = payload
     
-    signature = hmac.new(
-        secret.encode('utf-8'),
-        payload_str.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
+    mac = _hmac_base(secret).copy()
+    mac.update(payload_str.encode('utf-8'))
     
-    return f"sha256={signature}"
+    return f"sha256={mac.hexdigest()}"
 
 
 async def deliver_webhook(webhook: Webhook, event_type: str, payload: Dict[str, Any]) -> bool:
@@ -195,7 +203,7 @@ async def deliver_webhook(webhook: Webhook, event_type: str, payload: Dict[str,
     # Headers
     headers = {
         "Content-Type": "application/json",
-        "X-ILUMINATI-Signature": f"sha256={signature}",
+        "X-ILUMINATI-Signature": signature,
         "X-ILUMINATI-Event": event_type,
         "User-Agent": "ILUMINATI-System-Webhooks/1.0"
     }
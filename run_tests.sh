@@ -74,6 +74,29 @@ echo "────────────────────────
 INTEGRATION_RESULT=$?
 echo ""
 
+# 4. Pytest suite (paralelne cez pytest-xdist, ak je nainštalovaný)
+echo -e "${YELLOW}4. PYTEST SUITE${NC}"
+echo "─────────────────────────────────────"
+XDIST_ARGS=""
+if "$PY" -c "import xdist" 2>/dev/null; then
+    # loadfile - testy jedného súboru (napr. HTTP testy) bežia na jednom workeri
+    XDIST_ARGS="-n auto --dist=loadfile"
+fi
+"$PY" -m pytest -q $XDIST_ARGS tests/
+PYTEST_RESULT=$?
+
+# Backend beží v Dockeri na python:3.11 - syntax musí prejsť aj tam,
+# nielen na lokálnom (novšom) interpreteri, na ktorom beží pytest
+if command -v python3.11 >/dev/null 2>&1; then
+    python3.11 - <<'PYEOF' || PYTEST_RESULT=1
+import pathlib
+for path in pathlib.Path("backend").rglob("*.py"):
+    if "venv" not in path.parts:
+        compile(path.read_bytes(), str(path), "exec")
+PYEOF
+fi
+echo ""
+
 # Finálny súhrn
 echo ""
 echo "═══════════════════════════════════════"
@@ -81,7 +104,7 @@ echo "📊 FINÁLNY SÚHRN"
 echo "═══════════════════════════════════════"
 echo ""
 
-TOTAL_TESTS=7
+TOTAL_TESTS=8
 PASSED=0
 
 if [ $BACKEND_RESULT -eq 0 ]; then
@@ -133,6 +156,13 @@ else
     echo -e "${RED}❌ Integration tests: FAILED${NC}"
 fi
 
+if [ $PYTEST_RESULT -eq 0 ]; then
+    echo -e "${GREEN}✅ Pytest suite: PASSED${NC}"
+    PASSED=$((PASSED + 1))
+else
+    echo -e "${RED}❌ Pytest suite: FAILED${NC}"
+fi
+
 echo ""
 SUCCESS_RATE=$((PASSED * 100 / TOTAL_TESTS))
 echo "📈 Celková úspešnosť: ${PASSED}/${TOTAL_TESTS} (${SUCCESS_RATE}%)"
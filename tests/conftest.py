@@ -0,0 +1,96 @@
+"""
+Spoločné pytest fixtures pre testy
+"""
+
+import importlib
+import os
+import pkgutil
+import sys
+
+import pytest
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Potlač SSL warnings (lokálny backend so self-signed certifikátom)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+BASE_URL = "http://localhost:8000"
+BASE_URL_HTTPS = "https://localhost:8000"
+BACKEND_PATH = os.path.join(os.path.dirname(__file__), "..", "backend")
+
+
+@pytest.fixture(scope="session")
+def base_url():
+    """
+    Dostupný base URL backendu (HTTPS alebo HTTP) - zisťuje sa raz za session.
+
+    Returns:
+        (url, verify_ssl); ak backend nebeží, všetky závislé testy sa preskočia
+    """
+    try:
+        requests.get(f"{BASE_URL_HTTPS}/api/health", verify=False, timeout=2)
+        return BASE_URL_HTTPS, True
+    except requests.exceptions.RequestException:
+        pass
+
+    try:
+        requests.get(f"{BASE_URL}/api/health", timeout=2)
+        return BASE_URL, False
+    except requests.exceptions.RequestException:
+        pytest.skip("Backend server nie je dostupný")
+
+
+@pytest.fixture(scope="session")
+def http_session():
+    """Zdieľaná requests.Session pre API volania testov (keep-alive, pool spojení)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=1, backoff_factor=0.1),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def warm_services():
+    """
+    Naimportuje všetky moduly services.* raz na začiatku session (na worker).
+
+    Testy potom berú moduly zo sys.modules; modul, ktorý sa nedá importovať,
+    sa tu ignoruje - chybu nahlási až test, ktorý ho používa.
+    """
+    if BACKEND_PATH not in sys.path:
+        sys.path.insert(0, BACKEND_PATH)
+
+    services_path = os.path.join(BACKEND_PATH, "services")
+    for module in pkgutil.iter_modules([services_path]):
+        try:
+            importlib.import_module(f"services.{module.name}")
+        except Exception:
+            pass
+
+
+@pytest.fixture(scope="session")
+def redis_available():
+    """
+    Či je Redis dostupný - ping sa robí raz za session (na worker).
+
+    Returns:
+        True ak Redis odpovedá na ping, inak False (testy sa preskočia)
+    """
+    if BACKEND_PATH not in sys.path:
+        sys.path.insert(0, BACKEND_PATH)
+
+    try:
+        from services.redis_cache import get_redis_client
+
+        client = get_redis_client()
+        return bool(client is not None and client.ping())
+    except Exception:
+        return False
@@ -2,513 +2,633 @@
 DIMITRI-CHECKER - Komplexný test všetkých služieb
 Testuje funkčnosť všetkých 33 služieb v backend/services/
 """
+import functools
+import hashlib
+import hmac
+import importlib
+import importlib.util
+import io
 import sys
 import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
-from datetime import datetime, timedelta
+import pytest
+
+# Všetky services.* sa naimportujú raz za session (conftest.warm_services)
+pytestmark = pytest.mark.usefixtures("warm_services")
+
+
+@functools.lru_cache(maxsize=None)
+def _service(name):
+    """Importuje services.<name> raz pre celý beh; chýbajúci modul test preskočí"""
+    module_name = f"services.{name}"
+    if importlib.util.find_spec(module_name) is None:
+        pytest.skip(f"Modul {module_name} nie je dostupný")
+    return importlib.import_module(module_name)
+
 
 class TestServiceFunctionality:
     """Test funkčnosti všetkých služieb"""
     
     def test_01_analytics_service(self):
         """Test Analytics služby"""
-        try:
-            from services.analytics import get_dashboard_summary
-            result = {"status": "skipped", "reason": "Vyžaduje DB connection"}
-            return result
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        assert hasattr(_service("analytics"), "get_dashboard_summary")
+        pytest.skip("Vyžaduje DB connection")
     
     def test_02_api_keys_service(self):
         """Test API Keys služby"""
-        try:
-            from services.api_keys import generate_api_key
-            key, key_hash = generate_api_key()
-            assert len(key) > 32, "API kľúč musí byť dlhší ako 32 znakov"
-            assert key.startswith("ilmn_"), "API kľúč musí začínať prefixom ilmn_"
-            assert len(key_hash) == 64, "SHA256 hash musí mať 64 znakov"
-            return {"status": "passed", "key_length": len(key), "hash_length": len(key_hash)}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        api_keys = _service("api_keys")
+        key, key_hash = api_keys.generate_api_key()
+        assert len(key) > 32, "API kľúč musí byť dlhší ako 32 znakov"
+        assert key.startswith("ilmn_"), "API kľúč musí začínať prefixom ilmn_"
+        assert len(key_hash) == 64, "SHA256 hash musí mať 64 znakov"
+        assert api_keys.hashlib.sha256 is hashlib.sha256, "Služba musí hashovať cez hashlib"
+    
+    @pytest.mark.parametrize("n", [1, 16, 128])
+    def test_02c_api_keys_batch(self, n):
+        """Test dávkového generovania API kľúčov"""
+        api_keys = _service("api_keys")
+        batch = api_keys.generate_api_keys_batch(n)
+        single_key, _ = api_keys.generate_api_key()
+        
+        assert len(batch) == n
+        assert len({key for key, _ in batch}) == n, "Kľúče v dávke musia byť unikátne"
+        for key, key_hash in batch:
+            assert key.startswith("ilmn_")
+            assert len(key) == len(single_key), "Formát musí sedieť s generate_api_key"
+            assert key_hash == hashlib.sha256(key.encode()).hexdigest()
+    
+    def test_02b_hashlib_openssl_sha256(self):
+        """Test, či hashlib.sha256 ide cez OpenSSL (SHA-NI), nie cez vstavaný _sha256"""
+        _hashlib = pytest.importorskip("_hashlib")
+        assert "sha256" in hashlib.algorithms_available
+        assert hashlib.sha256 is _hashlib.openssl_sha256, "sha256 nie je OpenSSL implementácia"
     
     def test_03_auth_service(self):
         """Test Auth služby"""
-        try:
-            from services.auth import get_password_hash, verify_password, UserTier
-            password = "SecurePass123!"
-            hashed = get_password_hash(password)
-            
-            assert hashed != password, "Heslo nesmie byť uložené v plain texte"
-            assert verify_password(password, hashed), "Verifikácia hesla musí fungovať"
-            assert not verify_password("wrong_password", hashed), "Nesprávne heslo nesmie prejsť"
-            
-            assert UserTier.FREE.value == "free"
-            assert UserTier.PRO.value == "pro"
-            assert UserTier.ENTERPRISE.value == "enterprise"
-            
-            return {"status": "passed", "tiers": 3}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        auth = _service("auth")
+        password = "SecurePass123!"
+        try:
+            hashed = auth.get_password_hash(password)
+        except ValueError as e:
+            # passlib 1.7.4 nefunguje s bcrypt >= 4.1 (chyba pri detekcii backendu)
+            pytest.skip(f"bcrypt backend nie je kompatibilný s passlib: {e}")
+        
+        assert hashed != password, "Heslo nesmie byť uložené v plain texte"
+        assert auth.verify_password(password, hashed), "Verifikácia hesla musí fungovať"
+        assert not auth.verify_password("wrong_password", hashed), "Nesprávne heslo nesmie prejsť"
+        
+        assert auth.UserTier.FREE.value == "free"
+        assert auth.UserTier.PRO.value == "pro"
+        assert auth.UserTier.ENTERPRISE.value == "enterprise"
     
     def test_04_cache_service(self):
         """Test Cache služby"""
-        try:
-            from services.cache import get_cache_key, get, set
-            
-            test_key = get_cache_key("test", "12345678")
-            assert len(test_key) == 32, "MD5 hash musí mať 32 znakov"
-            
-            set(test_key, {"test": "data"}, ttl=60)
-            cached = get(test_key)
-            
-            return {"status": "passed", "cache_works": cached is not None}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        cache = _service("cache")
+        
+        test_key = cache.get_cache_key("test", "12345678")
+        assert len(test_key) == 32, "128-bitový hash (xxh3-128 / blake2b) musí mať 32 hex znakov"
+        
+        cache.set(test_key, {"test": "data"}, ttl=60)
+        cached = cache.get(test_key)
+        assert cached == {"test": "data"}, "Cache musí vrátiť uloženú hodnotu"
+    
+    def test_04b_cache_l1_hit(self, monkeypatch):
+        """Test L1 (in-memory) vrstvy pred Redis - opakovaný get bez Redis round-tripu"""
+        cache = _service("cache")
+        
+        redis_store = {}
+        redis_gets = []
+        
+        def fake_redis_get(key):
+            redis_gets.append(key)
+            return redis_store.get(key)
+        
+        monkeypatch.setattr(cache, "REDIS_ENABLED", True)
+        monkeypatch.setattr(cache, "_redis_get", fake_redis_get)
+        monkeypatch.setattr(cache, "_redis_set", lambda key, value, ttl: redis_store.__setitem__(key, value))
+        
+        key = cache.get_cache_key("l1", "test")
+        cache.set(key, {"l1": "data"}, ttl=3600)
+        assert cache.get(key) == {"l1": "data"}
+        assert cache.get(key) == {"l1": "data"}
+        assert redis_gets == [], "L1 hit nesmie ísť do Redis"
+        
+        # L1 kópia s Redis žije max _redis_local_ttl, nie plný TTL
+        _, expiry_time, _ = cache._cache[key]
+        assert expiry_time - time.monotonic() <= cache._redis_local_ttl.total_seconds()
+        
+        # L1 miss (lokálna kópia vypadla) - jeden Redis get, potom opäť z L1
+        with cache._lock:
+            cache._drop(key)
+        assert cache.get(key) == {"l1": "data"}
+        assert cache.get(key) == {"l1": "data"}
+        assert redis_gets == [key]
     
     def test_05_circuit_breaker_service(self):
         """Test Circuit Breaker služby"""
-        try:
-            from services.circuit_breaker import CircuitBreaker, CircuitState
-            
-            breaker = CircuitBreaker(
-                name="test_breaker",
-                failure_threshold=3,
-                recovery_timeout=1
-            )
-            
-            assert breaker.state == CircuitState.CLOSED
-            assert breaker.failure_count == 0
-            
-            def failing_function():
-                raise Exception("Test failure")
-            
-            for i in range(3):
+        circuit_breaker = _service("circuit_breaker")
+        
+        breaker = circuit_breaker.CircuitBreaker(
+            name="test_breaker",
+            failure_threshold=3,
+            recovery_timeout=1
+        )
+        
+        assert breaker.state == circuit_breaker.CircuitState.CLOSED
+        assert breaker.failure_count == 0
+        
+        def failing_function():
+            raise Exception("Test failure")
+        
+        for i in range(3):
+            try:
+                breaker.call(failing_function)
+            except:
+                pass
+        
+        assert breaker.state == circuit_breaker.CircuitState.OPEN, "Circuit breaker musí sa otvoriť po 3 chybách"
+        
+        # Súbežné zlyhania z viacerých vlákien sa musia započítať presne
+        shared = circuit_breaker.CircuitBreaker(name="test_breaker_threads", failure_threshold=10_000)
+        
+        def fail_many():
+            for _ in range(200):
                 try:
-                    breaker.call(failing_function)
-                except:
+                    shared.call(failing_function)
+                except Exception:
                     pass
-            
-            assert breaker.state == CircuitState.OPEN, "Circuit breaker musí sa otvoriť po 3 chybách"
-            
-            return {"status": "passed", "state_transitions": True}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        
+        threads = [threading.Thread(target=fail_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert shared.failure_count == 1600
+        assert shared.state == circuit_breaker.CircuitState.CLOSED
     
     def test_06_database_service(self):
         """Test Database služby"""
-        try:
-            from services.database import SearchHistory, CompanyCache, Analytics
-            from services.auth import User
-            
-            assert hasattr(User, 'email')
-            assert hasattr(User, 'tier')
-            assert hasattr(SearchHistory, 'query')
-            assert hasattr(CompanyCache, 'ico')
-            assert hasattr(Analytics, 'event_type')
-            
-            return {"status": "passed", "models_count": 4}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        database = _service("database")
+        auth = _service("auth")
+        
+        assert hasattr(auth.User, 'email')
+        assert hasattr(auth.User, 'tier')
+        assert hasattr(database.SearchHistory, 'query')
+        assert hasattr(database.CompanyCache, 'identifier')
+        assert hasattr(database.Analytics, 'event_type')
+    
+    def test_06b_search_buffer_flush(self, monkeypatch):
+        """Chybný záznam nezhodí dávku; pri nedostupnej DB sa dávka vráti do buffera"""
+        database = _service("database")
+        from collections import deque
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+        
+        engine = create_engine(
+            "sqlite://",
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+            json_serializer=database._json_serializer,
+        )
+        database.Base.metadata.create_all(bind=engine)
+        monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+        monkeypatch.setattr(database, "_initialized", True)
+        monkeypatch.setattr(database, "_search_buffer", deque(maxlen=10000))
+        
+        for i in range(6):
+            # Záznam 3 sa nedá serializovať do JSON stĺpca
+            response_data = {"bad": object()} if i == 3 else {"nodes_count": i, 7: "int key"}
+            database._search_buffer.append((
+                {"query": f"q{i}", "country": "SK", "result_count": i, "response_data": response_data},
+                {"event_type": "search", "event_data": {"query": f"q{i}"}},
+                {"identifier": f"{i:08d}", "country": "SK", "company_name": f"Firma {i}", "data": {}},
+            ))
+        
+        assert database.flush_search_buffer() == 5
+        with database.get_db_session() as session:
+            assert session.query(database.SearchHistory).count() == 5
+            assert session.query(database.Analytics).count() == 5
+            assert session.query(database.CompanyCache).count() == 6
+        assert not database._search_buffer
+        
+        # DB nedostupná - nič sa nestratí, dávka ostane v bufferi
+        database._search_buffer.append(({"query": "later", "country": "SK"}, None, None))
+        monkeypatch.setattr(database, "SessionLocal", None)
+        assert database.flush_search_buffer() == 0
+        assert len(database._search_buffer) == 1
     
     def test_07_export_service(self):
         """Test Export služby"""
-        try:
-            from services.export_service import export_to_excel
-            
-            test_data = {
-                "nodes": [
-                    {"id": "1", "label": "Test Company", "type": "company"}
-                ],
-                "edges": []
-            }
-            
-            result = export_to_excel(test_data)
-            assert result is not None
-            
-            return {"status": "passed", "export_formats": ["excel", "csv", "json"]}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        export_service = _service("export_service")
+        
+        test_data = {
+            "nodes": [
+                {"id": "1", "label": "Test Company", "type": "company"}
+            ],
+            "edges": []
+        }
+        
+        result = export_service.export_to_excel(test_data)
+        assert result is not None
+    
+    def test_07b_export_soa(self, monkeypatch):
+        """Test Excel exportu zo stĺpcových dát (SoA) - rovnaký obsah ako z listu dictov"""
+        export_service = _service("export_service")
+        openpyxl = pytest.importorskip("openpyxl")
+        
+        # Pevný čas - dátumy v exporte musia sedieť pre oba formáty
+        fixed_now = datetime(2024, 1, 2, 3, 4, 5)
+        monkeypatch.setattr(export_service, "datetime", type("FixedDatetime", (), {"now": staticmethod(lambda: fixed_now)}))
+        
+        aos = {
+            "nodes": [
+                {"id": "c1", "label": "Firma A", "type": "company", "country": "SK", "risk_score": 3, "details": {"ico": "1"}},
+                {"id": "p1", "label": "Osoba B", "type": "person", "country": "SK", "risk_score": None, "details": "konateľ"},
+            ],
+            "edges": [{"source": "c1", "target": "p1", "type": "MANAGED_BY"}],
+        }
+        soa = {
+            "nodes": {field: [node[field] for node in aos["nodes"]] for field in aos["nodes"][0]},
+            "edges": {"source": ["c1"], "target": ["p1"], "type": ["MANAGED_BY"]},
+        }
+        
+        def sheet_values(data):
+            workbook = openpyxl.load_workbook(io.BytesIO(export_service.export_to_excel(data)))
+            return {ws.title: list(ws.iter_rows(values_only=True)) for ws in workbook.worksheets}
+        
+        values = sheet_values(soa)
+        assert values == sheet_values(aos)
+        assert values["Výsledky vyhľadávania"][1][:6] == ("company", "c1", "Firma A", "SK", 3, '{"ico": "1"}')
+        assert values["Vzťahy"][1] == ("c1", "p1", "MANAGED_BY", 1)
+        
+        # Stĺpce rôznej dĺžky sa nesmú potichu orezať
+        with pytest.raises(ValueError):
+            export_service.export_to_excel({"nodes": {"id": ["a", "b", "c"], "label": ["x"]}, "edges": []})
     
     def test_08_favorites_service(self):
         """Test Favorites služby"""
-        try:
-            from services.favorites import is_favorite
-            
-            return {"status": "skipped", "reason": "Vyžaduje DB connection"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        assert hasattr(_service("favorites"), "is_favorite")
+        
+        pytest.skip("Vyžaduje DB connection")
     
     def test_09_rate_limiter_service(self):
         """Test Rate Limiter služby"""
-        try:
-            from services.rate_limiter import is_allowed, refill_tokens
-            
-            client_id = "test_client_123"
-            
-            for i in range(5):
-                allowed = is_allowed(client_id, tier="free")
-                assert allowed, f"Request {i+1} mal byť povolený"
-            
-            return {"status": "passed", "tier_limits": {"free": 30, "pro": 120, "enterprise": 600}}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
-    
-    def test_10_redis_cache_service(self):
+        rate_limiter = _service("rate_limiter")
+        assert hasattr(rate_limiter, "refill_tokens")
+        
+        client_id = "test_client_123"
+        
+        for i in range(5):
+            allowed, _ = rate_limiter.is_allowed(client_id, tier="free")
+            assert allowed, f"Request {i+1} mal byť povolený"
+        
+        # UserTier (str enum) z DB sa dá použiť priamo - trafí rovnaké limity ako string
+        auth = _service("auth")
+        allowed, info = rate_limiter.is_allowed("test_client_pro", tier=auth.UserTier.PRO)
+        assert allowed
+        assert info["remaining"] == rate_limiter.TIER_CONFIGS["pro"]["capacity"] - 1
+    
+    def test_10_redis_cache_service(self, redis_available):
         """Test Redis Cache služby"""
-        try:
-            from services.redis_cache import get_redis_client
-            
-            client = get_redis_client()
-            
-            return {"status": "passed", "redis_available": client is not None}
-        except Exception as e:
-            return {"status": "warning", "error": "Redis nedostupný, fallback mode"}
+        if not redis_available:
+            pytest.skip("Redis nedostupný, fallback mode")
+        
+        redis_cache = _service("redis_cache")
+        assert redis_cache.get_redis_client() is not None
     
     def test_11_risk_intelligence_service(self):
         """Test Risk Intelligence služby"""
-        try:
-            from services.risk_intelligence import detect_white_horse, calculate_enhanced_risk_score
-            
-            nodes = [
-                {"id": "p1", "label": "Test Person", "type": "person"},
-                {"id": "c1", "label": "Company 1", "type": "company"},
-                {"id": "c2", "label": "Company 2", "type": "company"}
-            ]
-            edges = [
-                {"source": "p1", "target": "c1", "type": "MANAGES"},
-                {"source": "p1", "target": "c2", "type": "MANAGES"}
-            ]
-            
-            white_horses = detect_white_horse(nodes, edges)
-            
-            return {"status": "passed", "fraud_detection": True, "white_horses": len(white_horses)}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        risk_intelligence = _service("risk_intelligence")
+        assert hasattr(risk_intelligence, "calculate_enhanced_risk_score")
+        
+        nodes = [
+            {"id": "p1", "label": "Test Person", "type": "person"},
+            {"id": "c1", "label": "Company 1", "type": "company"},
+            {"id": "c2", "label": "Company 2", "type": "company"}
+        ]
+        edges = [
+            {"source": "p1", "target": "c1", "type": "MANAGES"},
+            {"source": "p1", "target": "c2", "type": "MANAGES"}
+        ]
+        
+        white_horses = risk_intelligence.detect_white_horse(nodes, edges)
+        assert isinstance(white_horses, dict)
+        
+        # Väčší graf: 500 osôb, každá konateľom v 20 firmách (10000 hrán)
+        nodes = [{"id": f"p{i}", "type": "person"} for i in range(500)]
+        nodes += [{"id": f"c{i}", "type": "company"} for i in range(2000)]
+        edges = [
+            {"source": f"c{(i * 20 + j) % 2000}", "target": f"p{i}", "type": "MANAGED_BY"}
+            for i in range(500)
+            for j in range(20)
+        ]
+        
+        white_horses = risk_intelligence.detect_white_horse(nodes, edges)
+        assert white_horses == {f"p{i}": 20 for i in range(500)}
     
     def test_12_sk_region_resolver(self):
         """Test SK Region Resolver služby"""
-        try:
-            from services.sk_region_resolver import resolve_region
-            
-            result = resolve_region("81101")
-            assert result is not None
-            assert "region" in result or "kraj" in result
-            
-            return {"status": "passed", "postal_codes": "82831 loaded"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        sk_region_resolver = _service("sk_region_resolver")
+        
+        result = sk_region_resolver.resolve_region("81101")
+        assert result is not None
+        assert "region" in result or "kraj" in result
     
     def test_13_stripe_service(self):
         """Test Stripe služby"""
-        try:
-            from services.stripe_service import create_checkout_session
-            
-            return {"status": "skipped", "reason": "Vyžaduje Stripe API key"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        assert hasattr(_service("stripe_service"), "create_checkout_session")
+        
+        pytest.skip("Vyžaduje Stripe API key")
     
     def test_14_webhooks_service(self):
         """Test Webhooks služby"""
-        try:
-            from services.webhooks import generate_webhook_signature
-            
-            payload = {"test": "data"}
-            secret = "test_secret"
-            signature = generate_webhook_signature(payload, secret)
-            
-            assert len(signature) > 0
-            assert signature.startswith("sha256=")
-            
-            return {"status": "passed", "hmac_sha256": True}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        webhooks = _service("webhooks")
+        
+        payload = {"test": "data"}
+        secret = "test_secret"
+        signature = webhooks.generate_webhook_signature(payload, secret)
+        
+        assert len(signature) > 0
+        assert signature.startswith("sha256=")
+    
+    def test_14b_webhook_bulk_signatures(self):
+        """Test podpisov viacerých payloadov s rovnakým secretom (zdieľaný HMAC kontext)"""
+        webhooks = _service("webhooks")
+        
+        secret = "test_secret"
+        for i in range(1000):
+            payload = f'{{"event":"company.updated","id":{i}}}'
+            expected = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+            assert webhooks.generate_webhook_signature(payload, secret) == f"sha256={expected}"
+        
+        other = webhooks.generate_webhook_signature("{}", "other_secret")
+        assert other != webhooks.generate_webhook_signature("{}", secret)
     
     def test_15_sk_orsr_provider(self):
         """Test SK ORSR Provider"""
-        try:
-            from services.sk_orsr_provider import OrsrProvider
-            
-            provider = OrsrProvider()
-            assert provider is not None
-            
-            return {"status": "passed", "provider": "ORSR"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        sk_orsr_provider = _service("sk_orsr_provider")
+        
+        provider = sk_orsr_provider.OrsrProvider()
+        assert provider is not None
     
     def test_16_sk_rpo_provider(self):
         """Test SK RPO Provider"""
-        try:
-            from services.sk_rpo import fetch_rpo_sk
-            
-            return {"status": "skipped", "reason": "Vyžaduje live API"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        assert hasattr(_service("sk_rpo"), "fetch_rpo_sk")
+        
+        pytest.skip("Vyžaduje live API")
     
     def test_17_sk_ruz_provider(self):
         """Test SK RUZ Provider"""
-        try:
-            from services.sk_ruz_provider import RuzProvider
-            
-            provider = RuzProvider()
-            assert provider is not None
-            
-            return {"status": "passed", "provider": "RUZ"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        sk_ruz_provider = _service("sk_ruz_provider")
+        
+        provider = sk_ruz_provider.RuzProvider()
+        assert provider is not None
     
     def test_18_sk_zrsr_provider(self):
         """Test SK ZRSR Provider"""
-        try:
-            from services.sk_zrsr_provider import ZrsrProvider
-            
-            provider = ZrsrProvider(stub_mode=True)
-            assert provider is not None
-            
-            return {"status": "passed", "provider": "ZRSR", "stub_mode": True}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        sk_zrsr_provider = _service("sk_zrsr_provider")
+        
+        provider = sk_zrsr_provider.ZrsrProvider()
+        assert provider is not None
     
     def test_19_pl_krs_provider(self):
         """Test PL KRS Provider"""
-        try:
-            from services.pl_krs import is_polish_krs
-            
-            assert is_polish_krs("0000123456")
-            assert not is_polish_krs("12345")
-            
-            return {"status": "passed", "provider": "KRS"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        pl_krs = _service("pl_krs")
+        
+        assert pl_krs.is_polish_krs("0000123456")
+        assert not pl_krs.is_polish_krs("12345")
+        assert not pl_krs.is_polish_krs("٠٠٠٠١٢٣٤٥٦"), "Len ASCII číslice (nie arabské)"
     
     def test_20_pl_ceidg_provider(self):
         """Test PL CEIDG Provider"""
-        try:
-            from services.pl_ceidg import is_ceidg_number
-            
-            assert is_ceidg_number("1234567890")
-            
-            return {"status": "passed", "provider": "CEIDG"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        pl_ceidg = _service("pl_ceidg")
+        
+        assert pl_ceidg.is_ceidg_number("1234567890")
+        assert not pl_ceidg.is_ceidg_number("123456789²")
     
     def test_21_pl_biala_lista_provider(self):
         """Test PL Biała Lista Provider"""
-        try:
-            from services.pl_biala_lista import is_polish_nip
-            
-            assert is_polish_nip("1234567890")
-            assert not is_polish_nip("12345")
-            
-            return {"status": "passed", "provider": "Biała Lista"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        pl_biala_lista = _service("pl_biala_lista")
+        
+        assert pl_biala_lista.is_polish_nip("1234567890")
+        assert not pl_biala_lista.is_polish_nip("12345")
+        assert not pl_biala_lista.is_polish_nip("１２３４５６７８９０"), "Len ASCII číslice (nie fullwidth)"
     
     def test_22_hu_nav_provider(self):
         """Test HU NAV Provider"""
-        try:
-            from services.hu_nav import is_hungarian_tax_number
-            
-            assert is_hungarian_tax_number("12345678")
-            assert not is_hungarian_tax_number("123")
-            
-            return {"status": "passed", "provider": "NAV"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        hu_nav = _service("hu_nav")
+        
+        assert hu_nav.is_hungarian_tax_number("12345678")
+        assert not hu_nav.is_hungarian_tax_number("123")
+        assert hu_nav.is_hungarian_tax_number(" 12345678901 ")
+        assert not hu_nav.is_hungarian_tax_number("1234567²")
     
     def test_23_debt_registers(self):
         """Test Debt Registers služby"""
-        try:
-            from services.debt_registers import has_debt
-            
-            return {"status": "skipped", "reason": "Vyžaduje live API"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        assert hasattr(_service("debt_registers"), "has_debt")
+        
+        pytest.skip("Vyžaduje live API")
+    
+    def test_23b_debt_registers_cache_key(self, monkeypatch):
+        """IČO s oddeľovačmi trafí cache uloženú pod čistým IČO"""
+        debt_registers = _service("debt_registers")
+        monkeypatch.setattr(debt_registers, "_debt_cache", {})
+        
+        first = debt_registers.search_debt_registers("123 456 78", "SK")
+        assert list(debt_registers._debt_cache) == ["debt_SK_12345678"]
+        
+        # Druhé volanie nesmie ísť do _search_debt
+        monkeypatch.setattr(debt_registers, "_search_debt", lambda *args: pytest.fail("cache miss"))
+        assert debt_registers.search_debt_registers("123 456 78", "SK") is first
+        assert debt_registers.search_debt_registers("12345678", "SK") is first
     
     def test_24_erp_base_connector(self):
         """Test ERP Base Connector"""
-        try:
-            from services.erp.base_connector import BaseErpConnector
-            
-            assert hasattr(BaseErpConnector, 'test_connection')
-            assert hasattr(BaseErpConnector, 'get_company_info')
-            
-            return {"status": "passed", "connector_type": "abstract"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        base_connector = _service("erp.base_connector")
+        
+        assert hasattr(base_connector.BaseErpConnector, 'test_connection')
+        assert hasattr(base_connector.BaseErpConnector, 'get_company_info')
     
     def test_25_erp_service(self):
         """Test ERP Service"""
-        try:
-            from services.erp.erp_service import get_connector
-            
-            return {"status": "skipped", "reason": "Vyžaduje DB connection"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        assert hasattr(_service("erp.erp_service"), "get_connector")
+        
+        pytest.skip("Vyžaduje DB connection")
     
     def test_26_pohoda_connector(self):
         """Test Pohoda Connector"""
-        try:
-            from services.erp.pohoda_connector import PohodaConnector
-            
-            assert PohodaConnector is not None
-            
-            return {"status": "passed", "erp": "Pohoda"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        pohoda_connector = _service("erp.pohoda_connector")
+        
+        assert pohoda_connector.PohodaConnector is not None
     
     def test_27_sap_connector(self):
         """Test SAP Connector"""
-        try:
-            from services.erp.sap_connector import SapConnector
-            
-            assert SapConnector is not None
-            
-            return {"status": "passed", "erp": "SAP"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        sap_connector = _service("erp.sap_connector")
+        
+        assert sap_connector.SapConnector is not None
     
     def test_28_money_s3_connector(self):
         """Test Money S3 Connector"""
-        try:
-            from services.erp.money_s3_connector import MoneyS3Connector
-            
-            assert MoneyS3Connector is not None
-            
-            return {"status": "passed", "erp": "Money S3"}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        money_s3_connector = _service("erp.money_s3_connector")
+        
+        assert money_s3_connector.MoneyS3Connector is not None
     
     def test_29_proxy_rotation(self):
         """Test Proxy Rotation služby"""
-        try:
-            from services.proxy_rotation import ProxyPool
-            
-            pool = ProxyPool()
-            assert pool is not None
-            
-            return {"status": "passed", "pool_initialized": True}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        proxy_rotation = _service("proxy_rotation")
+        
+        pool = proxy_rotation.ProxyPool()
+        assert pool is not None
     
     def test_30_metrics_service(self):
         """Test Metrics služby"""
-        try:
-            from services.metrics import MetricsCollector
-            
-            collector = MetricsCollector()
-            collector.increment("test_counter")
-            collector.gauge("test_gauge", 42)
-            
-            metrics = collector.get_metrics()
-            assert "test_counter" in metrics["counters"]
-            assert metrics["counters"]["test_counter"] == 1
-            
-            return {"status": "passed", "metrics_types": ["counter", "gauge", "histogram"]}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        metrics_service = _service("metrics")
+        
+        collector = metrics_service.MetricsCollector()
+        collector.increment("test_counter")
+        collector.gauge("test_gauge", 42)
+        
+        metrics = collector.get_metrics()
+        assert "test_counter" in metrics["counters"]
+        assert metrics["counters"]["test_counter"] == 1
     
     def test_31_performance_service(self):
         """Test Performance služby"""
-        try:
-            from services.performance import timing_decorator, cache_result
-            
-            @timing_decorator
-            def test_function():
-                return "test"
-            
-            result = test_function()
-            assert result == "test"
-            
-            return {"status": "passed", "decorators": True}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        performance = _service("performance")
+        assert hasattr(performance, "cache_result")
+        
+        @performance.timing_decorator
+        def test_function():
+            return "test"
+        
+        result = test_function()
+        assert result == "test"
     
     def test_32_error_handler(self):
         """Test Error Handler služby"""
-        try:
-            from services.error_handler import IluminatiException, APIError
-            
-            try:
-                raise APIError("Test error")
-            except APIError as e:
-                assert str(e) == "Test error"
-            
-            return {"status": "passed", "exceptions": ["IluminatiException", "APIError", "DatabaseError"]}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
-    
-    def test_33_search_by_name(self):
+        error_handler = _service("error_handler")
+        assert issubclass(error_handler.APIError, error_handler.IluminatiException)
+        
+        try:
+            raise error_handler.APIError("Test error")
+        except error_handler.APIError as e:
+            assert str(e) == "Test error"
+    
+    @pytest.mark.parametrize("query, expected", [
+        ("Ľudia & Firmy s.r.o.", "ludia & firmy s.r.o."),
+        ("Agrofert", "agrofert"),
+        ("  ČEZ,   a.s.  ", "cez, a.s."),
+        ("Žltá ťava ôsmy ďateľ", "zlta tava osmy datel"),
+        ("Příliš žluťoučký kůň", "prilis zlutoucky kun"),
+        ("Zakłady Łódź Świętokrzyskie", "zakłady łodz swietokrzyskie"),
+        ("Őrség Ügyvédi Iroda", "orseg ugyvedi iroda"),
+        ("Straße Müller GmbH", "straße muller gmbh"),
+        ("Cafe\u0301 Mu\u0308ller", "cafe muller"),
+        ("Ελληνική Εταιρεία", "ελληνικη εταιρεια"),
+    ])
+    def test_33_search_by_name(self, query, expected):
         """Test Search By Name služby"""
-        try:
-            from services.search_by_name import normalize_query
-            
-            normalized = normalize_query("Ľudia & Firmy s.r.o.")
-            assert "ludia" in normalized.lower()
-            
-            return {"status": "passed", "normalization": True}
-        except Exception as e:
-            return {"status": "error", "error": str(e)}
+        search_by_name = _service("search_by_name")
+        
+        assert search_by_name.normalize_query(query) == expected
+
+
+# Poradie testov v reporte - počíta sa raz pri importe
+TEST_METHODS = sorted(name for name in vars(TestServiceFunctionality) if name.startswith("test_"))
+_TEST_ORDER = {name: index for index, name in enumerate(TEST_METHODS)}
+
+
+def _report_order(item):
+    """Kľúč pre zoradenie výsledkov (parametrizované testy zostanú pri svojej metóde)"""
+    test_id = item[0]
+    return _TEST_ORDER.get(test_id.split("[", 1)[0], len(_TEST_ORDER)), test_id
+
+
+@dataclass(slots=True)
+class _TestResult:
+    """Výsledok jedného testu pre report"""
+    status: str
+    reason: str = "Unknown"
+    error: str = "Unknown"
+
+
+class _ReportCollector:
+    """pytest plugin - zbiera výsledky testov pre report"""
+
+    def __init__(self):
+        self.results = {}
+
+    def pytest_runtest_logreport(self, report):
+        name = report.nodeid.rsplit("::", 1)[-1]
+        if report.when == "call" or (report.when == "setup" and report.outcome != "passed"):
+            entry = _TestResult(status=report.outcome)
+            if report.skipped and isinstance(report.longrepr, tuple):
+                entry.reason = report.longrepr[2].replace("Skipped: ", "")
+            elif report.failed:
+                crash = getattr(report.longrepr, "reprcrash", None)
+                entry.error = crash.message if crash else str(report.longrepr)
+            self.results[name] = entry
+
+
+def _percent(part, total):
+    """Percento s jedným desatinným miestom (celočíselne, zaokrúhlené ako :.1f)"""
+    if not total:
+        return "0.0"
+    permille = (part * 2000 + total) // (2 * total)
+    return f"{permille // 10}.{permille % 10}"
 
 
 def run_all_tests():
-    """Spustí všetky testy a vygeneruje report"""
-    test_class = TestServiceFunctionality()
-    
-    results = {}
-    total_tests = 0
-    passed = 0
-    failed = 0
-    skipped = 0
-    errors = 0
-    
-    print("\n" + "="*80)
-    print("DIMITRI-CHECKER - Test všetkých služieb")
-    print("="*80 + "\n")
-    
-    for method_name in dir(test_class):
-        if method_name.startswith('test_'):
-            total_tests += 1
-            test_name = method_name.replace('test_', '').replace('_', ' ').title()
-            
-            try:
-                method = getattr(test_class, method_name)
-                result = method()
-                results[test_name] = result
-                
-                status = result.get("status", "unknown")
-                if status == "passed":
-                    passed += 1
-                    print(f"✅ {test_name}: PASSED")
-                elif status == "skipped":
-                    skipped += 1
-                    reason = result.get("reason", "Unknown")
-                    print(f"⏭️  {test_name}: SKIPPED ({reason})")
-                elif status == "error":
-                    errors += 1
-                    error = result.get("error", "Unknown")
-                    print(f"❌ {test_name}: ERROR - {error}")
-                elif status == "warning":
-                    skipped += 1
-                    print(f"⚠️  {test_name}: WARNING")
-            except Exception as e:
-                errors += 1
-                results[test_name] = {"status": "error", "error": str(e)}
-                print(f"💥 {test_name}: CRASH - {str(e)}")
-    
-    print("\n" + "="*80)
-    print("VÝSLEDKY TESTOVANIA")
-    print("="*80)
-    print(f"Celkovo testov: {total_tests}")
-    print(f"✅ Úspešných: {passed} ({passed/total_tests*100:.1f}%)")
-    print(f"❌ Chybných: {errors} ({errors/total_tests*100:.1f}%)")
-    print(f"⏭️  Preskočených: {skipped} ({skipped/total_tests*100:.1f}%)")
-    print("="*80 + "\n")
-    
-    functionality_score = (passed / (total_tests - skipped)) * 100 if (total_tests - skipped) > 0 else 0
-    print(f"📊 FUNKČNOSŤ: {functionality_score:.1f}% (bez preskočených testov)")
-    print("\n")
-    
+    """Spustí všetky testy cez pytest (aj paralelne cez pytest-xdist) a vygeneruje report"""
+    collector = _ReportCollector()
+    pytest.main([__file__, "-q", "-p", "no:cacheprovider"], plugins=[collector])
+    results = collector.results
+
+    # Report sa skladá do bufferu a vypíše jedným zápisom
+    buf = io.StringIO()
+    buf.write("\n" + "="*80 + "\n")
+    buf.write("DIMITRI-CHECKER - Test všetkých služieb\n")
+    buf.write("="*80 + "\n\n")
+
+    for method_name, result in sorted(results.items(), key=_report_order):
+        test_name = method_name.replace('test_', '').replace('_', ' ').title()
+        status = result.status
+        if status == "passed":
+            buf.write(f"✅ {test_name}: PASSED\n")
+        elif status == "skipped":
+            buf.write(f"⏭️  {test_name}: SKIPPED ({result.reason})\n")
+        else:
+            buf.write(f"❌ {test_name}: ERROR - {result.error}\n")
+
+    total_tests = len(results)
+    passed = sum(1 for r in results.values() if r.status == "passed")
+    skipped = sum(1 for r in results.values() if r.status == "skipped")
+    errors = total_tests - passed - skipped
+
+    buf.write("\n" + "="*80 + "\n")
+    buf.write("VÝSLEDKY TESTOVANIA\n")
+    buf.write("="*80 + "\n")
+    buf.write(f"Celkovo testov: {total_tests}\n")
+    if total_tests:
+        buf.write(f"✅ Úspešných: {passed} ({_percent(passed, total_tests)}%)\n")
+        buf.write(f"❌ Chybných: {errors} ({_percent(errors, total_tests)}%)\n")
+        buf.write(f"⏭️  Preskočených: {skipped} ({_percent(skipped, total_tests)}%)\n")
+    buf.write("="*80 + "\n\n")
+
+    functionality_score = _percent(passed, total_tests - skipped)
+    buf.write(f"📊 FUNKČNOSŤ: {functionality_score}% (bez preskočených testov)\n")
+    buf.write("\n\n")
+
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
+
     return results
 
 
@@ -2,52 +2,74 @@
 Špeciálne testy pre detekciu krajiny (CZ vs SK pre 8-miestne čísla)
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 import requests
-import urllib3
 
-# Potlač SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# IČO testované cez /api/search - stiahnu sa naraz, nie sériovo po testoch
+CZECH_ICO = "47114983"  # ČEZ, a.s.
+SLOVAK_ICO = "31333501"  # Agrofert Holding a.s.
+CZECH_PRIORITY_ICO = "27074358"  # Agrofert, a.s. (CZ)
+NAME_TEST_ICO = "52374220"  # Tavira, s.r.o. (SK)
+SEARCH_ICOS = (CZECH_ICO, SLOVAK_ICO, CZECH_PRIORITY_ICO, NAME_TEST_ICO)
 
-BASE_URL = "http://localhost:8000"
-BASE_URL_HTTPS = "https://localhost:8000"
 
+@pytest.fixture(scope="module")
+def search_responses(base_url, http_session):
+    """
+    Odpovede /api/search pre všetky testované IČO, stiahnuté paralelne.
 
-def get_base_url():
-    """Vráti dostupný base URL (HTTPS alebo HTTP)"""
-    try:
-        requests.get(f"{BASE_URL_HTTPS}/api/health", verify=False, timeout=2)
-        return BASE_URL_HTTPS
-    except:
+    Returns:
+        Dict ico -> Response alebo výnimka (re-raise až v teste, kvôli skip logike)
+    """
+    base_url, verify_ssl = base_url
+
+    def fetch(ico):
         try:
-            requests.get(f"{BASE_URL}/api/health", timeout=2)
-            return BASE_URL
-        except:
-            pytest.skip("Backend server nie je dostupný")
+            return http_session.get(
+                f"{base_url}/api/search?q={ico}",
+                verify=verify_ssl,
+                timeout=10
+            )
+        except requests.exceptions.RequestException as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=len(SEARCH_ICOS)) as executor:
+        return dict(zip(SEARCH_ICOS, executor.map(fetch, SEARCH_ICOS)))
+
+
+def _search(search_responses, ico):
+    """Vráti predstiahnutú odpoveď pre IČO (výnimku zo sťahovania vyhodí)"""
+    response = search_responses[ico]
+    if isinstance(response, Exception):
+        raise response
+    return response
+
+
+def _nodes_by_type(data):
+    """Uzly z odpovede /api/search zoskupené podľa typu (jeden prechod)"""
+    nodes_by_type = {}
+    for node in data.get("nodes", []):
+        nodes_by_type.setdefault(node.get("type"), []).append(node)
+    return nodes_by_type
 
 
-def test_czech_ico_detected_as_cz():
+def test_czech_ico_detected_as_cz(search_responses):
     """Test, či české IČO sa správne detekuje ako CZ (nie SK)"""
-    base_url = get_base_url()
-    verify_ssl = base_url.startswith("https")
-    
     # České IČO (8-miestne)
-    czech_ico = "47114983"  # ČEZ, a.s.
+    czech_ico = CZECH_ICO
     
     try:
-        response = requests.get(
-            f"{base_url}/api/search?q={czech_ico}",
-            verify=verify_ssl,
-            timeout=10
-        )
+        response = _search(search_responses, czech_ico)
         assert response.status_code == 200
         
         data = response.json()
-        nodes = data.get("nodes", [])
+        nodes_by_type = _nodes_by_type(data)
         
-        if nodes:
+        if nodes_by_type:
             # Nájsť hlavnú firmu
-            company_node = next((n for n in nodes if n.get("type") == "company"), None)
+            company_node = nodes_by_type.get("company", [None])[0]
             if company_node:
                 country = company_node.get("country")
                 # České IČO by malo byť detekované ako CZ, nie SK
@@ -59,28 +81,21 @@ def test_czech_ico_detected_as_cz():
         pytest.skip("Backend server nie je dostupný")
 
 
-def test_slovak_ico_detected_as_sk():
+def test_slovak_ico_detected_as_sk(search_responses):
     """Test, či slovenské IČO sa správne detekuje ako SK"""
-    base_url = get_base_url()
-    verify_ssl = base_url.startswith("https")
-    
     # Slovenské IČO (8-miestne)
-    slovak_ico = "31333501"  # Agrofert Holding a.s.
+    slovak_ico = SLOVAK_ICO
     
     try:
-        response = requests.get(
-            f"{base_url}/api/search?q={slovak_ico}",
-            verify=verify_ssl,
-            timeout=10
-        )
+        response = _search(search_responses, slovak_ico)
         assert response.status_code == 200
         
         data = response.json()
-        nodes = data.get("nodes", [])
+        nodes_by_type = _nodes_by_type(data)
         
-        if nodes:
+        if nodes_by_type:
             # Nájsť hlavnú firmu
-            company_node = next((n for n in nodes if n.get("type") == "company"), None)
+            company_node = nodes_by_type.get("company", [None])[0]
             if company_node:
                 country = company_node.get("country")
                 # Slovenské IČO by malo byť detekované ako SK
@@ -92,27 +107,20 @@ def test_slovak_ico_detected_as_sk():
         pytest.skip("Backend server nie je dostupný")
 
 
-def test_country_detection_priority():
+def test_country_detection_priority(search_responses):
     """Test priority detekcie: CZ má prioritu pred SK pre 8-miestne čísla"""
-    base_url = get_base_url()
-    verify_ssl = base_url.startswith("https")
-    
     # České IČO, ktoré by sa mohlo zameniť so SK
-    czech_ico = "27074358"  # Agrofert, a.s. (CZ)
+    czech_ico = CZECH_PRIORITY_ICO
     
     try:
-        response = requests.get(
-            f"{base_url}/api/search?q={czech_ico}",
-            verify=verify_ssl,
-            timeout=10
-        )
+        response = _search(search_responses, czech_ico)
         assert response.status_code == 200
         
         data = response.json()
-        nodes = data.get("nodes", [])
+        nodes_by_type = _nodes_by_type(data)
         
-        if nodes:
-            company_node = next((n for n in nodes if n.get("type") == "company"), None)
+        if nodes_by_type:
+            company_node = nodes_by_type.get("company", [None])[0]
             if company_node:
                 country = company_node.get("country")
                 # ARES by mal vrátiť dáta pre CZ, takže by to malo byť CZ
@@ -125,27 +133,20 @@ def test_country_detection_priority():
         pytest.skip("Backend server nie je dostupný")
 
 
-def test_company_name_not_fallback():
+def test_company_name_not_fallback(search_responses):
     """Test, či názov firmy nie je 'Firma {ICO}' (fallback)"""
-    base_url = get_base_url()
-    verify_ssl = base_url.startswith("https")
-    
     # Reálne IČO, ktoré by malo mať skutočný názov
-    test_ico = "52374220"  # Tavira, s.r.o. (SK)
+    test_ico = NAME_TEST_ICO
     
     try:
-        response = requests.get(
-            f"{base_url}/api/search?q={test_ico}",
-            verify=verify_ssl,
-            timeout=10
-        )
+        response = _search(search_responses, test_ico)
         assert response.status_code == 200
         
         data = response.json()
-        nodes = data.get("nodes", [])
+        nodes_by_type = _nodes_by_type(data)
         
-        if nodes:
-            company_node = next((n for n in nodes if n.get("type") == "company"), None)
+        if nodes_by_type:
+            company_node = nodes_by_type.get("company", [None])[0]
             if company_node:
                 label = company_node.get("label", "")
                 # Názov by nemal byť "Firma {ICO}" (to je fallback)
@@ -158,3 +159,22 @@ def test_company_name_not_fallback():
     except requests.exceptions.ConnectionError:
         pytest.skip("Backend server nie je dostupný")
 
+
+
+def test_detect_country_routing():
+    """Test offline routingu podľa tvaru identifikátora (bez servera)"""
+    import os
+    import sys
+
+    backend_path = os.path.join(os.path.dirname(__file__), "..", "backend")
+    if backend_path not in sys.path:
+        sys.path.insert(0, backend_path)
+    from services.search_builders import detect_country
+
+    assert detect_country("52345678") == "SK"
+    assert detect_country("123456789") == "PL"
+    assert detect_country("1234567890") == "PL"
+    assert detect_country("0000123456") == "PL"
+    assert detect_country("12345678901") == "HU"
+    assert detect_country("Agrofert") == "CZ"
+    assert detect_country("1234") == "CZ"
@@ -2,12 +2,29 @@
 Testy pre ERP integrácie
 """
 
+import os
+import sys
 from typing import Dict
 
 import pytest
 import requests
 import urllib3
 
+# Pridať backend do path (raz pre celý modul)
+backend_path = os.path.join(os.path.dirname(__file__), "..", "backend")
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+# ERP balík sa importuje raz; bez neho (napr. chýba sqlalchemy) sa modul preskočí
+pytest.importorskip("services.erp.erp_service")
+
+from services.erp.base_connector import BaseErpConnector
+from services.erp.erp_service import get_connector
+from services.erp.models import ErpConnectionStatus, ErpType
+from services.erp.money_s3_connector import MoneyS3Connector
+from services.erp.pohoda_connector import PohodaConnector
+from services.erp.sap_connector import SapConnector
+
 # Potlač SSL warnings pre self-signed certifikáty
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -57,8 +74,6 @@ def test_erp_connection_create_model():
 
 def test_erp_connector_base():
     """Test base ERP connector"""
-    from backend.services.erp.base_connector import BaseErpConnector
-
     # Base class by nemal byť možné inštanciovať priamo
     with pytest.raises(TypeError):
         BaseErpConnector({})
@@ -66,8 +81,6 @@ def test_erp_connector_base():
 
 def test_pohoda_connector_initialization():
     """Test Pohoda connector inicializácia"""
-    from backend.services.erp.pohoda_connector import PohodaConnector
-
     connector = PohodaConnector({"api_key": "test_key", "company_id": "test_company"})
 
     assert connector.api_key == "test_key"
@@ -77,8 +90,6 @@ def test_pohoda_connector_initialization():
 
 def test_money_s3_connector_initialization():
     """Test Money S3 connector inicializácia"""
-    from backend.services.erp.money_s3_connector import MoneyS3Connector
-
     connector = MoneyS3Connector({"api_key": "test_key", "company_id": "test_company"})
 
     assert connector.api_key == "test_key"
@@ -88,8 +99,6 @@ def test_money_s3_connector_initialization():
 
 def test_sap_connector_initialization():
     """Test SAP connector inicializácia"""
-    from backend.services.erp.sap_connector import SapConnector
-
     connector = SapConnector(
         {
             "server_url": "https://sap.example.com",
@@ -106,14 +115,6 @@ def test_sap_connector_initialization():
 
 def test_erp_service_get_connector():
     """Test získanie správneho connectora"""
-    import os
-    import sys
-
-    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
-
-    from services.erp.erp_service import get_connector
-    from services.erp.models import ErpType
-
     # Test Pohoda
     pohoda_conn = get_connector(ErpType.POHODA, {"api_key": "test"})
     assert pohoda_conn.__class__.__name__ == "PohodaConnector"
@@ -132,18 +133,6 @@ def test_erp_service_get_connector():
 
 def test_erp_models():
     """Test ERP database models"""
-    import os
-    import sys
-
-    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
-
-    from services.erp.models import (
-        ErpConnection,
-        ErpConnectionStatus,
-        ErpSyncLog,
-        ErpType,
-    )
-
     # Test enum values
     assert ErpType.SAP.value == "sap"
     assert ErpType.POHODA.value == "pohoda"
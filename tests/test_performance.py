@@ -5,11 +5,20 @@ Testy pre performance optimalizácie
 import sys
 import os
 import time
+import types
+import inspect
 import asyncio
+from contextlib import contextmanager
+from unittest import mock
 
-# Pridať backend do path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+import pytest
 
+# Pridať backend do path (raz - import modulu sa opakuje v každom xdist workeri)
+backend_path = os.path.join(os.path.dirname(__file__), '..', 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from services import performance  # type: ignore
 from services.performance import (  # type: ignore
     timing_decorator,
     cache_result,
@@ -19,6 +28,27 @@ from services.performance import (  # type: ignore
 )
 
 
+@pytest.fixture(scope="module")
+def runner():
+    """Jeden event loop pre všetky async testy v module (namiesto asyncio.run v každom teste)"""
+    with asyncio.Runner() as r:
+        yield r
+
+
+@contextmanager
+def virtual_clock(start=1000.0):
+    """
+    Virtuálny čas pre services.performance - TTL sa posúva bez time.sleep.
+
+    Yields:
+        [aktuálny čas] - posun cez clock[0] += sekundy
+    """
+    clock = [start]
+    # performance používa len time.time(); ostatné moduly ostávajú na reálnom čase
+    with mock.patch.object(performance, "time", types.SimpleNamespace(time=lambda: clock[0])):
+        yield clock
+
+
 def test_timing_decorator():
     """Test timing decorator"""
     @timing_decorator
@@ -30,7 +60,7 @@ def test_timing_decorator():
     assert result == 10, "Timing decorator should not modify function result"
 
 
-def test_timing_decorator_async():
+def test_timing_decorator_async(runner):
     """Test timing decorator on async functions (should preserve results/exceptions)."""
     @timing_decorator
     async def async_func(x):
@@ -50,7 +80,7 @@ def test_timing_decorator_async():
         except ValueError as e:
             assert str(e) == "boom"
 
-    asyncio.run(run_test())
+    runner.run(run_test())
 
 
 def test_cache_result():
@@ -87,41 +117,47 @@ def test_cache_result_ttl_expiration_and_clear_cache():
         call_count[0] += 1
         return x * 3
 
-    assert f(2) == 6
-    assert f(2) == 6
-    assert call_count[0] == 1, "Should be cached within TTL"
+    with virtual_clock() as clock:
+        assert f(2) == 6
+        assert f(2) == 6
+        assert call_count[0] == 1, "Should be cached within TTL"
 
-    time.sleep(0.06)
-    assert f(2) == 6
-    assert call_count[0] == 2, "Should recompute after TTL expiration"
+        clock[0] += 0.06
+        assert f(2) == 6
+        assert call_count[0] == 2, "Should recompute after TTL expiration"
 
-    # clear_cache should force recompute even within TTL
-    f.clear_cache()
-    assert f(2) == 6
-    assert call_count[0] == 3
+        # clear_cache should force recompute even within TTL
+        f.clear_cache()
+        assert f(2) == 6
+        assert call_count[0] == 3
 
 
 def test_cache_cleanup():
     """Test cache cleanup"""
+    call_count = [0]
+    
     @cache_result(ttl=1)
     def test_func(x):
+        call_count[0] += 1
         return x * 2
     
-    result1 = test_func(5)
-    assert result1 == 10
-    
-    # Počkaj, kým cache expiruje
-    time.sleep(1.1)
-    
-    # Cleanup
-    test_func.cleanup()
-    
-    # Nové volanie by malo vypočítať znova
-    result2 = test_func(5)
-    assert result2 == 10
+    with virtual_clock() as clock:
+        result1 = test_func(5)
+        assert result1 == 10
+        
+        # Posunúť čas za TTL
+        clock[0] += 1.1
+        
+        # Cleanup
+        test_func.cleanup()
+        
+        # Nové volanie by malo vypočítať znova
+        result2 = test_func(5)
+        assert result2 == 10
+        assert call_count[0] == 2, "Expired entry should be recomputed after cleanup"
 
 
-def test_connection_pool():
+def test_connection_pool(runner):
     """Test connection pool"""
     pool = ConnectionPool(max_connections=3)
     
@@ -137,14 +173,14 @@ def test_connection_pool():
             pass
         # Connection released
     
-    asyncio.run(test_async())
+    runner.run(test_async())
     
     # Po použití by mali byť štatistiky
     stats_after = pool.get_stats()
     assert isinstance(stats_after, dict), "Pool should track stats"
 
 
-def test_connection_pool_context_manager():
+def test_connection_pool_context_manager(runner):
     """Test connection pool as context manager"""
     pool = get_connection_pool()
     
@@ -155,10 +191,10 @@ def test_connection_pool_context_manager():
         # Connection released
     
     # Test async context manager
-    asyncio.run(test_async())
+    runner.run(test_async())
 
 
-def test_batch_requests():
+def test_batch_requests(runner):
     """Test batch processing decorator"""
     call_count = [0]
     
@@ -176,10 +212,10 @@ def test_batch_requests():
         for i, result in enumerate(results):
             assert result == i * 2, f"Result {i} should be {i * 2}"
     
-    asyncio.run(run_test())
+    runner.run(run_test())
 
 
-def test_batch_requests_limits_concurrency_and_respects_delay():
+def test_batch_requests_limits_concurrency_and_respects_delay(runner):
     """batch_requests should process at most batch_size concurrently and delay between batches."""
     batch_size = 2
     delay = 0.15
@@ -222,10 +258,10 @@ def test_batch_requests_limits_concurrency_and_respects_delay():
             f"batch2_end={batch2_end:.3f}, delay={delay}"
         )
 
-    asyncio.run(run_test())
+    runner.run(run_test())
 
 
-def test_batch_requests_propagates_exceptions_per_call():
+def test_batch_requests_propagates_exceptions_per_call(runner):
     """If one call raises, only that call should fail; others should still resolve."""
     @batch_requests(batch_size=3, delay=0.01)
     async def maybe_fail(x):
@@ -252,28 +288,29 @@ def test_batch_requests_propagates_exceptions_per_call():
         except ValueError as e:
             assert str(e) == "bad:2"
 
-    asyncio.run(run_test())
+    runner.run(run_test())
 
 
 def test_performance_improvement():
     """Test, že cache skutočne zlepšuje výkon"""
     call_count = [0]
     
-    @cache_result(ttl=60)
-    def slow_function(x):
-        call_count[0] += 1
-        time.sleep(0.05)  # Simulácia pomalého výpočtu
-        return x * 2
-    
-    # Prvé volanie - pomalé
-    start1 = time.time()
-    result1 = slow_function(5)
-    time1 = time.time() - start1
-    
-    # Druhé volanie - rýchle (z cache)
-    start2 = time.time()
-    result2 = slow_function(5)
-    time2 = time.time() - start2
+    with virtual_clock() as clock:
+        @cache_result(ttl=60)
+        def slow_function(x):
+            call_count[0] += 1
+            clock[0] += 0.05  # Simulácia pomalého výpočtu
+            return x * 2
+        
+        # Prvé volanie - pomalé
+        start1 = clock[0]
+        result1 = slow_function(5)
+        time1 = clock[0] - start1
+        
+        # Druhé volanie - rýchle (z cache)
+        start2 = clock[0]
+        result2 = slow_function(5)
+        time2 = clock[0] - start2
     
     assert result1 == result2 == 10, "Results should be the same"
     assert call_count[0] == 1, "Function should be called only once"
@@ -297,14 +334,18 @@ if __name__ == "__main__":
     passed = 0
     failed = 0
     
-    for name, test_func in tests:
-        try:
-            test_func()
-            print(f"✅ {name}")
-            passed += 1
-        except Exception as e:
-            print(f"❌ {name}: {e}")
-            failed += 1
+    with asyncio.Runner() as loop_runner:
+        for name, test_func in tests:
+            try:
+                if "runner" in inspect.signature(test_func).parameters:
+                    test_func(loop_runner)
+                else:
+                    test_func()
+                print(f"✅ {name}")
+                passed += 1
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+                failed += 1
     
     print()
     print("═══════════════════════════════════════")
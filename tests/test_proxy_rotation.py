@@ -94,7 +94,7 @@ def test_get_proxy():
     assert proxy is not None, "Proxy by malo byť dostupné"
 
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_make_request_with_proxy(mock_get):
     """Test HTTP requestu s proxy"""
     # Mock response
@@ -108,7 +108,7 @@ def test_make_request_with_proxy(mock_get):
     response = make_request_with_proxy("http://example.com/api")
     
     assert response is not None, "Response by mal byť vrátený"
-    assert mock_get.called, "requests.get by malo byť zavolané"
+    assert mock_get.called, "Session.get by malo byť zavolané"
 
 
 if __name__ == "__main__":
@@ -14,11 +14,11 @@ if backend_path not in sys.path:
 
 try:
     from services.redis_cache import (
+        _decode_value,
+        _encode_value,
         get_redis_client,
-        redis_delete,
-        redis_get,
         redis_get_stats,
-        redis_set,
+        redis_pipeline,
     )
 except ImportError:
     pytest.skip("Redis cache nie je dostupný")
@@ -26,53 +26,40 @@ except ImportError:
 
 def test_redis_cache_imports():
     """Test, či Redis cache sa dá importovať"""
-    try:
-        from backend.services.redis_cache import get_redis_client
-
-        assert get_redis_client is not None
-        assert callable(get_redis_client)
-    except ImportError:
-        pytest.skip("Redis cache nie je dostupný")
+    # Import prebehol už na úrovni modulu (inak by bol celý súbor preskočený)
+    assert get_redis_client is not None and callable(get_redis_client)
 
 
-def test_redis_client_initialization():
+def test_redis_client_initialization(redis_available):
     """Test, či Redis klient sa inicializuje (ak je Redis dostupný)"""
-    client = get_redis_client()
-
-    # Ak Redis nie je dostupný, client bude None (to je OK)
-    if client is None:
+    # Ak Redis nie je dostupný (ping zlyhal), je to OK
+    if not redis_available:
         pytest.skip("Redis nie je dostupný (to je OK pre lokálny vývoj)")
 
-    # Ak je dostupný, overiť, či funguje
-    assert client is not None
-    try:
-        client.ping()
-    except Exception:
-        pytest.skip("Redis klient nie je dostupný")
+    assert get_redis_client() is not None
 
 
-def test_redis_get_set_delete():
+def test_redis_get_set_delete(redis_available):
     """Test základných Redis operácií (get, set, delete)"""
-    client = get_redis_client()
-
-    if client is None:
+    if not redis_available:
         pytest.skip("Redis nie je dostupný")
 
     try:
-        # Test set
         test_key = "test_key_12345"
         test_value = {"test": "data", "number": 42}
-        redis_set(test_key, test_value, ttl=60)
 
-        # Test get
-        retrieved = redis_get(test_key)
-        assert retrieved is not None
-        assert retrieved == test_value
+        # set / get / delete / get v jednom round-tripe
+        with redis_pipeline() as pipe:
+            pipe.setex(test_key, 60, _encode_value(test_value))
+            pipe.get(test_key)
+            pipe.delete(test_key)
+            pipe.get(test_key)
+            ok, raw, _, raw_deleted = pipe.execute()
 
-        # Test delete
-        redis_delete(test_key)
-        deleted = redis_get(test_key)
-        assert deleted is None
+        assert ok
+        assert raw is not None
+        assert _decode_value(raw) == test_value
+        assert raw_deleted is None
 
     except Exception as e:
         pytest.skip(f"Redis operácie zlyhali: {e}")
@@ -139,3 +126,60 @@ def test_redis_fallback_to_memory():
 
     except ImportError:
         pytest.skip("Cache service nie je dostupný")
+
+
+def test_cache_lock_single_flight():
+    """Test, či zámok (Redis SET NX alebo in-memory) pustí len jedného držiteľa"""
+    try:
+        from backend.services.cache import acquire_lock, is_locked, release_lock
+
+        lock_key = "lock:test_single_flight_12345"
+
+        token = acquire_lock(lock_key, ttl=5)
+        assert token
+        assert acquire_lock(lock_key, ttl=5) is None
+        assert is_locked(lock_key)
+
+        # Cudzí token zámok neuvoľní
+        release_lock(lock_key, "foreign-token")
+        assert is_locked(lock_key)
+
+        release_lock(lock_key, token)
+        assert not is_locked(lock_key)
+        token = acquire_lock(lock_key, ttl=5)
+        assert token
+
+        # Vyčistiť
+        release_lock(lock_key, token)
+
+    except ImportError:
+        pytest.skip("Cache service nie je dostupný")
+
+
+def test_cache_lock_release_after_expiry(monkeypatch):
+    """Vypršaný držiteľ neuvoľní zámok, ktorý medzitým získal iný (in-memory cesta)"""
+    try:
+        from backend.services import cache
+    except ImportError:
+        pytest.skip("Cache service nie je dostupný")
+
+    monkeypatch.setattr(cache, "REDIS_ENABLED", False)
+    lock_key = "lock:test_expiry_12345"
+
+    # ttl=0 - zámok vyprší hneď, ďalší acquire ho prevezme
+    stale_token = cache.acquire_lock(lock_key, ttl=0)
+    assert stale_token
+    token = cache.acquire_lock(lock_key, ttl=5)
+    assert token and token != stale_token
+
+    cache.release_lock(lock_key, stale_token)
+    assert cache.is_locked(lock_key)
+
+    # Vypršané zámky sa pri ďalšom acquire odstránia
+    cache.acquire_lock("lock:test_expiry_other", ttl=0)
+    cache.acquire_lock("lock:test_expiry_third", ttl=5)
+    assert "lock:test_expiry_other" not in cache._locks
+
+    cache.release_lock(lock_key, token)
+    cache.release_lock("lock:test_expiry_third", cache._locks["lock:test_expiry_third"][1])
+    assert not cache.is_locked(lock_key)